@@ -1,21 +1,24 @@
 import unittest
-from asyncio import gather
+from asyncio import gather, sleep
 
 from pulsar import (send, new_event_loop, get_application,
                     run_in_loop, get_event_loop)
 from pulsar.apps.test import dont_run_with_thread
+from pulsar.utils.internet import format_address
 
 from examples.echo.manage import server, Echo, EchoServerProtocol
 
 
 class TestEchoServerThread(unittest.TestCase):
     concurrency = 'thread'
+    argv = None
     server_cfg = None
 
     @classmethod
     async def setUpClass(cls):
         s = server(name=cls.__name__.lower(), bind='127.0.0.1:0',
-                   backlog=1024, concurrency=cls.concurrency)
+                   backlog=1024, concurrency=cls.concurrency,
+                   argv=cls.argv)
         cls.server_cfg = await send('arbiter', 'run', s)
         cls.client = Echo(cls.server_cfg.addresses[0])
 
@@ -134,11 +137,8 @@ class TestEchoServerThread(unittest.TestCase):
         self.assertEqual(client._requests_processed, 8)
 
     def _drop_conection(self, client):
-        conn1 = client.pool._queue.get_nowait()
-        conn1.close()
-        conn2 = client.pool._queue.get_nowait()
-        client.pool._queue.put_nowait(conn1)
-        client.pool._queue.put_nowait(conn2)
+        conn, _ = client.pool._available[0]
+        conn.close()
 
 
 @dont_run_with_thread
@@ -175,3 +175,26 @@ class TestEchoServerProcess(TestEchoServerThread):
         self.assertEqual(echo.sessions, 1)
         # self.assertEqual(echo(b'ciao!'), b'ciao!')
         # self.assertEqual(echo.sessions, 2)
+
+
+@dont_run_with_thread
+class TestEchoServerReusePort(TestEchoServerProcess):
+    argv = ['--reuse-port']
+
+    async def test_reuse_port(self):
+        app = await get_application(self.__class__.__name__.lower())
+        self.assertTrue(app.cfg.reuse_port)
+        address = self.server_cfg.addresses[0]
+        # bound to port 0, workers bind the port picked by the monitor
+        self.assertNotEqual(address[1], 0)
+        for _ in range(100):
+            info = await send(self.server_cfg.name, 'info')
+            if info['workers']:
+                break
+            await sleep(0.1)
+        self.assertTrue(info['workers'])
+        key = '%sserver' % self.server_cfg.name
+        for worker in info['workers']:
+            info = await send(worker['actor']['actor_id'], 'info')
+            self.assertEqual(info[key]['server']['sockets'],
+                             [{'address': format_address(address)}])
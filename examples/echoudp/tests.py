@@ -1,9 +1,11 @@
 import unittest
+from asyncio import sleep
 
 from pulsar import (
     send, new_event_loop, get_application, get_actor, get_event_loop
 )
 from pulsar.apps.test import dont_run_with_thread
+from pulsar.utils.internet import format_address
 
 from examples.echoudp.manage import server, Echo, EchoUdpServerProtocol
 
@@ -12,12 +14,14 @@ from examples.echoudp.manage import server, Echo, EchoUdpServerProtocol
                  "uvloop does not work with udp servers")
 class TestEchoUdpServerThread(unittest.TestCase):
     concurrency = 'thread'
+    argv = None
     server_cfg = None
 
     @classmethod
     async def setUpClass(cls):
         s = server(name=cls.__name__.lower(), bind='127.0.0.1:0',
-                   concurrency=cls.concurrency)
+                   concurrency=cls.concurrency,
+                   argv=cls.argv)
         cls.server_cfg = await send('arbiter', 'run', s)
         cls.client = Echo(cls.server_cfg.addresses[0])
 
@@ -74,3 +78,28 @@ class TestEchoUdpServerProcess(TestEchoUdpServerThread):
         echo = self.sync_client()
         self.assertEqual(echo(b'ciao!'), b'ciao!')
         self.assertEqual(echo(b'fooooooooooooo!'),  b'fooooooooooooo!')
+
+
+@dont_run_with_thread
+@unittest.skipIf(get_actor().cfg.event_loop == 'uv',
+                 "uvloop does not work with udp servers")
+class TestEchoUdpServerReusePort(TestEchoUdpServerProcess):
+    argv = ['--reuse-port']
+
+    async def test_reuse_port(self):
+        app = await get_application(self.__class__.__name__.lower())
+        self.assertTrue(app.cfg.reuse_port)
+        address = self.server_cfg.addresses[0]
+        # bound to port 0, workers bind the port picked by the monitor
+        self.assertNotEqual(address[1], 0)
+        for _ in range(100):
+            info = await send(self.server_cfg.name, 'info')
+            if info['workers']:
+                break
+            await sleep(0.1)
+        self.assertTrue(info['workers'])
+        key = '%sserver' % self.server_cfg.name
+        for worker in info['workers']:
+            info = await send(worker['actor']['actor_id'], 'info')
+            self.assertEqual(info[key]['server']['sockets'],
+                             [{'address': format_address(address)}])
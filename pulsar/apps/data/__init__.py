@@ -3,6 +3,7 @@ from .store import (
     parse_store_url, create_store, register_store, data_stores,
     NoSuchStore
 )
+from .codecs import Codecs, register_codec, get_codec
 from .channels import Channels
 from . import redis     # noqa
 from .pulsards import start_store
@@ -20,5 +21,8 @@ __all__ = [
     'data_stores',
     'NoSuchStore',
     'start_store',
-    'Channels'
+    'Channels',
+    'Codecs',
+    'register_codec',
+    'get_codec'
 ]
@@ -1,15 +1,15 @@
 import re
 import logging
-import json
 from functools import wraps
 from enum import Enum
 from asyncio import gather
 from collections import namedtuple, OrderedDict
 
-from pulsar import ProtocolError
+from pulsar.utils.string import gen_unique_id
 from pulsar.apps.ds import redis_to_py_pattern
 
 from .store import PubSubClient
+from .codecs import Json    # noqa
 
 
 event_callbacks = namedtuple('event_callbacks', 'name pattern regex callbacks')
@@ -30,6 +30,7 @@ can_connect = frozenset((StatusType.initialised, StatusType.disconnected))
 
 
 RECONNECT_LAG = 2
+CODEC_EVENT = 'codec'
 DEFAULT_NAMESPACE = ''
 DEFAULT_CHANNEL = 'server'
 
@@ -43,20 +44,6 @@ class CallbackError(Exception):
     """
 
 
-class Json:
-
-    def encode(self, msg):
-        return json.dumps(msg)
-
-    def decode(self, msg):
-        if isinstance(msg, bytes):
-            msg = msg.decode('utf-8')
-        try:
-            return json.loads(msg)
-        except Exception:
-            raise ProtocolError('Invalid JSON') from None
-
-
 class Connector:
     namespace_delimiter = '_'
 
@@ -98,17 +85,28 @@ class Connector:
 
 class Channels(Connector, PubSubClient):
     """Manage channels for publish/subscribe
+
+    .. attribute:: codecs
+
+        Optional :class:`.Codecs` used by the implementation. When
+        available, the codecs each instance can decode are announced
+        on the status channel once connected, and the instance falls
+        back to the default codec as soon as a peer cannot decode the
+        preferred one.
     """
     statusType = StatusType
+    codecs = None
 
     def __init__(self, store, namespace=None, status_channel=None,
                  logger=None):
         super().__init__(store, namespace=namespace)
         self.store = store
+        self.uid = gen_unique_id()
         self.channels = OrderedDict()
         self.logger = logger or LOGGER
         self.status_channel = self.channel(status_channel or DEFAULT_CHANNEL)
         self.status = self.statusType.initialised
+        self._peers = set()
 
     @property
     def _loop(self):
@@ -129,6 +127,9 @@ class Channels(Connector, PubSubClient):
     def __call__(self, channel_name, message):
         if channel_name.startswith(self.namespace):
             name = channel_name[len(self.namespace):]
+            if (name == self.status_channel.name and self.codecs and
+                    message.get('event') == CODEC_EVENT):
+                self._codecs_announced(message.get('data'))
             channel = self.channels.get(name)
             if channel:
                 channel(message)
@@ -179,11 +180,13 @@ class Channels(Connector, PubSubClient):
                 self.status = StatusType.connecting
                 await self._connect(next_time)
 
-    async def publish(self, channel, event, data=None):
+    async def publish(self, channel, event, data=None, wait=True):
         """Publish a new ``event`` on a ``channel``
         :param channel: channel name
         :param event: event name
         :param data: optional payload to include in the event
+        :param wait: when ``False`` do not wait for the server to
+            acknowledge the event
         :return: a coroutine and therefore it must be awaited
         """
         raise NotImplementedError
@@ -196,6 +199,12 @@ class Channels(Connector, PubSubClient):
     async def _unsubscribe(self, channel):
         raise NotImplementedError
 
+    async def _announce_codecs(self):
+        """Publish :attr:`codecs` names on the status channel, encoded
+        with the default codec
+        """
+        raise NotImplementedError
+
     async def close(self):
         """Close channels and underlying store handler
 
@@ -231,6 +240,8 @@ class Channels(Connector, PubSubClient):
                 self,
                 self.status_channel.name
             )
+            if self.codecs:
+                await self._announce_codecs()
         except ConnectionError:
             self.status = StatusType.disconnected
             next_time = backoff(next_time) if next_time else RECONNECT_LAG
@@ -248,6 +259,25 @@ class Channels(Connector, PubSubClient):
             await gather(*[c.connect() for c in self.channels.values()
                            if c.name != self.status_channel.name])
 
+    def _codecs_announced(self, data):
+        if not isinstance(data, dict):
+            return
+        uid = data.get('id')
+        if uid == self.uid or uid in self._peers:
+            return
+        self._peers.add(uid)
+        codecs = self.codecs
+        if codecs.codec is not codecs.default:
+            if codecs.name not in data.get('codecs', ()):
+                self.logger.warning(
+                    '%s peer cannot decode %s messages - using %s',
+                    self, codecs.name, getattr(codecs.default, 'name', '')
+                )
+                codecs.fallback()
+        # let the new peer know about us
+        if self.status == StatusType.connected:
+            self._loop.create_task(self._announce_codecs())
+
 
 def safe_execution(method):
 
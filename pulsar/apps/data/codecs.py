@@ -0,0 +1,153 @@
+'''Codecs encode and decode the messages of :class:`.PubSub` handlers
+and :class:`.Channels`.
+
+A codec is an object with the ``encode`` and ``decode`` methods and a
+``name`` used to select it from the registry, for example in the
+``codec`` parameter of a store url::
+
+    store = create_store('redis://127.0.0.1:6379/9?codec=marshal')
+    channels = store.channels()
+
+Binary codecs prefix their payload with a two bytes header, ``0xff``
+followed by the codec ``tag``, so that :class:`.Codecs` can decode
+messages from peers using a different codec. ``0xff`` never starts a
+valid utf-8 string, therefore text codecs such as :class:`.Json` don't
+need a header.
+'''
+import json
+import marshal
+import struct
+
+from pulsar import ProtocolError, ImproperlyConfigured
+
+
+BINARY = 0xff
+HEADER = struct.Struct('!BB')
+
+codecs = {}
+binary_codecs = {}
+
+
+def register_codec(codec):
+    '''Register a ``codec`` class by its ``name``
+
+    Binary codecs must define a unique ``tag`` between 0 and 255.
+    Can be used as class decorator.
+    '''
+    codecs[codec.name] = codec
+    tag = getattr(codec, 'tag', None)
+    if tag is not None:
+        binary_codecs[tag] = codec
+    return codec
+
+
+def get_codec(codec):
+    '''Get a codec instance from a registered name
+
+    Anything which is not a string is returned as it is.
+    '''
+    if isinstance(codec, str):
+        codec_class = codecs.get(codec)
+        if codec_class is None:
+            raise ImproperlyConfigured('Unknown codec "%s"' % codec)
+        return codec_class()
+    return codec
+
+
+@register_codec
+class Json:
+    name = 'json'
+
+    def encode(self, msg):
+        return json.dumps(msg)
+
+    def decode(self, msg):
+        if isinstance(msg, bytes):
+            msg = msg.decode('utf-8')
+        try:
+            return json.loads(msg)
+        except Exception:
+            raise ProtocolError('Invalid JSON') from None
+
+
+@register_codec
+class Marshal:
+    '''Compact binary codec using :mod:`marshal`
+
+    It only handles builtin types and it is not secure against
+    maliciously constructed data, use it in trusted networks only.
+    '''
+    name = 'marshal'
+    tag = 1
+    version = 2
+
+    def encode(self, msg):
+        return HEADER.pack(BINARY, self.tag) + marshal.dumps(msg,
+                                                             self.version)
+
+    def decode(self, msg):
+        try:
+            return marshal.loads(memoryview(msg)[HEADER.size:])
+        except Exception:
+            raise ProtocolError('Invalid marshal message') from None
+
+
+class Codecs:
+    '''Encode with the negotiated codec and decode any registered codec
+
+    .. attribute:: preferred
+
+        the codec requested by the application
+
+    .. attribute:: codec
+
+        the codec used for encoding, it starts as :attr:`preferred` and
+        falls back to :attr:`default` when a peer cannot decode it
+
+    .. attribute:: default
+
+        codec for messages without a binary header, :attr:`preferred`
+        if it is a text codec, otherwise :class:`.Json`
+    '''
+    def __init__(self, codec):
+        self.preferred = self.codec = codec
+        if getattr(codec, 'tag', None) is None:
+            self.default = codec
+        else:
+            self.default = Json()
+        self._decoders = {}
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, self.name)
+    __str__ = __repr__
+
+    @property
+    def name(self):
+        return getattr(self.codec, 'name', None)
+
+    def names(self):
+        '''Names of the codecs this object can decode
+        '''
+        names = set(binary_codecs[tag].name for tag in binary_codecs)
+        names.add(getattr(self.default, 'name', None))
+        return sorted((n for n in names if n))
+
+    def fallback(self):
+        '''Encode with :attr:`default` from now on
+        '''
+        self.codec = self.default
+
+    def encode(self, msg):
+        return self.codec.encode(msg)
+
+    def decode(self, msg):
+        if msg[:1] == b'\xff' and len(msg) >= HEADER.size:
+            tag = HEADER.unpack_from(msg)[1]
+            decoder = self._decoders.get(tag)
+            if decoder is None:
+                codec = binary_codecs.get(tag)
+                if codec is None:
+                    raise ProtocolError('Unknown binary codec %d' % tag)
+                decoder = self._decoders[tag] = codec()
+            return decoder.decode(msg)
+        return self.default.decode(msg)
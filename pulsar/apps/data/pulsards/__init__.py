@@ -1,10 +1,11 @@
 from pulsar.apps.data import register_store
 
 from .startds import start_store
+from .local import LocalStore
 from ..redis import store
 
 
-__all__ = ['start_store']
+__all__ = ['start_store', 'LocalStore']
 
 
 class PulsarStore(store.RedisStore):
@@ -12,3 +13,4 @@ class PulsarStore(store.RedisStore):
 
 
 register_store('pulsar', 'pulsar.apps.data.pulsards:PulsarStore')
+register_store('local', 'pulsar.apps.data.pulsards:LocalStore')
@@ -0,0 +1,263 @@
+'''In-process pulsar-ds store.
+
+A ``local://`` url creates a :class:`.LocalStore` which executes commands
+directly on a pulsar-ds :class:`.Storage` living in the same process.
+There is no socket and replies are never encoded into, or parsed from,
+the redis protocol::
+
+    store = create_store('local://cache/0')
+    client = store.client()
+    await client.set('foo', 'bar')
+
+Stores with the same name and event loop share the same data, which is
+discarded when the last of them closes.
+Publish/subscribe is not supported.
+'''
+import logging
+
+import pulsar
+from pulsar.apps.ds import redis_parser
+from pulsar.apps.ds.client import ClientMixin
+from pulsar.apps.ds.parser import response_error
+from pulsar.apps.ds.server import Storage
+
+from ..redis.client import Consumer, ResponseError
+from ..redis.store import RedisStore
+
+
+LOGGER = logging.getLogger('pulsar.local')
+
+servers = {}
+
+
+def local_server(loop, name):
+    '''The :class:`.LocalServer` called ``name`` for event ``loop``
+    '''
+    key = (loop, name)
+    server = servers.get(key)
+    if server is None:
+        servers[key] = server = LocalServer(loop, name)
+    return server
+
+
+def to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    elif isinstance(value, str):
+        return value.encode('utf-8')
+    elif isinstance(value, (bytearray, memoryview)):
+        return bytes(value)
+    else:
+        return str(value).encode('utf-8')
+
+
+def to_reply(value):
+    if value is None or isinstance(value, (bytes, bytearray, str)):
+        return value if value is None else to_bytes(value)
+    elif hasattr(value, '__len__'):
+        return [to_reply(v) for v in value]
+    else:
+        return to_bytes(value)
+
+
+class LocalServer:
+    '''Owns the :class:`.Storage` of one or more :class:`.LocalStore`
+    '''
+    def __init__(self, loop, name):
+        self.name = name
+        self.cfg = pulsar.Config(apps=['pulsards'])
+        self.logger = getattr(loop, 'logger', LOGGER)
+        self._loop = loop
+        self._parser_class = redis_parser(self.cfg.redis_py_parser)
+        self._key_value_store = Storage(self, self.cfg)
+        self._stores = set()
+
+    def __repr__(self):
+        return 'local://%s' % self.name
+
+    @property
+    def storage(self):
+        return self._key_value_store
+
+    def info(self):
+        return {'server': {'name': self.name}}
+
+    def add(self, store):
+        '''Add a :class:`.LocalStore` using this server
+        '''
+        self._stores.add(store)
+
+    def remove(self, store):
+        '''Remove ``store``, the server is discarded with its last store
+        '''
+        self._stores.discard(store)
+        key = (self._loop, self.name)
+        if not self._stores and servers.get(key) is self:
+            servers.pop(key)
+            self._key_value_store.close()
+
+
+class LocalClient(ClientMixin):
+    '''A pulsar-ds client receiving replies as python objects
+    '''
+    channels = patterns = frozenset()
+
+    def __init__(self, store, database):
+        super().__init__(store)
+        self.database = database
+        self.password = store._password
+        self.watched_keys = None
+        self._loop = store._loop
+        self._replies = []
+        self._arrays = []
+        self._waiter = None
+
+    @property
+    def idle(self):
+        '''``True`` when the client has no connection state
+        '''
+        return not (self.blocked or self.watched_keys or
+                    self.transaction is not None)
+
+    def call(self, args):
+        '''Execute a command and return its reply
+
+        When the command blocks the client, :meth:`wait` for the reply.
+        '''
+        self.execute([to_bytes(arg) for arg in args])
+        if self._replies:
+            return self._replies.pop()
+
+    def wait(self):
+        self._waiter = self._loop.create_future()
+        return self._waiter
+
+    # Client Mixin Implementation
+    def reply_ok(self):
+        self._reply(b'OK')
+
+    def reply_queued(self):
+        self._reply(b'QUEUED')
+
+    def reply_status(self, value):
+        self._reply(value.encode('utf-8'))
+
+    def reply_int(self, value):
+        self._reply(int(value))
+
+    def reply_one(self):
+        self._reply(1)
+
+    def reply_zero(self):
+        self._reply(0)
+
+    def reply_error(self, value, prefix=None):
+        self._reply(response_error('%s %s' % (prefix or 'ERR', value)))
+
+    def reply_wrongtype(self):
+        self._reply(response_error('WRONGTYPE Operation against a key '
+                                   'holding the wrong kind of value'))
+
+    def reply_bulk(self, value=None):
+        self._reply(None if value is None else to_bytes(value))
+
+    def reply_multi_bulk(self, value=None):
+        self._reply(to_reply(value))
+
+    def reply_multi_bulk_len(self, value):
+        if value:
+            self._arrays.append(([], value))
+        else:
+            self._reply([])
+
+    # Internals
+    def _write(self, response):
+        # Raw replies written by the storage, for example when a
+        # blocking command times out
+        parser = self.store._server._parser_class()
+        parser.feed(response)
+        self._reply(parser.get())
+
+    def _reply(self, value):
+        arrays = self._arrays
+        while arrays:
+            array, size = arrays[-1]
+            array.append(value)
+            if len(array) < size:
+                return
+            arrays.pop()
+            value = array
+        if self._waiter is None:
+            self._replies.append(value)
+        else:
+            waiter, self._waiter = self._waiter, None
+            if not waiter.done():
+                waiter.set_result(value)
+
+
+class LocalStore(RedisStore):
+    '''A :class:`.RedisStore` executing commands on an in-process
+    pulsar-ds :class:`.Storage`
+
+    The host part of the url is the name of the storage, stores with
+    the same name share their data.
+    '''
+    def _init(self, **kwargs):
+        super()._init(**kwargs)
+        self._server = local_server(self._loop, self._host or '')
+        self._server.add(self)
+        self._local = None
+
+    @property
+    def server(self):
+        return self._server
+
+    def pubsub(self, protocol=None, shared=False):
+        raise NotImplementedError('Publish/subscribe not supported by %s' %
+                                  self)
+
+    def channels(self, protocol=None, shared=True, **kw):
+        raise NotImplementedError('Channels not supported by %s' % self)
+
+    async def connect(self, protocol_factory=None):
+        raise NotImplementedError('%s has no connections' % self)
+
+    def close(self):
+        '''Close the store, the storage is discarded with the last store
+        using it
+        '''
+        self._server.remove(self)
+        return super().close()
+
+    async def execute(self, *args, primary=False, **options):
+        client = self._local_client()
+        response = client.call(args)
+        if client.blocked:
+            response = await client.wait()
+        if isinstance(response, Exception):
+            raise response
+        return Consumer.parse_response(response, args[0], options)
+
+    async def execute_pipeline(self, commands, raise_on_error=True):
+        client = self._local_client()
+        responses = []
+        for args, _ in commands:
+            response = client.call(args)
+            if client.blocked:
+                response = await client.wait()
+            responses.append(response)
+        response = Consumer.pipeline_response(commands, raise_on_error,
+                                              responses)
+        if isinstance(response, ResponseError):
+            raise response.exception
+        return response
+
+    #    INTERNALS
+    def _local_client(self):
+        # A client is reused until it holds state, blocked or inside
+        # a transaction, which must not leak into other requests
+        client = self._local
+        if client is None or not client.idle:
+            client = LocalClient(self._server.storage, self._database)
+            self._local = client
+        return client
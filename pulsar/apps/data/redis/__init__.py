@@ -25,19 +25,42 @@ Redis Pipeline
 .. autoclass:: pulsar.apps.data.redis.client.Pipeline
    :members:
    :member-order: bysource
+
+Sharded Redis Store
+~~~~~~~~~~~~~~~~~~~~
+
+.. automodule:: pulsar.apps.data.redis.sharded
+
+.. autoclass:: pulsar.apps.data.redis.sharded.ShardedRedisStore
+   :members:
+   :member-order: bysource
+
+Near Cache
+~~~~~~~~~~~~~~~~~~~~
+
+.. automodule:: pulsar.apps.data.redis.nearcache
+
+.. autoclass:: pulsar.apps.data.redis.nearcache.NearCacheStore
+   :members:
+   :member-order: bysource
+
+.. autoclass:: pulsar.apps.data.redis.nearcache.CachePolicy
 '''
 from pulsar.utils.config import Global
 from pulsar.apps.data import register_store
 from pulsar.apps.ds import RedisError, NoScriptError, redis_parser
 
 from .store import RedisStore, RedisStoreConnection
+from .sharded import ShardedRedisStore
+from .nearcache import NearCacheStore, CachePolicy
 from .client import ResponseError, Consumer, Pipeline
 from .lock import RedisScript, LockError
 
 
 __all__ = ['RedisStore', 'RedisError', 'NoScriptError', 'redis_parser',
            'RedisStoreConnection', 'Consumer', 'Pipeline', 'ResponseError',
-           'RedisScript', 'LockError']
+           'RedisScript', 'LockError', 'ShardedRedisStore',
+           'NearCacheStore', 'CachePolicy']
 
 
 class RedisServer(Global):
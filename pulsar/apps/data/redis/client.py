@@ -1,4 +1,4 @@
-from itertools import chain
+from itertools import chain, islice
 import datetime
 
 import pulsar
@@ -100,6 +100,18 @@ def sort_return_tuples(response, groups=None, **options):
     return list(zip(*[response[i::groups] for i in range(groups)]))
 
 
+def is_transaction(commands):
+    '''Check if a list of pipelined ``commands`` is a ``MULTI ... EXEC``
+    transaction
+    '''
+    return bool(commands) and to_string(commands[0][0][0]).upper() == 'MULTI'
+
+
+def is_command(cmd):
+    return (len(cmd) == 2 and isinstance(cmd[0], tuple) and
+            isinstance(cmd[1], dict))
+
+
 def pubsub_callback(response, subcommand=None):
     if subcommand == 'numsub':
         it = iter(response)
@@ -149,10 +161,49 @@ class Consumer(pulsar.ProtocolConsumer):
             chunk = conn.parser.pack_pipeline(args)
         conn._transport.write(chunk)
 
-    def parse_response(self, response, command, options):
-        callback = self.RESPONSE_CALLBACKS.get(command.upper())
+    @classmethod
+    def parse_response(cls, response, command, options):
+        callback = cls.RESPONSE_CALLBACKS.get(command.upper())
         return callback(response, **options) if callback else response
 
+    @classmethod
+    def pipeline_response(cls, commands, raise_on_error, responses):
+        '''Build the result of a pipeline from the list of raw ``responses``
+        '''
+        if not is_transaction(commands):
+            return cls.plain_pipeline_response(commands, raise_on_error,
+                                               responses)
+        error = None
+        result = responses[-1]
+        response = []
+        if isinstance(result, Exception):
+            error = result
+            result = responses[1:-1]
+        for cmds, resp in zip(commands[1:-1], result):
+            args, options = cmds
+            if isinstance(resp, Exception) and not error:
+                error = resp
+            resp = cls.parse_response(resp, args[0], options)
+            response.append(resp)
+        if error and raise_on_error:
+            response = ResponseError(error)
+        return response
+
+    @classmethod
+    def plain_pipeline_response(cls, commands, raise_on_error, responses):
+        error = None
+        response = []
+        for cmds, resp in zip(commands, responses):
+            if isinstance(resp, Exception):
+                error = error or resp
+            else:
+                args, options = cmds
+                resp = cls.parse_response(resp, args[0], options)
+            response.append(resp)
+        if error and raise_on_error:
+            response = ResponseError(error)
+        return response
+
     def data_received(self, data):
         conn = self._connection
         parser = conn.parser
@@ -175,21 +226,8 @@ class Consumer(pulsar.ProtocolConsumer):
                     responses.append(response)
                     response = parser.get()
                 if len(responses) == len(commands):
-                    error = None
-                    result = responses[-1]
-                    response = []
-                    if isinstance(result, Exception):
-                        error = result
-                        result = responses[1:-1]
-                    for cmds, resp in zip(commands[1:-1], result):
-                        args, options = cmds
-                        if isinstance(resp, Exception) and not error:
-                            error = resp
-                        resp = self.parse_response(resp, args[0], options)
-                        response.append(resp)
-                    if error and raise_on_error:
-                        response = ResponseError(error)
-                    self.finished(response)
+                    self.finished(self.pipeline_response(
+                        commands, raise_on_error, responses))
         except Exception as exc:
             self.finished(exc=exc)
 
@@ -200,9 +238,18 @@ class RedisClient:
     .. attribute:: store
 
         The :class:`.RedisStore` for this client.
+
+    .. attribute:: read_your_writes
+
+        Seconds during which read commands are sent to the primary server,
+        rather than to a replica, after this client executed a write.
+        Zero (default) disables the fence.
     '''
-    def __init__(self, store):
+    _fence = 0
+
+    def __init__(self, store, read_your_writes=0):
         self.store = store
+        self.read_your_writes = read_your_writes
 
     def __repr__(self):
         return '%s(%s)' % (self.__class__.__name__, self.store)
@@ -215,12 +262,18 @@ class RedisClient:
     def pubsub(self, **kw):
         return RedisPubSub(self.store, **kw)
 
-    def pipeline(self):
+    def pipeline(self, transaction=True):
         '''Create a :class:`.Pipeline` for pipelining commands
         '''
-        return Pipeline(self.store)
+        return Pipeline(self.store, transaction=transaction)
 
     def execute(self, command, *args, **options):
+        if self.read_your_writes:
+            now = self._loop.time()
+            if to_string(command).upper() not in self.store.read_commands:
+                self._fence = now + self.read_your_writes
+            elif now < self._fence:
+                options['primary'] = True
         return self.store.execute(command, *args, **options)
     execute_command = execute
     immediate_execute = execute
@@ -492,11 +545,62 @@ class RedisClient:
         return self.execute(command, script, num_keys, *all_args)
 
 
+class PipelineStream:
+    '''Asynchronous iterator over the results of a pipeline committed
+    in chunks.
+
+    Each iteration returns the list of results of a chunk of commands.
+    The next chunk is sent to the server while the current one is being
+    consumed, and no more chunks are written until the current one has
+    been answered, therefore at most two chunks are held in memory.
+    '''
+    def __init__(self, pipeline, commands, chunk_size, raise_on_error):
+        self.pipeline = pipeline
+        self.commands = iter(commands)
+        self.chunk_size = chunk_size
+        self.raise_on_error = raise_on_error
+        self._next = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        current = self._next or self._send()
+        if current is None:
+            raise StopAsyncIteration
+        self._next = None
+        try:
+            result = await current
+        except Exception:
+            self.commands = iter(())
+            raise
+        self._next = self._send()
+        return result
+
+    def _send(self):
+        chunk = list(islice(self.commands, self.chunk_size))
+        if chunk:
+            pipe = self.pipeline
+            commands = [cmd if is_command(cmd) else (cmd, {})
+                        for cmd in chunk]
+            if pipe.transaction:
+                commands = pipe._transaction(commands)
+            return pipe._loop.create_task(pipe.store.execute_pipeline(
+                commands, self.raise_on_error))
+
+
 class Pipeline(RedisClient):
     '''A :class:`.RedisClient` for pipelining commands
+
+    .. attribute:: transaction
+
+        When ``True`` (default) the commands are wrapped in a
+        ``MULTI ... EXEC`` transaction, otherwise they are sent as plain
+        pipelined commands.
     '''
-    def __init__(self, store):
+    def __init__(self, store, transaction=True):
         self.store = store
+        self.transaction = transaction
         self.reset()
 
     def execute(self, *args, **kwargs):
@@ -509,10 +613,34 @@ class Pipeline(RedisClient):
     def commit(self, raise_on_error=True):
         '''Send commands to redis.
         '''
-        cmds = list(chain([(('multi',), {})],
-                          self.command_stack, [(('exec',), {})]))
+        cmds = self.command_stack
+        if self.transaction:
+            cmds = self._transaction(cmds)
         self.reset()
         return self.store.execute_pipeline(cmds, raise_on_error)
 
+    def stream(self, commands=None, chunk_size=1000, raise_on_error=True):
+        '''Commit commands in chunks of ``chunk_size``.
+
+        :param commands: optional iterable over commands, either tuples
+            of arguments or ``(args, options)`` pairs. If not given the
+            commands in this pipeline are used.
+        :return: a :class:`.PipelineStream`, iterate over it with
+            ``async for`` to obtain the result of each chunk::
+
+                commands = (('set', key, value) for key, value in data)
+                async for results in pipe.stream(commands):
+                    ...
+
+        With ``transaction`` enabled each chunk is a transaction.
+        '''
+        if commands is None:
+            commands = self.command_stack
+            self.reset()
+        return PipelineStream(self, commands, chunk_size, raise_on_error)
+
     def immediate_execute(self, command, *args, **options):
         return self.store.execute(command, *args, **options)
+
+    def _transaction(self, commands):
+        return list(chain([(('multi',), {})], commands, [(('exec',), {})]))
@@ -1,11 +1,18 @@
 import uuid
 from asyncio import sleep
+from hashlib import sha1
 
 from pulsar import isawaitable, LockError, LockBase
+from pulsar.apps.ds import NoScriptError
 
 
 class RedisScript:
     '''An executable Lua script object
+
+    The script is registered with the store the first time it is
+    called, registered scripts are loaded into the server whenever the
+    store creates a new connection. If the server has lost the script,
+    for example after a restart, the script is executed via ``EVAL``.
     '''
     def __init__(self, script):
         self.script = script
@@ -14,39 +21,69 @@ class RedisScript:
     async def __call__(self, client, keys=None, args=None):
         '''Execute the script, passing any required ``args``
         '''
-        if self.sha not in client.store.loaded_scripts:
-            sha = await client.immediate_execute('SCRIPT', 'LOAD', self.script)
-            self.sha = sha.decode('utf-8')
-            client.store.loaded_scripts.add(self.sha)
-
+        if self.sha is None:
+            self.sha = sha1(self.script.encode('utf-8')).hexdigest()
+        registered = client.store.register_script(self)
         result = client.evalsha(self.sha, keys, args)
         if isawaitable(result):
-            result = await result
+            try:
+                result = await result
+            except NoScriptError:
+                result = await client.eval(self.script, keys, args)
+        elif registered:
+            # pipeline, make sure the script is loaded before the commit
+            await client.immediate_execute('SCRIPT', 'LOAD', self.script)
         return result
 
 
 class Lock(LockBase):
     """Asynchronous locking primitive for distributing computing
+
+    When ``notify`` is ``True`` (default), a blocking :meth:`acquire`
+    waits for a wake-up token pushed into a list by :meth:`release`
+    rather than polling the server. Blocked waiters are woken in FIFO
+    order, and new acquirers do not jump ahead of waiting clients.
+    Polling every ``sleep`` seconds is used as a fallback when the
+    remaining blocking time is shorter than :attr:`notify_timeout`
+    or ``notify`` is ``False``.
+
+    Waiting clients are counted in a key which expires unless refreshed
+    by a waiting client, so that clients which never stopped waiting,
+    for example after a crash, are eventually forgotten.
     """
-    def __init__(self, client, name, timeout=None, blocking=True, sleep=0.2):
+    notify_timeout = 1
+    waiters_timeout = 2
+
+    def __init__(self, client, name, timeout=None, blocking=True, sleep=0.2,
+                 notify=True):
         super().__init__(name, loop=client._loop, timeout=timeout,
                          blocking=blocking)
         self._token = None
         self.client = client
         self.sleep = sleep
+        self.notify = notify
         if self.blocking:
             self.sleep = min(self.sleep, self.blocking)
+        # keys in the same hash slot as the lock, for sharded stores
+        tag = name if '{' in name else '{%s}' % name
+        self._waiters = '%s:waiters' % tag
+        self._signal = '%s:signal' % tag
+        # expiry of the waiters counter, longer than the interval
+        # between two refreshes by a waiting client
+        self._waiters_ttl = int(1000 * (max(self.sleep, self.notify_timeout) +
+                                        self.waiters_timeout))
 
     def locked(self):
         ''''Return the token that acquire the lock or None.
         '''
         return bool(self._token)
 
-    async def _acquire(self):
+    async def _acquire(self, waiting=False):
         token = uuid.uuid1().hex.encode('utf-8')
         timeout = self.timeout and int(self.timeout * 1000) or ''
-        acquired = await self.lua_acquire(self.client, keys=[self.name],
-                                          args=[token, timeout])
+        acquired = await self.lua_acquire(
+            self.client, keys=[self.name, self._waiters],
+            args=[token, timeout, self._waiters_ttl if waiting else ''])
         if acquired:
             self._token = token
 
@@ -56,16 +93,30 @@ class Lock(LockBase):
         loop = self._loop
         start = loop.time()
         acquired = await self._acquire()
-        if self.blocking is False:
+        if acquired or self.blocking is False:
             return acquired
         timeout = self.blocking
         if timeout is True:
             timeout = 0
-        while not acquired:
-            if timeout and loop.time() - start >= timeout:
-                break
-            await sleep(self.sleep)
-            acquired = await self._acquire()
+        client = self.client
+        await self._wait(1)
+        try:
+            while True:
+                # a release may have happened before we were counted
+                acquired = await self._acquire(True)
+                if acquired:
+                    break
+                remaining = timeout - loop.time() + start if timeout else 0
+                if timeout and remaining <= 0:
+                    break
+                if self.notify and (not timeout or
+                                    remaining >= self.notify_timeout):
+                    await client.blpop(self._signal, self.notify_timeout)
+                else:
+                    await sleep(min(self.sleep, remaining)
+                                if timeout else self.sleep)
+        finally:
+            await self._wait(-1)
 
         return acquired
 
@@ -73,24 +124,60 @@ class Lock(LockBase):
         expected_token = self._token
         if not expected_token:
             raise LockError("Cannot release an unlocked lock")
-        released = await self.lua_release(self.client, keys=[self.name],
-                                          args=[expected_token])
+        released = await self.lua_release(
+            self.client, keys=[self.name, self._waiters, self._signal],
+            args=[expected_token])
         self._token = None
         if not released:
             raise LockError("Cannot release a lock that's no longer owned")
         return True
 
+    def _wait(self, increment):
+        return self.lua_wait(self.client, keys=[self._waiters],
+                             args=[increment, self._waiters_ttl])
+
+    # KEYS[1] - lock name
+    # KEYS[2] - number of waiting clients
+    # ARGS[1] - token
+    # ARGS[2] - timeout in milliseconds
+    # ARGS[3] - expiry in milliseconds of the number of waiting clients,
+    #           not empty when called by a waiting client
+    # return 1 if the lock was acquired, otherwise 0
     lua_acquire = RedisScript("""
-        if redis.call('setnx', KEYS[1], ARGV[1]) == 1 then
-            if ARGV[2] ~= '' then
-                redis.call('pexpire', KEYS[1], ARGV[2])
-            end
-            return 1
+        if ARGV[3] ~= '' then
+            redis.call('pexpire', KEYS[2], ARGV[3])
+        end
+        if redis.call('exists', KEYS[1]) == 1 then
+            return 0
+        end
+        if ARGV[3] == '' and tonumber(redis.call('get', KEYS[2]) or 0) > 0
+        then
+            return 0
         end
-        return 0
+        redis.call('set', KEYS[1], ARGV[1])
+        if ARGV[2] ~= '' then
+            redis.call('pexpire', KEYS[1], ARGV[2])
+        end
+        return 1
+    """)
+
+    # KEYS[1] - number of waiting clients
+    # ARGS[1] - 1 when a client starts waiting, -1 when it stops
+    # ARGS[2] - expiry in milliseconds
+    # return the number of waiting clients
+    lua_wait = RedisScript("""
+        local waiters = redis.call('incrby', KEYS[1], ARGV[1])
+        if waiters > 0 then
+            redis.call('pexpire', KEYS[1], ARGV[2])
+        else
+            redis.call('del', KEYS[1])
+        end
+        return waiters
     """)
 
     # KEYS[1] - lock name
+    # KEYS[2] - number of waiting clients
+    # KEYS[3] - wake-up list
     # ARGS[1] - token
     # return 1 if the lock was released, otherwise 0
     lua_release = RedisScript("""
@@ -99,5 +186,11 @@ class Lock(LockBase):
             return 0
         end
         redis.call('del', KEYS[1])
+        if tonumber(redis.call('get', KEYS[2]) or 0) > 0 then
+            redis.call('lpush', KEYS[3], 1)
+            redis.call('ltrim', KEYS[3], 0, 0)
+        else
+            redis.call('del', KEYS[2], KEYS[3])
+        end
         return 1
     """)
@@ -0,0 +1,335 @@
+'''In-process near-cache in front of a redis or pulsar-ds store.
+
+Values returned by ``GET``, ``HGET`` and ``HGETALL`` are kept in a
+bounded LRU cache so that hot keys are served without a round trip to
+the server::
+
+    store = NearCacheStore(create_store('redis://127.0.0.1:6379/9'),
+                           max_entries=10000, ttl=5)
+    client = store.client()
+    await client.get('hot')     # from the server
+    await client.get('hot')     # from the cache
+
+Keys written through the near-cache are invalidated as soon as the write
+completes. Writes from other processes are only seen when an entry
+expires, unless all processes share an ``invalidation_channel``, in
+which case the invalidated keys are published to the other caches.
+Cache ``policies`` can be set for key prefixes::
+
+    store = NearCacheStore(store, ttl=5, policies={
+        'session:': {'ttl': 0},     # never cached
+        'config:': {'ttl': 300, 'max_value_size': 1024}})
+'''
+from collections import OrderedDict
+
+from pulsar.utils.pep import to_string
+from pulsar.utils.string import gen_unique_id
+from pulsar.apps.data.codecs import Json
+
+from .client import RedisClient, Pipeline
+from .sharded import command_keys
+
+
+class CachePolicy:
+    '''Caching policy for a group of keys
+
+    :param ttl: seconds a value is kept in the cache, zero disables
+        caching
+    :param max_value_size: values larger than this number of bytes
+        are not cached
+    '''
+    __slots__ = ('ttl', 'max_value_size')
+
+    def __init__(self, ttl=60, max_value_size=None):
+        self.ttl = ttl
+        self.max_value_size = max_value_size
+
+    def __repr__(self):
+        return 'CachePolicy(ttl=%s, max_value_size=%s)' % (
+            self.ttl, self.max_value_size)
+
+
+class NearCacheStats:
+    '''Counters of a :class:`.NearCacheStore`
+    '''
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+    def as_dict(self):
+        return dict(hits=self.hits, misses=self.misses,
+                    evictions=self.evictions, expired=self.expired,
+                    invalidations=self.invalidations,
+                    hit_ratio=self.hit_ratio)
+
+
+def value_size(value):
+    if value is None:
+        return 0
+    elif isinstance(value, dict):
+        return sum((len(k) + len(v) for k, v in value.items()))
+    else:
+        return len(value)
+
+
+class NearCacheStore:
+    '''A :class:`.RedisStore` wrapper with an in-process LRU cache
+
+    :param store: the store to wrap
+    :param max_entries: maximum number of cached keys
+    :param max_size: optional maximum number of bytes of cached values
+    :param ttl: default :attr:`CachePolicy.ttl`
+    :param policies: dictionary of key prefixes and :class:`.CachePolicy`
+        or dictionaries of policy parameters
+    :param invalidation_channel: optional channel used to share
+        invalidations with other near-caches
+
+    .. attribute:: stats
+
+        The :class:`.NearCacheStats` of this near-cache
+    '''
+    # Commands served from the cache
+    cached_commands = frozenset(('GET', 'HGET', 'HGETALL'))
+    # Commands which invalidate the whole cache
+    clear_commands = frozenset(('FLUSHDB', 'FLUSHALL'))
+
+    def __init__(self, store, max_entries=10000, max_size=None, ttl=60,
+                 policies=None, invalidation_channel=None):
+        self.store = store
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.default_policy = CachePolicy(ttl)
+        self.policies = []
+        self.stats = NearCacheStats()
+        self.uid = gen_unique_id()
+        self.invalidation_channel = invalidation_channel
+        self._loop = store._loop
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._size = 0
+        self._pubsub = None
+        for prefix, policy in (policies or {}).items():
+            self.set_policy(prefix, policy)
+        if invalidation_channel:
+            self._pubsub = store.pubsub(protocol=Json(), shared=True)
+            self._pubsub.add_client(self._invalidated)
+            self._subscribed = self._loop.create_task(
+                self._pubsub.subscribe(invalidation_channel))
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, self.store)
+    __str__ = __repr__
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def name(self):
+        return self.store.name
+
+    @property
+    def read_commands(self):
+        return self.store.read_commands
+
+    @property
+    def loaded_scripts(self):
+        return self.store.loaded_scripts
+
+    @property
+    def size(self):
+        '''Number of bytes of cached values
+        '''
+        return self._size
+
+    def set_policy(self, prefix, policy):
+        '''Set the :class:`.CachePolicy` of keys starting with ``prefix``
+        '''
+        if not isinstance(policy, CachePolicy):
+            policy = CachePolicy(**policy)
+        policies = [p for p in self.policies if p[0] != prefix]
+        policies.append((prefix, policy))
+        # longest prefix first
+        policies.sort(key=lambda p: len(p[0]), reverse=True)
+        self.policies = policies
+
+    def policy(self, key):
+        '''The :class:`.CachePolicy` of ``key``
+        '''
+        for prefix, policy in self.policies:
+            if key.startswith(prefix):
+                return policy
+        return self.default_policy
+
+    def info(self):
+        info = self.stats.as_dict()
+        info.update(entries=len(self._entries), size=self._size)
+        return info
+
+    def invalidate(self, *keys):
+        '''Remove ``keys`` from the cache, all keys if none given
+        '''
+        if keys:
+            for key in keys:
+                key = to_string(key)
+                self._loading.pop(key, None)
+                entry = self._entries.pop(key, None)
+                if entry:
+                    self._size -= entry[0]
+                    self.stats.invalidations += 1
+        else:
+            self.stats.invalidations += len(self._entries)
+            self._entries.clear()
+            self._loading.clear()
+            self._size = 0
+
+    def client(self, read_your_writes=0):
+        '''Get a :class:`.RedisClient` for the near-cache'''
+        return RedisClient(self, read_your_writes=read_your_writes)
+
+    def pipeline(self, transaction=True):
+        '''Get a :class:`.Pipeline` for the near-cache'''
+        return Pipeline(self, transaction=transaction)
+
+    def pubsub(self, protocol=None, shared=False):
+        return self.store.pubsub(protocol=protocol, shared=shared)
+
+    def channels(self, protocol=None, shared=True, **kw):
+        return self.store.channels(protocol=protocol, shared=shared, **kw)
+
+    def ping(self):
+        return self.store.ping()
+
+    def register_script(self, script):
+        return self.store.register_script(script)
+
+    def flush(self):
+        return self.execute('flushdb')
+
+    async def close(self):
+        '''Clear the cache and close the store'''
+        self.invalidate()
+        if self._pubsub:
+            await self._subscribed
+            await self._pubsub.close()
+            self._pubsub = None
+        await self.store.close()
+
+    async def execute(self, command, *args, **options):
+        name = to_string(command).upper()
+        if name in self.cached_commands and args and not options:
+            key = to_string(args[0])
+            policy = self.policy(key)
+            if policy.ttl:
+                field = (name,) + tuple((to_string(a) for a in args[1:]))
+                found, value = self._get(key, field)
+                if found:
+                    self.stats.hits += 1
+                    return value
+                self.stats.misses += 1
+                token = self._loading[key] = object()
+                value = await self.store.execute(command, *args)
+                # a write may have invalidated the key in the meantime
+                if self._loading.get(key) is token:
+                    self._loading.pop(key)
+                    self._set(key, field, value, policy)
+                return dict(value) if isinstance(value, dict) else value
+        elif name not in self.read_commands:
+            try:
+                result = await self.store.execute(command, *args, **options)
+                return result
+            finally:
+                self._written(((name, args),))
+        result = await self.store.execute(command, *args, **options)
+        return result
+
+    async def execute_pipeline(self, commands, raise_on_error=True):
+        try:
+            result = await self.store.execute_pipeline(commands,
+                                                       raise_on_error)
+            return result
+        finally:
+            self._written((((to_string(args[0]).upper(), args[1:])
+                            for args, _ in commands)))
+
+    #    INTERNALS
+    def _get(self, key, field):
+        entry = self._entries.get(key)
+        if entry:
+            values = entry[1]
+            cached = values.get(field)
+            if cached:
+                value, size, expiry = cached
+                if expiry > self._loop.time():
+                    self._entries.move_to_end(key)
+                    if isinstance(value, dict):
+                        value = dict(value)
+                    return True, value
+                self.stats.expired += 1
+                values.pop(field)
+                entry[0] -= size
+                self._size -= size
+                if not values:
+                    self._entries.pop(key)
+        return False, None
+
+    def _set(self, key, field, value, policy):
+        size = value_size(value)
+        if policy.max_value_size and size > policy.max_value_size:
+            return
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [0, {}]
+        else:
+            self._entries.move_to_end(key)
+            old = entry[1].get(field)
+            if old:
+                entry[0] -= old[1]
+                self._size -= old[1]
+        entry[1][field] = (value, size, self._loop.time() + policy.ttl)
+        entry[0] += size
+        self._size += size
+        self._evict()
+
+    def _evict(self):
+        entries = self._entries
+        while entries and (len(entries) > self.max_entries or
+                           (self.max_size and self._size > self.max_size)):
+            _, entry = entries.popitem(last=False)
+            self._size -= entry[0]
+            self.stats.evictions += 1
+
+    def _written(self, commands):
+        keys = set()
+        clear = False
+        for name, args in commands:
+            if name in self.clear_commands:
+                clear = True
+            elif name not in self.read_commands:
+                keys.update((to_string(k)
+                             for k in command_keys(name.lower(), args)))
+        if clear:
+            self.invalidate()
+        elif keys:
+            self.invalidate(*keys)
+        else:
+            return
+        if self._pubsub:
+            self._pubsub.publish(self.invalidation_channel,
+                                 [self.uid, None if clear else list(keys)],
+                                 wait=False)
+
+    def _invalidated(self, channel, message):
+        uid, keys = message
+        if uid != self.uid:
+            if keys is None:
+                self.invalidate()
+            else:
+                self.invalidate(*keys)
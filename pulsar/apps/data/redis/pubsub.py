@@ -1,8 +1,12 @@
 from functools import partial
-from asyncio import gather
+from collections import deque
+from asyncio import gather, shield
 
-from pulsar import Protocol
+from pulsar import Protocol, ProtocolError
+from pulsar.utils.pep import to_string
 from pulsar.apps.data import PubSub, Channels, PubSubClient
+from pulsar.apps.data.channels import backoff, RECONNECT_LAG, CODEC_EVENT
+from pulsar.apps.data.codecs import Codecs
 
 
 class PubsubProtocol(Protocol):
@@ -11,11 +15,18 @@ class PubsubProtocol(Protocol):
         super().__init__(handler._loop, **kw)
         self.parser = self._producer._parser_class()
         self.handler = handler
+        self._subscribing = deque()
+        self.bind_event('connection_lost', self._connection_lost)
 
     async def execute(self, *args):
         # must be an asynchronous object like the base class method
         chunk = self.parser.multi_bulk(args)
         self._transport.write(chunk)
+        if args[0] in ('SUBSCRIBE', 'PSUBSCRIBE') and len(args) > 1:
+            # wait for the server to confirm all subscriptions
+            waiter = self._loop.create_future()
+            self._subscribing.append([waiter, len(args) - 1])
+            await waiter
 
     def data_received(self, data):
         parser = self.parser
@@ -26,23 +37,365 @@ class PubsubProtocol(Protocol):
                 if isinstance(response, list):
                     command = response[0]
                     if command == b'message':
-                        response = response[1:3]
-                        self.handler.broadcast(response)
+                        self.handler.broadcast(response[1:3])
                     elif command == b'pmessage':
-                        response = response[2:4]
-                        self.handler.broadcast(response)
+                        self.handler.broadcast(response[2:4], response[1])
+                    elif (command in (b'subscribe', b'psubscribe') and
+                            self._subscribing):
+                        self._subscribed()
             else:
                 raise response
             response = parser.get()
 
+    def _subscribed(self):
+        pending = self._subscribing[0]
+        pending[1] -= 1
+        if not pending[1]:
+            self._subscribing.popleft()
+            if not pending[0].done():
+                pending[0].set_result(None)
+
+    def _connection_lost(self, _, exc=None):
+        subscribing, self._subscribing = self._subscribing, deque()
+        for waiter, _ in subscribing:
+            if not waiter.done():
+                waiter.set_exception(
+                    exc or ConnectionResetError('Connection lost'))
+
+
+class PubSubManager:
+    '''Subscriptions of shared :class:`.RedisPubSub` handlers.
+
+    There is one manager per event loop and server, all its handlers
+    share a single subscriber connection. Channels and patterns are
+    reference counted, the server is subscribed to a channel when the
+    first handler subscribes to it and unsubscribed when the last one
+    leaves. Messages are decoded once per codec type and name and
+    dispatched to the handlers subscribed to the message channel or
+    pattern only. The manager is removed once its last handler
+    unsubscribes or when the last store using it closes.
+
+    When the connection is lost, all channels and patterns are
+    re-subscribed in bulk with a :func:`.backoff` between attempts.
+    '''
+    managers = {}
+
+    def __init__(self, store):
+        self.store = store
+        self._loop = store._loop
+        self._stores = set()
+        self._channels = {}
+        self._patterns = {}
+        self._connection = None
+        self._connecting = None
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, self.store)
+    __str__ = __repr__
+
+    @classmethod
+    def get(cls, store):
+        '''The :class:`.PubSubManager` for ``store``
+        '''
+        key = cls._key(store)
+        manager = cls.managers.get(key)
+        if manager is None:
+            manager = cls.managers[key] = cls(store)
+        manager._stores.add(store)
+        return manager
+
+    @classmethod
+    def remove(cls, store):
+        '''Remove ``store`` from the stores using a manager
+
+        A manager is removed, and its connection closed, with the last
+        store using it. Otherwise it connects via one of the remaining
+        stores.
+
+        :return: a list of awaitables closing connections
+        '''
+        closing = []
+        for key, manager in tuple(cls.managers.items()):
+            if store not in manager._stores:
+                continue
+            manager._stores.discard(store)
+            if manager._stores:
+                if manager.store is store:
+                    manager.store = next(iter(manager._stores))
+                continue
+            cls.managers.pop(key)
+            connection, manager._connection = manager._connection, None
+            if connection is not None:
+                closing.append(connection.close())
+        return closing
+
+    @property
+    def logger(self):
+        return self.store.logger
+
+    @property
+    def connection(self):
+        return self._connection
+
+    def count(self, name):
+        '''Number of handlers subscribed to channel or pattern ``name``
+        '''
+        name = to_string(name)
+        return len(self._channels.get(name, ())) + len(
+            self._patterns.get(name, ()))
+
+    def subscribe(self, handler, *channels):
+        return self._add(self._channels, 'SUBSCRIBE', handler, channels)
+
+    def psubscribe(self, handler, *patterns):
+        return self._add(self._patterns, 'PSUBSCRIBE', handler, patterns)
+
+    def unsubscribe(self, handler, *channels):
+        return self._remove(self._channels, 'UNSUBSCRIBE', handler,
+                            channels)
+
+    def punsubscribe(self, handler, *patterns):
+        return self._remove(self._patterns, 'PUNSUBSCRIBE', handler,
+                            patterns)
+
+    def broadcast(self, response, pattern=None):
+        '''Dispatch a message received from the server
+        '''
+        channel = to_string(response[0])
+        if pattern is None:
+            handlers = self._channels.get(channel)
+        else:
+            handlers = self._patterns.get(to_string(pattern))
+        if not handlers:
+            return
+        message = response[1]
+        decoded = {}
+        for handler in tuple(handlers):
+            protocol = handler._protocol
+            if protocol is None:
+                handler.dispatch(channel, message)
+                continue
+            # codecs of the same type and name decode alike
+            codec = (type(protocol), getattr(protocol, 'name', None))
+            msg = decoded.get(codec, decoded)
+            if msg is decoded:
+                try:
+                    msg = protocol.decode(message)
+                except ProtocolError:
+                    self.logger.exception('Could not decode message')
+                    msg = None
+                decoded[codec] = msg
+            if msg is not None:
+                handler.dispatch(channel, msg)
+
+    #    INTERNALS
+    @classmethod
+    def _key(cls, store):
+        return store._loop, store._host, store._database, store._password
+
+    async def _add(self, index, command, handler, names):
+        new = []
+        for name in names:
+            name = to_string(name)
+            handlers = index.get(name)
+            if handlers is None:
+                handlers = index[name] = set()
+                new.append(name)
+            handlers.add(handler)
+        if self._connection is None:
+            # connect and subscribe to everything in the index
+            await self._connect()
+        elif new:
+            await self._connection.execute(command, *new)
+
+    async def _remove(self, index, command, handler, names):
+        if not names:
+            names = [name for name, handlers in index.items()
+                     if handler in handlers]
+        gone = []
+        for name in names:
+            name = to_string(name)
+            handlers = index.get(name)
+            if handlers and handler in handlers:
+                handlers.discard(handler)
+                if not handlers:
+                    index.pop(name)
+                    gone.append(name)
+        connection = self._connection
+        if not self._channels and not self._patterns:
+            key = self._key(self.store)
+            if self.managers.get(key) is self:
+                self.managers.pop(key)
+            if connection is not None:
+                self._connection = None
+                await connection.close()
+        elif connection is not None and gone:
+            await connection.execute(command, *gone)
+
+    async def _connect(self):
+        if not self._connecting:
+            self._connecting = self._loop.create_task(self._subscribe_all())
+        await shield(self._connecting, loop=self._loop)
+
+    async def _subscribe_all(self):
+        try:
+            connection = await self.store.connect(
+                partial(PubsubProtocol, self, producer=self.store))
+            connection.bind_event('connection_lost', self._connection_lost)
+            self._connection = connection
+            requests = []
+            if self._channels:
+                requests.append(connection.execute('SUBSCRIBE',
+                                                   *self._channels))
+            if self._patterns:
+                requests.append(connection.execute('PSUBSCRIBE',
+                                                   *self._patterns))
+            await gather(*requests, loop=self._loop)
+        finally:
+            self._connecting = None
+
+    def _connection_lost(self, connection, exc=None):
+        if connection is not self._connection:
+            return
+        self._connection = None
+        handlers = set()
+        for index in (self._channels, self._patterns):
+            for subscribed in index.values():
+                handlers.update(subscribed)
+        for handler in handlers:
+            handler.fire_event('connection_lost')
+        if handlers:
+            self._loop.call_later(RECONNECT_LAG, self._reconnect,
+                                  RECONNECT_LAG)
+
+    def _reconnect(self, next_time):
+        self._loop.create_task(self._resubscribe(next_time))
+
+    async def _resubscribe(self, next_time):
+        if self._connection or not (self._channels or self._patterns):
+            return
+        try:
+            await self._connect()
+        except ConnectionError:
+            next_time = backoff(next_time)
+            self.logger.critical(
+                '%s cannot re-subscribe - connection error - '
+                'try again in %s seconds', self, next_time)
+            self._loop.call_later(next_time, self._reconnect, next_time)
+        else:
+            self.logger.warning(
+                '%s re-subscribed to %d channels and %d patterns',
+                self, len(self._channels), len(self._patterns))
+
+
+class PublishQueue:
+    '''Coalesce ``PUBLISH`` commands into pipelined batches.
+
+    Messages published during the same event loop iteration are sent
+    to the server as one non-transactional pipeline. Only one batch is
+    in flight at any time, messages published while waiting for its
+    replies are sent with the next batch.
+
+    Messages published with ``wait=False`` are fire-and-forget: no
+    future is created and at most ``max_buffer`` of them are kept while
+    waiting, newer ones are dropped and counted in :attr:`dropped`.
+    '''
+    def __init__(self, store, max_buffer=10000):
+        self.store = store
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._loop = store._loop
+        self._messages = []
+        self._buffered = 0
+        self._flushing = False
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, self.store)
+    __str__ = __repr__
+
+    def __len__(self):
+        return len(self._messages)
+
+    @property
+    def logger(self):
+        return self.store.logger
+
+    def publish(self, channel, message, wait=True):
+        '''Queue ``message`` for ``channel``
+
+        :return: a future resolved with the number of clients which
+            received the message or ``None`` when ``wait`` is ``False``
+        '''
+        if wait:
+            waiter = self._loop.create_future()
+        elif self._buffered >= self.max_buffer:
+            self.dropped += 1
+            return
+        else:
+            waiter = None
+            self._buffered += 1
+        self._messages.append((channel, message, waiter))
+        if not self._flushing:
+            self._flushing = True
+            self._loop.call_soon(self._flush)
+        return waiter
+
+    def _flush(self):
+        messages, self._messages = self._messages, []
+        self._buffered = 0
+        if messages:
+            self._loop.create_task(self._send(messages))
+        else:
+            self._flushing = False
+
+    async def _send(self, messages):
+        pipe = self.store.pipeline(transaction=False)
+        for channel, message, _ in messages:
+            pipe.execute('PUBLISH', channel, message)
+        try:
+            results = await pipe.commit(raise_on_error=False)
+        except Exception as exc:
+            results = [exc] * len(messages)
+            lost = sum((1 for m in messages if m[2] is None))
+            if lost:
+                self.logger.warning('%s lost %d messages - %s',
+                                    self, lost, exc)
+        for (_, _, waiter), result in zip(messages, results):
+            if waiter is not None and not waiter.done():
+                if isinstance(result, Exception):
+                    waiter.set_exception(result)
+                else:
+                    waiter.set_result(result)
+        self._flush()
+
 
 class RedisPubSub(PubSub):
     '''Asynchronous Publish/Subscriber handler for pulsar and redis stores.
+
+    When ``shared`` is ``True`` the handler subscribes through the
+    :class:`.PubSubManager` of its server rather than opening its own
+    connection.
     '''
-    def publish(self, channel, message):
+    def __init__(self, store, protocol=None, shared=False):
+        super().__init__(store, protocol=protocol)
+        self._shared = shared
+
+    @property
+    def shared(self):
+        return self._shared
+
+    @property
+    def _manager(self):
+        # managers are removed when unused, get the current one
+        if self._shared:
+            return PubSubManager.get(self.store)
+
+    def publish(self, channel, message, wait=True):
+        '''Publish ``message`` through the store :class:`.PublishQueue`
+        '''
         if self._protocol:
             message = self._protocol.encode(message)
-        return self.store.execute('PUBLISH', channel, message)
+        return self.store.publisher.publish(channel, message, wait)
 
     def count(self, *channels):
         kw = {'subcommand': 'numsub'}
@@ -61,25 +414,36 @@ class RedisPubSub(PubSub):
             return self.store.execute('PUBSUB', 'CHANNELS')
 
     def psubscribe(self, pattern, *patterns):
+        if self._manager:
+            return self._manager.psubscribe(self, pattern, *patterns)
         return self._subscribe('PSUBSCRIBE', pattern, *patterns)
 
     def punsubscribe(self, *patterns):
+        if self._manager:
+            return self._manager.punsubscribe(self, *patterns)
         if self._connection:
             return self._connection.execute('PUNSUBSCRIBE', *patterns)
 
     def subscribe(self, channel, *channels):
+        if self._manager:
+            return self._manager.subscribe(self, channel, *channels)
         return self._subscribe('SUBSCRIBE', channel, *channels)
 
     def unsubscribe(self, *channels):
         '''Un-subscribe from a list of ``channels``.
         '''
+        if self._manager:
+            return self._manager.unsubscribe(self, *channels)
         if self._connection:
             return self._connection.execute('UNSUBSCRIBE', *channels)
 
     async def close(self):
         '''Stop listening for messages.
         '''
-        if self._connection:
+        if self._manager:
+            await self._manager.punsubscribe(self)
+            await self._manager.unsubscribe(self)
+        elif self._connection:
             await gather(
                 self._connection.execute('PUNSUBSCRIBE'),
                 self._connection.execute('UNSUBSCRIBE'),
@@ -109,6 +473,8 @@ class RedisChannels(Channels, PubSubClient):
         assert pubsub.protocol, "protocol required for channels"
         super().__init__(pubsub.store, **kw)
         self.pubsub = pubsub
+        if isinstance(pubsub.protocol, Codecs):
+            self.codecs = pubsub.protocol
         self.pubsub.bind_event('connection_lost', self._connection_lost)
         self.pubsub.add_client(self)
 
@@ -117,19 +483,24 @@ class RedisChannels(Channels, PubSubClient):
         """
         return self.pubsub.store.client().lock(self.prefixed(name), **kwargs)
 
-    async def publish(self, channel, event, data=None):
+    async def publish(self, channel, event, data=None, wait=True):
         """Publish a new ``event`` on a ``channel``
 
         :param channel: channel name
         :param event: event name
         :param data: optional payload to include in the event
+        :param wait: when ``False`` the event is fire-and-forget and
+            may be dropped if the publish buffer is full
         :return: a coroutine and therefore it must be awaited
         """
         msg = {'event': event, 'channel': channel}
         if data:
             msg['data'] = data
         try:
-            await self.pubsub.publish(self.prefixed(channel), msg)
+            waiter = self.pubsub.publish(self.prefixed(channel), msg,
+                                         wait=wait)
+            if waiter is not None:
+                await waiter
         except ConnectionRefusedError:
             self.connection_error = True
             self.logger.critical(
@@ -144,6 +515,17 @@ class RedisChannels(Channels, PubSubClient):
         channel_name = self.prefixed(channel.name)
         await self.pubsub.subscribe(channel_name)
 
+    async def _announce_codecs(self):
+        codecs = self.codecs
+        channel = self.status_channel.name
+        msg = {'event': CODEC_EVENT, 'channel': channel,
+               'data': {'id': self.uid, 'codecs': codecs.names()}}
+        try:
+            await self.pubsub.store.publisher.publish(
+                self.prefixed(channel), codecs.default.encode(msg))
+        except ConnectionError:
+            self.logger.warning('%s cannot announce codecs', self)
+
     async def _unsubscribe(self, channel, event=None):
         channel_name = self.prefixed(channel.name)
         await self.pubsub.unsubscribe(channel_name)
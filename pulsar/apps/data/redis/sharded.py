@@ -0,0 +1,402 @@
+'''Client side sharding over several redis or pulsar-ds servers.
+
+Keys are mapped to servers with a consistent hashing ring so that adding
+or removing a server only moves a fraction of the keys. When a key
+contains a hash tag, a sub-string enclosed in ``{`` and ``}``, only the
+tag is hashed and therefore keys sharing the same tag are always stored
+in the same server::
+
+    store = ShardedRedisStore(['redis://127.0.0.1:6379/9',
+                               'redis://127.0.0.1:6380/9'])
+    client = store.client()
+    await client.mset('{user:1}:name', 'luca', '{user:1}:age', 40)
+'''
+import asyncio
+from bisect import bisect
+from binascii import crc32
+from hashlib import md5
+from itertools import chain
+from collections import OrderedDict
+
+from pulsar.utils.pep import to_string
+from pulsar.apps.ds import CommandError
+from pulsar.apps.data import create_store
+
+from .client import RedisClient, Pipeline, is_transaction
+from .store import RedisStore
+
+
+def hash_key(key):
+    '''32 bits hash of ``key`` honouring ``{...}`` hash tags
+    '''
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    elif not isinstance(key, bytes):
+        key = str(key).encode('utf-8')
+    start = key.find(b'{')
+    if start > -1:
+        end = key.find(b'}', start + 1)
+        if end > start + 1:
+            key = key[start + 1:end]
+    return crc32(key) & 0xffffffff
+
+
+def _no_keys(args):
+    return ()
+
+
+def _all_keys(args):
+    return args
+
+
+def _all_but_last(args):
+    return args[:-1]
+
+
+def _even_keys(args):
+    return args[::2]
+
+
+def _first_two(args):
+    return args[:2]
+
+
+def _bitop_keys(args):
+    return args[1:]
+
+
+def _numkeys(args):
+    return args[2:2 + int(args[1])]
+
+
+def _store_numkeys(args):
+    return args[:1] + args[2:2 + int(args[1])]
+
+
+KEY_SPECS = dict(chain(
+    dict.fromkeys((
+        'auth', 'bgrewriteaof', 'bgsave', 'client', 'config', 'dbsize',
+        'debug', 'echo', 'flushall', 'flushdb', 'info', 'keys', 'lastsave',
+        'latency', 'monitor', 'ping', 'publish', 'pubsub', 'quit',
+        'randomkey', 'save', 'scan', 'script', 'select', 'time', 'multi',
+        'exec', 'discard', 'unwatch'), _no_keys).items(),
+    dict.fromkeys((
+        'del', 'mget', 'sdiff', 'sdiffstore', 'sinter', 'sinterstore',
+        'sunion', 'sunionstore', 'watch'), _all_keys).items(),
+    dict.fromkeys((
+        'rename', 'renamenx', 'rpoplpush', 'brpoplpush', 'smove'),
+        _first_two).items(),
+    dict.fromkeys(('blpop', 'brpop'), _all_but_last).items(),
+    dict.fromkeys(('mset', 'msetnx'), _even_keys).items(),
+    dict.fromkeys(('eval', 'evalsha'), _numkeys).items(),
+    dict.fromkeys(('zinterstore', 'zunionstore'), _store_numkeys).items(),
+    (('bitop', _bitop_keys),)))
+
+
+def command_keys(command, args):
+    '''The keys accessed by ``command`` with arguments ``args``
+
+    Commands not in :data:`KEY_SPECS` have their key as first argument.
+    '''
+    spec = KEY_SPECS.get(command)
+    return spec(args) if spec else args[:1]
+
+
+class ShardNode:
+    '''A server in a :class:`.ShardedRedisStore`
+
+    A node which failed to connect is skipped by the routing for
+    ``retry_interval`` seconds, doubling after every consecutive failure
+    up to ``max_retry_interval``.
+    '''
+    __slots__ = ('store', 'name', 'failures', 'retry_at')
+
+    def __init__(self, store):
+        self.store = store
+        host = store._host
+        self.name = '%s:%s' % host if isinstance(host, tuple) else str(host)
+        self.failures = 0
+        self.retry_at = 0
+
+    def __repr__(self):
+        return self.name
+    __str__ = __repr__
+
+    def available(self, now):
+        return self.retry_at <= now
+
+    def failed(self, now, retry_interval, max_retry_interval):
+        self.failures += 1
+        self.retry_at = now + min(
+            retry_interval * 2 ** (self.failures - 1), max_retry_interval)
+
+    def recovered(self):
+        self.failures = 0
+        self.retry_at = 0
+
+
+class HashRing:
+    '''Consistent hashing ring with ``replicas`` virtual points per node
+    '''
+    def __init__(self, nodes, replicas=160):
+        points = []
+        for node in nodes:
+            for i in range(replicas):
+                digest = md5(('%s-%d' % (node.name, i)).encode()).digest()
+                points.append((int.from_bytes(digest[:4], 'big'), node.name,
+                               node))
+        points.sort(key=lambda p: p[:2])
+        self._hashes = [p[0] for p in points]
+        self._nodes = [p[2] for p in points]
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def owners(self, key):
+        '''Generator of nodes, in ring order, starting from ``key`` owner
+        '''
+        nodes = self._nodes
+        size = len(nodes)
+        index = bisect(self._hashes, hash_key(key))
+        for i in range(index, index + size):
+            yield nodes[i % size]
+
+
+class ShardedRedisStore:
+    '''A redis :class:`.Store` sharded over several servers.
+
+    :param nodes: list of store urls or :class:`.RedisStore`
+    :param replicas: number of virtual points per node in the hash ring
+    :param retry_interval: seconds a failing node is excluded from
+        routing, its keys are served by the next node in the ring
+    :param kw: parameters passed to :func:`.create_store` for nodes
+        given as urls
+
+    Single key commands are routed to the node owning the key, while
+    ``MGET``, ``MSET`` and ``DEL`` are split by node and executed in
+    parallel. Any other multi-key command must have all its keys in
+    the same node, use hash tags to guarantee it.
+    :class:`.Pipeline` commands are grouped by node and each group is
+    sent as a single batch, transactions are therefore atomic per
+    node only.
+    Publish/subscribe uses the first node, messages are published to
+    the node of the subscribers even when it is failing.
+    '''
+    # Commands sent to all available nodes and how to merge the results
+    broadcast_commands = {
+        'dbsize': sum,
+        'flushall': all,
+        'flushdb': all,
+        'keys': lambda results: list(chain.from_iterable(results)),
+        'ping': all,
+        'script': lambda results: results[0]
+    }
+
+    # Commands sent to the node of publish/subscribe
+    pubsub_commands = frozenset(('publish', 'pubsub'))
+
+    read_commands = RedisStore.read_commands
+
+    def __init__(self, nodes, loop=None, replicas=160, retry_interval=1,
+                 max_retry_interval=30, **kw):
+        stores = [create_store(node, loop=loop, **kw) for node in nodes]
+        assert stores, 'No nodes given'
+        self._loop = loop or stores[0]._loop
+        self._nodes = tuple((ShardNode(store) for store in stores))
+        self._ring = HashRing(self._nodes, replicas)
+        self._retry_interval = retry_interval
+        self._max_retry_interval = max_retry_interval
+        self.scripts = OrderedDict()
+        self.split_commands = {
+            'mget': self._mget,
+            'mset': self._mset,
+            'del': self._del
+        }
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__,
+                           ', '.join((n.name for n in self._nodes)))
+    __str__ = __repr__
+
+    @property
+    def loaded_scripts(self):
+        return self.scripts.keys()
+
+    @property
+    def nodes(self):
+        '''Tuple of :class:`.ShardNode`
+        '''
+        return self._nodes
+
+    def node(self, key):
+        '''The available :class:`.ShardNode` serving ``key``
+
+        If the node owning ``key`` is marked as failing, the next
+        available node in the ring is returned.
+        '''
+        now = self._loop.time()
+        owner = None
+        for node in self._ring.owners(key):
+            if node.available(now):
+                return node
+            owner = owner or node
+        return owner
+
+    def available_nodes(self):
+        now = self._loop.time()
+        nodes = [node for node in self._nodes if node.available(now)]
+        return nodes or list(self._nodes)
+
+    def client(self, read_your_writes=0):
+        '''Get a :class:`.RedisClient` for the sharded store'''
+        return RedisClient(self, read_your_writes=read_your_writes)
+
+    def pipeline(self, transaction=True):
+        '''Get a :class:`.Pipeline` for the sharded store'''
+        return Pipeline(self, transaction=transaction)
+
+    @property
+    def pubsub_node(self):
+        '''The :class:`.ShardNode` of publish/subscribe
+        '''
+        return self._nodes[0]
+
+    def pubsub(self, protocol=None, shared=False):
+        return self.pubsub_node.store.pubsub(protocol=protocol,
+                                             shared=shared)
+
+    def channels(self, protocol=None, shared=True, **kw):
+        return self.pubsub_node.store.channels(protocol=protocol,
+                                               shared=shared, **kw)
+
+    def ping(self):
+        return self.execute('ping')
+
+    def register_script(self, script):
+        '''Register a :class:`.RedisScript` with all nodes
+        '''
+        if script.sha not in self.scripts:
+            self.scripts[script.sha] = script.script
+            for node in self._nodes:
+                node.store.register_script(script)
+            return True
+        return False
+
+    def flush(self):
+        return self.execute('flushdb')
+
+    def close(self):
+        '''Close all open connections.'''
+        return asyncio.gather(*[node.store.close() for node in self._nodes],
+                              loop=self._loop)
+
+    async def execute(self, command, *args, **options):
+        name = to_string(command).lower()
+        if name in self.broadcast_commands:
+            results = await asyncio.gather(
+                *[self._call(node, 'execute', command, *args, **options)
+                  for node in self.available_nodes()], loop=self._loop)
+            return self.broadcast_commands[name](results)
+        split = self.split_commands.get(name)
+        if split:
+            result = await split(command, args, options)
+            return result
+        node = self._route(name, args)
+        try:
+            result = await self._call(node, 'execute', command, *args,
+                                      **options)
+        except ConnectionRefusedError:
+            # The command never reached the server, re-route it
+            retry = self._route(name, args)
+            if retry is node:
+                raise
+            result = await self._call(retry, 'execute', command, *args,
+                                      **options)
+        return result
+
+    async def execute_pipeline(self, commands, raise_on_error=True):
+        transaction = is_transaction(commands)
+        if transaction:
+            multi, exec_ = commands[0], commands[-1]
+            commands = commands[1:-1]
+        batches = {}
+        for index, (args, options) in enumerate(commands):
+            node = self._route(to_string(args[0]).lower(), args[1:])
+            batches.setdefault(node, []).append(index)
+        nodes = list(batches)
+        requests = []
+        for node in nodes:
+            batch = [commands[i] for i in batches[node]]
+            if transaction:
+                batch = [multi] + batch + [exec_]
+            requests.append(self._call(node, 'execute_pipeline', batch,
+                                       raise_on_error))
+        results = await asyncio.gather(*requests, loop=self._loop)
+        response = [None] * len(commands)
+        for node, result in zip(nodes, results):
+            for index, value in zip(batches[node], result):
+                response[index] = value
+        return response
+
+    #    INTERNALS
+    def _route(self, command, args):
+        if command in self.pubsub_commands:
+            # subscribers are connected to this node only
+            return self.pubsub_node
+        keys = command_keys(command, args)
+        if not keys:
+            return self.available_nodes()[0]
+        node = self.node(keys[0])
+        for key in keys[1:]:
+            if self.node(key) is not node:
+                raise CommandError("CROSSSLOT keys in '%s' don't hash to "
+                                   "the same node" % command)
+        return node
+
+    def _split(self, keys):
+        groups = {}
+        for index, key in enumerate(keys):
+            groups.setdefault(self.node(key), []).append(index)
+        return groups
+
+    async def _call(self, node, method, *args, **kw):
+        try:
+            result = await getattr(node.store, method)(*args, **kw)
+        except OSError:
+            node.failed(self._loop.time(), self._retry_interval,
+                        self._max_retry_interval)
+            raise
+        if node.failures:
+            node.recovered()
+        return result
+
+    async def _mget(self, command, keys, options):
+        groups = self._split(keys)
+        nodes = list(groups)
+        results = await asyncio.gather(
+            *[self._call(node, 'execute', command,
+                         *[keys[i] for i in groups[node]], **options)
+              for node in nodes], loop=self._loop)
+        response = [None] * len(keys)
+        for node, values in zip(nodes, results):
+            for index, value in zip(groups[node], values):
+                response[index] = value
+        return response
+
+    async def _mset(self, command, args, options):
+        keys = args[::2]
+        groups = self._split(keys)
+        results = await asyncio.gather(
+            *[self._call(node, 'execute', command,
+                         *chain.from_iterable(args[2*i:2*i+2]
+                                              for i in indices), **options)
+              for node, indices in groups.items()], loop=self._loop)
+        return all(results)
+
+    async def _del(self, command, keys, options):
+        groups = self._split(keys)
+        results = await asyncio.gather(
+            *[self._call(node, 'execute', command,
+                         *[keys[i] for i in indices], **options)
+              for node, indices in groups.items()], loop=self._loop)
+        return sum(results)
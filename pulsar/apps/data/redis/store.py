@@ -1,12 +1,16 @@
+import asyncio
+from collections import deque, OrderedDict
 from functools import partial
 
-from pulsar import Connection, Pool, get_actor
+from pulsar import Connection, Protocol, Pool, get_actor
 from pulsar.utils.pep import to_string
-from pulsar.apps.data import RemoteStore
+from pulsar.apps.data import RemoteStore, create_store
+from pulsar.apps.data.codecs import Codecs, get_codec
 from pulsar.apps.ds import redis_parser
 
 from .client import RedisClient, Pipeline, Consumer, ResponseError
-from .pubsub import RedisPubSub, RedisChannels
+from .pubsub import (RedisPubSub, RedisChannels, PublishQueue,
+                     PubSubManager)
 
 
 class RedisStoreConnection(Connection):
@@ -32,15 +36,168 @@ class RedisStoreConnection(Connection):
         return result
 
 
+class RedisMultiplexedConnection(Protocol):
+    '''A redis connection shared by concurrent requests.
+
+    Commands executed during the same event loop iteration are written
+    into the transport as a single pipelined chunk and responses are
+    matched to their requests in FIFO order.
+    '''
+    def __init__(self, consumer_factory, **kw):
+        super().__init__(**kw)
+        self.parser = self._producer._parser_class()
+        self._consumer_factory = consumer_factory
+        self._buffer = []
+        self._waiting = deque()
+        self.bind_event('connection_lost', self._connection_lost)
+
+    @property
+    def pending(self):
+        '''Number of requests waiting for a response
+        '''
+        return len(self._waiting)
+
+    def execute(self, *args, **options):
+        return self._queue(self.parser.pack_command(args), (args, options))
+
+    def execute_pipeline(self, commands, raise_on_error=True):
+        return self._queue(self.parser.pack_pipeline(commands),
+                           (commands, raise_on_error, []))
+
+    def data_received(self, data):
+        parser = self.parser
+        parser.feed(data)
+        response = parser.get()
+        waiting = self._waiting
+        consumer = self._consumer_factory
+        while response is not False:
+            if not waiting:
+                # a reply without a request, nobody is waiting for it
+                self.logger.warning('%s dropped unexpected reply %r',
+                                    self, response)
+                response = parser.get()
+                continue
+            waiter, request = waiting[0]
+            if len(request) == 2:
+                waiting.popleft()
+                if not isinstance(response, Exception):
+                    try:
+                        response = consumer.parse_response(
+                            response, request[0][0], request[1])
+                    except Exception as exc:
+                        response = exc
+            else:   # pipeline
+                commands, raise_on_error, responses = request
+                responses.append(response)
+                if len(responses) < len(commands):
+                    response = parser.get()
+                    continue
+                waiting.popleft()
+                try:
+                    response = consumer.pipeline_response(
+                        commands, raise_on_error, responses)
+                except Exception as exc:
+                    response = exc
+                if isinstance(response, ResponseError):
+                    response = response.exception
+            if not waiter.done():
+                if isinstance(response, Exception):
+                    waiter.set_exception(response)
+                else:
+                    waiter.set_result(response)
+            response = parser.get()
+
+    #    INTERNALS
+    def _queue(self, chunk, request):
+        if self.closed:
+            raise ConnectionResetError('Connection closed')
+        waiter = self._loop.create_future()
+        if not self._buffer:
+            self._loop.call_soon(self._flush)
+        self._buffer.append(chunk)
+        self._waiting.append((waiter, request))
+        return waiter
+
+    def _flush(self):
+        buffer, self._buffer = self._buffer, []
+        if buffer and not self.closed:
+            self.write(b''.join(buffer))
+
+    def _connection_lost(self, _, exc=None):
+        waiting, self._waiting = self._waiting, deque()
+        self._buffer = []
+        for waiter, _ in waiting:
+            if not waiter.done():
+                waiter.set_exception(
+                    exc or ConnectionResetError('Connection lost'))
+
+
+class Replica:
+    '''A read replica of a :class:`.RedisStore`
+    '''
+    __slots__ = ('store', 'outstanding')
+
+    def __init__(self, store):
+        self.store = store
+        self.outstanding = 0
+
+    def __repr__(self):
+        return repr(self.store)
+
+    async def execute(self, *args, **options):
+        self.outstanding += 1
+        try:
+            result = await self.store.execute(*args, **options)
+            return result
+        finally:
+            self.outstanding -= 1
+
+
 class RedisStore(RemoteStore):
     '''Redis :class:`.Store` implementation.
+
+    Read-only commands can be balanced across read replicas by passing
+    their addresses as the ``replicas`` parameter, a list or a comma
+    separated string::
+
+        redis://127.0.0.1:6379/0?replicas=127.0.0.1:6380,127.0.0.1:6381
+
+    Each replica has its own connection :attr:`pool`, with the same
+    ``pool_options``, and a read command is sent to the replica with the
+    fewest outstanding requests. When a replica cannot be reached, or
+    does not answer in time, the command is executed by the primary.
+
+    The ``pool_options`` dictionary is passed to the connection
+    :class:`.Pool`, to keep ``min_size`` connections warm or recycle
+    them after ``max_idle_time`` or ``max_lifetime`` seconds.
     '''
     protocol_factory = partial(RedisStoreConnection, Consumer)
+    multiplexed_factory = partial(RedisMultiplexedConnection, Consumer)
     supported_queries = frozenset(('filter', 'exclude'))
+    # Commands which block or change the state of a connection, they
+    # are never executed on a multiplexed connection
+    not_multiplexed = frozenset((
+        'AUTH', 'SELECT', 'BLPOP', 'BRPOP', 'BRPOPLPUSH', 'MULTI', 'EXEC',
+        'DISCARD', 'WATCH', 'UNWATCH', 'MONITOR', 'SUBSCRIBE', 'PSUBSCRIBE',
+        'UNSUBSCRIBE', 'PUNSUBSCRIBE', 'QUIT'))
+    # Commands which never modify data, they can be sent to replicas
+    read_commands = frozenset((
+        'BITCOUNT', 'BITPOS', 'DUMP', 'EXISTS', 'GET', 'GETBIT', 'GETRANGE',
+        'HEXISTS', 'HGET', 'HGETALL', 'HKEYS', 'HLEN', 'HMGET', 'HSCAN',
+        'HSTRLEN', 'HVALS', 'KEYS', 'LINDEX', 'LLEN', 'LRANGE', 'MGET',
+        'OBJECT', 'PFCOUNT', 'PTTL', 'RANDOMKEY', 'SCAN', 'SCARD', 'SDIFF',
+        'SINTER', 'SISMEMBER', 'SMEMBERS', 'SRANDMEMBER', 'SSCAN', 'STRLEN',
+        'SUNION', 'TTL', 'TYPE', 'ZCARD', 'ZCOUNT', 'ZLEXCOUNT', 'ZRANGE',
+        'ZRANGEBYLEX', 'ZRANGEBYSCORE', 'ZRANK', 'ZREVRANGE',
+        'ZREVRANGEBYLEX', 'ZREVRANGEBYSCORE', 'ZREVRANK', 'ZSCAN', 'ZSCORE'))
 
     def _init(self, namespace=None, parser_class=None, pool_size=50,
-              decode_responses=False, **kwargs):
+              decode_responses=False, multiplexed=0, replicas=None,
+              codec=None, pool_options=None, **kwargs):
         self._decode_responses = decode_responses
+        if codec:
+            get_codec(codec)    # fail early with unknown codecs
+            self._urlparams['codec'] = codec
         if not parser_class:
             actor = get_actor()
             pyparser = actor.cfg.redis_py_parser if actor else False
@@ -48,16 +205,63 @@ class RedisStore(RemoteStore):
         self._parser_class = parser_class
         if namespace:
             self._urlparams['namespace'] = namespace
-        self._pool = Pool(self.connect, pool_size=pool_size, loop=self._loop)
+        self._pool = Pool(self.connect, pool_size=pool_size, loop=self._loop,
+                          **(pool_options or {}))
+        self._multiplexed = int(multiplexed or 0)
+        self._shared_connections = []
+        self._shared_connecting = None
         if self._database is None:
             self._database = 0
         self._database = int(self._database)
-        self.loaded_scripts = set()
+        self.scripts = OrderedDict()
+        self._publisher = None
+        self._replicas = []
+        if replicas:
+            if isinstance(replicas, str):
+                replicas = replicas.split(',')
+            self._urlparams['replicas'] = ','.join(replicas)
+            self._replicas = [Replica(create_store(
+                url if '://' in url else '%s://%s' % (self._name, url),
+                loop=self._loop, database=self._database,
+                password=self._password, parser_class=parser_class,
+                pool_size=pool_size, decode_responses=decode_responses,
+                multiplexed=multiplexed, codec=codec,
+                pool_options=pool_options)) for url in replicas]
 
     @property
     def pool(self):
         return self._pool
 
+    @property
+    def multiplexed(self):
+        '''Maximum number of connections shared by concurrent requests.
+
+        When zero (default) each request checks out a connection from
+        the :attr:`pool`, otherwise requests are auto-pipelined over
+        at most this number of connections.
+        '''
+        return self._multiplexed
+
+    @property
+    def loaded_scripts(self):
+        '''Sha of the scripts registered with this store
+        '''
+        return self.scripts.keys()
+
+    @property
+    def publisher(self):
+        '''The :class:`.PublishQueue` of this store
+        '''
+        if self._publisher is None:
+            self._publisher = PublishQueue(self)
+        return self._publisher
+
+    @property
+    def replicas(self):
+        '''List of read :class:`.Replica`
+        '''
+        return self._replicas
+
     @property
     def namespace(self):
         '''The prefix namespace to append to all transaction on keys
@@ -68,30 +272,68 @@ class RedisStore(RemoteStore):
     def key(self):
         return (self._dns, self._encoding)
 
-    def client(self):
-        '''Get a :class:`.RedisClient` for the Store'''
-        return RedisClient(self)
+    def client(self, read_your_writes=0):
+        '''Get a :class:`.RedisClient` for the Store
 
-    def pipeline(self):
+        :param read_your_writes: when replicas are configured, the number
+            of seconds reads from this client are sent to the primary
+            after it executed a write command
+        '''
+        return RedisClient(self, read_your_writes=read_your_writes)
+
+    def pipeline(self, transaction=True):
         '''Get a :class:`.Pipeline` for the Store'''
-        return Pipeline(self)
+        return Pipeline(self, transaction=transaction)
+
+    def pubsub(self, protocol=None, shared=False):
+        '''Get a :class:`.RedisPubSub` handler
+
+        :param shared: when ``True`` the handler shares its subscriber
+            connection with the other shared handlers of the process
+        '''
+        protocol = get_codec(protocol or self._urlparams.get('codec'))
+        return RedisPubSub(self, protocol=protocol, shared=shared)
 
-    def pubsub(self, protocol=None):
-        return RedisPubSub(self, protocol=protocol)
+    def channels(self, protocol=None, shared=True, **kw):
+        '''Get :class:`.RedisChannels`
 
-    def channels(self, protocol=None, **kw):
-        return RedisChannels(self.pubsub(protocol=protocol), **kw)
+        :param protocol: codec or registered codec name, if not given
+            the ``codec`` url parameter or ``json``. It is wrapped by
+            :class:`.Codecs` for negotiation with peers.
+        '''
+        codec = get_codec(protocol or self._urlparams.get('codec') or 'json')
+        if not isinstance(codec, Codecs):
+            codec = Codecs(codec)
+        return RedisChannels(self.pubsub(protocol=codec, shared=shared),
+                             **kw)
 
     def ping(self):
         return self.client().ping()
 
-    async def execute(self, *args, **options):
+    async def execute(self, *args, primary=False, **options):
+        if (self._replicas and not primary and
+                to_string(args[0]).upper() in self.read_commands):
+            replica = min(self._replicas, key=lambda r: r.outstanding)
+            try:
+                result = await replica.execute(*args, **options)
+                return result
+            except (OSError, asyncio.TimeoutError):
+                self.logger.warning('Replica %s not available', replica)
+        if (self._multiplexed and
+                to_string(args[0]).upper() not in self.not_multiplexed):
+            connection = await self._shared_connection()
+            result = await connection.execute(*args, **options)
+            return result
         connection = await self._pool.connect()
         with connection:
             result = await connection.execute(*args, **options)
             return result
 
     async def execute_pipeline(self, commands, raise_on_error=True):
+        if self._multiplexed:
+            conn = await self._shared_connection()
+            result = await conn.execute_pipeline(commands, raise_on_error)
+            return result
         conn = await self._pool.connect()
         with conn:
             result = await conn.execute_pipeline(commands, raise_on_error)
@@ -110,14 +352,35 @@ class RedisStore(RemoteStore):
             await connection.execute('AUTH', self._password)
         if self._database:
             await connection.execute('SELECT', self._database)
+        if self.scripts and isinstance(connection, (
+                RedisStoreConnection, RedisMultiplexedConnection)):
+            await self._load_scripts(connection)
         return connection
 
+    def register_script(self, script):
+        '''Register a :class:`.RedisScript` with this store.
+
+        Registered scripts are loaded into the server, in a single
+        pipeline, every time a new connection is created.
+
+        :return: ``True`` if the script was not already registered
+        '''
+        if script.sha not in self.scripts:
+            self.scripts[script.sha] = script.script
+            return True
+        return False
+
     def flush(self):
         return self.execute('flushdb')
 
     def close(self):
         '''Close all open connections.'''
-        return self._pool.close()
+        shared, self._shared_connections = self._shared_connections, []
+        waiters = [c.close() for c in shared]
+        waiters.append(self._pool.close())
+        waiters.extend((r.store.close() for r in self._replicas))
+        waiters.extend(PubSubManager.remove(self))
+        return asyncio.gather(*waiters, loop=self._loop)
 
     def has_query(self, query_type):
         return query_type in self.supported_queries
@@ -134,6 +397,40 @@ class RedisStore(RemoteStore):
         data['namespace'] = self.basekey(meta)
         return data
 
+    #    INTERNALS
+    async def _load_scripts(self, connection):
+        commands = [(('SCRIPT', 'LOAD', script), {})
+                    for script in self.scripts.values()]
+        result = await connection.execute_pipeline(commands, False)
+        errors = [r for r in result if isinstance(r, Exception)]
+        if errors:
+            self.logger.warning('Could not load %d scripts into %s: %s',
+                                len(errors), self, errors[0])
+
+    async def _shared_connection(self):
+        connections = [c for c in self._shared_connections if not c.closed]
+        self._shared_connections = connections
+        if connections:
+            connection = min(connections, key=lambda c: c.pending)
+            if (not connection.pending or self._shared_connecting or
+                    len(connections) >= self._multiplexed):
+                return connection
+        if not self._shared_connecting:
+            self._shared_connecting = self._loop.create_task(
+                self._connect_shared())
+        return await asyncio.shield(self._shared_connecting,
+                                    loop=self._loop)
+
+    async def _connect_shared(self):
+        try:
+            connection = await self.connect(partial(
+                self.multiplexed_factory, producer=self, loop=self._loop,
+                logger=self._logger))
+            self._shared_connections.append(connection)
+            return connection
+        finally:
+            self._shared_connecting = None
+
 
 class CompiledQuery:
 
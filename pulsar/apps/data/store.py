@@ -325,8 +325,10 @@ class PubSub(EventHandler):
             msg['data'] = message
         return self.publish(channel, msg)
 
-    def publish(self, channel, message):
+    def publish(self, channel, message, wait=True):
         '''Publish a new ``message`` to a ``channel``.
+
+        When ``wait`` is ``False`` the message is fire-and-forget.
         '''
         raise NotImplementedError
 
@@ -389,9 +391,8 @@ class PubSub(EventHandler):
         self._clients.discard(client)
 
     # INTERNALS
-    def broadcast(self, response):
+    def broadcast(self, response, pattern=None):
         '''Broadcast ``message`` to all :attr:`clients`.'''
-        remove = set()
         channel = to_string(response[0])
         message = response[1]
         if self._protocol:
@@ -400,6 +401,11 @@ class PubSub(EventHandler):
             except ProtocolError:
                 self.logger.exception('Could not decode message')
                 return
+        self.dispatch(channel, message)
+
+    def dispatch(self, channel, message):
+        '''Dispatch a decoded ``message`` to all :attr:`clients`.'''
+        remove = set()
         for client in self._clients:
             try:
                 client(channel, message)
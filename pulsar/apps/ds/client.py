@@ -72,7 +72,7 @@ class ClientMixin:
                 return self.reply_error('Blocked client cannot request')
             if self.transaction is not None and command not in 'exec':
                 self.transaction.append((handle, request))
-                return self._transport.write(self.store.QUEUED)
+                return self.reply_queued()
         self._execute_command(handle, request)
 
     def _execute_command(self, handle, request):
@@ -86,7 +86,12 @@ class ClientMixin:
                     if command != 'auth':
                         return self.reply_error(
                             'Authentication required', 'NOAUTH')
-                handle(self, request, len(request) - 1)
+                latency = self.store._latency
+                start = latency.start()
+                try:
+                    handle(self, request, len(request) - 1)
+                finally:
+                    latency.finish('command', start)
             else:
                 command = ''
                 return self.reply_error("no command")
@@ -102,6 +107,9 @@ class ClientMixin:
     def reply_ok(self):
         raise NotImplementedError
 
+    def reply_queued(self):
+        raise NotImplementedError
+
     def reply_status(self, status):
         raise NotImplementedError
 
@@ -145,11 +153,17 @@ class PulsarStoreClient(pulsar.Protocol, ClientMixin):
         self.password = b''
         self.bind_event('connection_lost',
                         partial(self.store._remove_connection, self))
+        # pipelined replies are written once per loop iteration
+        self.cork()
 
     # Client Mixin Implementation
     def reply_ok(self):
         self._write(self.store.OK)
 
+    def reply_queued(self):
+        # bypass _write, the transaction is collecting requests
+        self.write(self.store.QUEUED)
+
     def reply_status(self, value):
         self._write(('+%s\r\n' % value).encode('utf-8'))
 
@@ -198,7 +212,7 @@ class PulsarStoreClient(pulsar.Protocol, ClientMixin):
         if self.transaction is not None:
             self.transaction.append(response)
         elif not self._transport._closing:
-            self._transport.write(response)
+            self.write(response)
 
 
 class Blocked:
@@ -1,6 +1,8 @@
 '''
 Error classes and redis parser function
 '''
+from functools import partial
+
 import pulsar
 
 from .pyparser import Parser
@@ -43,8 +45,9 @@ def response_error(response):
     return EXCEPTION_CLASSES[error_code](response)
 
 
-def PyRedisParser():
-    return Parser(InvalidResponse, response_error)
+def PyRedisParser(memoryview_threshold=None):
+    return Parser(InvalidResponse, response_error,
+                  memoryview_threshold=memoryview_threshold)
 
 
 if pulsar.HAS_C_EXTENSIONS:
@@ -57,5 +60,16 @@ else:    # pragma nocover
     RedisParser = PyRedisParser
 
 
-def redis_parser(py_redis_parser=False):
+def redis_parser(py_redis_parser=False, memoryview_threshold=None):
+    '''Redis parser factory.
+
+    :param py_redis_parser: use the python parser even if the C extensions
+        are available
+    :param memoryview_threshold: optional size in bytes above which bulk
+        values are returned as ``memoryview``. Only supported by the
+        python parser.
+    '''
+    if memoryview_threshold:
+        return partial(PyRedisParser,
+                       memoryview_threshold=memoryview_threshold)
     return PyRedisParser if py_redis_parser else RedisParser
@@ -12,27 +12,65 @@ REPLAY_TYPE = frozenset((b'$',   # REDIS_REPLY_STRING,
 
 
 class String:
-    __slots__ = ('_length', 'next')
+    __slots__ = ('_length', 'next', '_target', '_filled')
 
     def __init__(self, length, next):
         self._length = length
         self.next = next
+        self._target = None
 
     def decode(self, parser, result):
         parser._current = None
         length = self._length
         if length >= 0:
+            if self._target is not None:
+                return self._large(parser)
             b = parser._inbuffer
-            if len(b) >= length+2:
-                parser._inbuffer, chunk = b[length+2:], bytes(b[:length])
+            start = parser._offset
+            end = start + length
+            if len(b) >= end+2:
+                parser._offset = end + 2
+                with memoryview(b) as view:
+                    chunk = view[start:end].tobytes()
                 if parser.encoding:
                     return chunk.decode(parser.encoding)
+                elif (parser.memoryview_threshold and
+                        length >= parser.memoryview_threshold):
+                    return memoryview(chunk)
                 else:
                     return chunk
+            elif (parser.memoryview_threshold and not parser.encoding and
+                    length >= parser.memoryview_threshold):
+                # large value, received data is copied directly into
+                # its own buffer, see Parser.feed
+                self._target = bytearray(length+2)
+                self._filled = 0
+                self.fill(b[start:])
+                parser._offset = len(b)
+                return self._large(parser)
             else:
                 parser._current = self
                 return False
 
+    def fill(self, data):
+        '''Copy ``data`` into the value buffer and return the remaining
+        data
+        '''
+        filled = self._filled
+        size = min(len(self._target) - filled, len(data))
+        with memoryview(data) as view:
+            self._target[filled:filled+size] = view[:size]
+        self._filled = filled + size
+        return data[size:]
+
+    def _large(self, parser):
+        target = self._target
+        if self._filled < len(target):
+            parser._current = self
+            return False
+        self._target = None
+        return memoryview(target)[:self._length]
+
 
 class ArrayTask:
     __slots__ = ('_length', '_response', 'next')
@@ -63,14 +101,27 @@ class ArrayTask:
 
 
 class Parser:
-    '''A python parser for redis.'''
+    '''A python parser for redis.
+
+    Parsed data is tracked with an offset into the input buffer, which is
+    compacted only when the parsed part is larger than the unparsed one.
+
+    .. attribute:: memoryview_threshold
+
+        When set, bulk values with at least this number of bytes are
+        returned as ``memoryview`` and their data is copied only once,
+        from the transport into their own buffer.
+    '''
     encoding = None
 
-    def __init__(self, protocolError, responseError):
+    def __init__(self, protocolError, responseError,
+                 memoryview_threshold=None):
         self.protocolError = protocolError
         self.responseError = responseError
+        self.memoryview_threshold = memoryview_threshold
         self._current = None
         self._inbuffer = bytearray()
+        self._offset = 0
 
     def on_connect(self, connection):
         if connection.decode_responses:
@@ -81,7 +132,17 @@ class Parser:
 
     def feed(self, buffer):
         '''Feed new data into the buffer'''
-        self._inbuffer.extend(buffer)
+        current = self._current
+        if type(current) is String and current._target is not None:
+            buffer = current.fill(buffer)
+            if not buffer:
+                return
+        b = self._inbuffer
+        offset = self._offset
+        if offset and offset >= len(b) - offset:
+            del b[:offset]
+            self._offset = 0
+        b.extend(buffer)
 
     def get(self):
         '''Called by the protocol consumer'''
@@ -168,10 +229,11 @@ class Parser:
 
     def _get(self, next):
         b = self._inbuffer
-        length = b.find(b'\r\n')
+        offset = self._offset
+        length = b.find(b'\r\n', offset)
         if length >= 0:
-            self._inbuffer, response = b[length+2:], bytes(b[:length])
-            rtype, response = response[:1], response[1:]
+            self._offset = length + 2
+            rtype, response = b[offset:offset+1], bytes(b[offset+1:length])
             if rtype == b'-':
                 return self.responseError(response.decode('utf-8'))
             elif rtype == b':':
@@ -187,13 +249,14 @@ class Parser:
             else:
                 # Clear the buffer and raise
                 self._inbuffer = bytearray()
+                self._offset = 0
                 raise self.protocolError('Protocol Error')
         else:
             return False
 
     def buffer(self):
         '''Current buffer'''
-        return bytes(self._inbuffer)
+        return bytes(self._inbuffer[self._offset:])
 
     def _resume(self, task, result):
         result = task.decode(self, result)
@@ -54,10 +54,11 @@ from itertools import zip_longest
 import pulsar
 from pulsar.apps.socket import SocketServer
 from pulsar.utils.config import Global
-from pulsar.utils.structures import Dict, Zset, Deque
+from pulsar.utils.structures import Dict, Zset, Deque, OrderedDict
 
 from .parser import redis_parser
-from .utils import sort_command, count_bytes, and_op, or_op, xor_op, save_data
+from .utils import (sort_command, count_bytes, and_op, or_op, xor_op,
+                    save_data, LatencyMonitor)
 from .client import (command, PulsarStoreClient, Blocked,
                      COMMANDS_INFO, check_input, redis_to_py_pattern)
 
@@ -158,6 +159,35 @@ class KeyValueFileName(PulsarDsSetting):
     desc = '''The filename where to dump the DB.'''
 
 
+class KeyValueNotifyEvents(PulsarDsSetting):
+    name = "key_value_notify_events"
+    flags = ["--key-value-notify-events"]
+    default = ''
+    desc = '''\
+        Keyspace events published via Pub/Sub.
+
+        Same format as the ``notify-keyspace-events`` redis parameter,
+        a string of flags such as ``KEA`` or ``Ex``. Notifications are
+        disabled by default and can be changed at runtime via
+        ``CONFIG SET notify-keyspace-events``.
+    '''
+
+
+class KeyValueLatencyThreshold(PulsarDsSetting):
+    name = "key_value_latency_threshold"
+    flags = ["--key-value-latency-threshold"]
+    type = int
+    default = 0
+    desc = '''\
+        Latency monitor threshold in milliseconds.
+
+        Events such as commands, cron cycles and saves lasting longer than
+        this value are recorded and can be inspected via the ``LATENCY``
+        command. Zero disables the monitor, it can be changed at runtime
+        via ``CONFIG SET latency-monitor-threshold``.
+    '''
+
+
 class TcpServer(pulsar.TcpServer):
 
     def __init__(self, cfg, *args, **kwargs):
@@ -220,6 +250,7 @@ class Storage:
         self._watching = set()
         # The set of clients which issued the monitor command
         self._monitors = set()
+        self._latency = LatencyMonitor()
         self.logger = server.logger
         #
         self.NOTIFY_KEYSPACE = (1 << 0)
@@ -236,6 +267,21 @@ class Storage:
                            self.NOTIFY_LIST | self.NOTIFY_SET |
                            self.NOTIFY_HASH | self.NOTIFY_ZSET |
                            self.NOTIFY_EXPIRED | self.NOTIFY_EVICTED)
+        self._notify_flags_map = OrderedDict((
+            ('g', self.NOTIFY_GENERIC),
+            ('$', self.NOTIFY_STRING),
+            ('l', self.NOTIFY_LIST),
+            ('s', self.NOTIFY_SET),
+            ('h', self.NOTIFY_HASH),
+            ('z', self.NOTIFY_ZSET),
+            ('x', self.NOTIFY_EXPIRED),
+            ('e', self.NOTIFY_EVICTED),
+            ('K', self.NOTIFY_KEYSPACE),
+            ('E', self.NOTIFY_KEYEVENT)))
+        # notify-keyspace-events flags and the flags actually used in
+        # _signal (zero when neither keyspace nor keyevent is selected)
+        self._notify_keyspace_events = 0
+        self._notify_events = 0
 
         self.MONITOR = (1 << 2)
         self.MULTI = (1 << 3)
@@ -288,9 +334,21 @@ class Storage:
         # Initialise lua
         self.lua = None
         self.version = '2.4.10'
+        self._set_config('notify-keyspace-events',
+                         cfg.key_value_notify_events)
+        self._set_config('latency-monitor-threshold',
+                         cfg.key_value_latency_threshold)
         self._loaddb()
+        self._cron_handle = None
         self._cron()
 
+    def close(self):
+        '''Stop the periodic task of this storage
+        '''
+        if self._cron_handle:
+            self._cron_handle.cancel()
+            self._cron_handle = None
+
     # #########################################################################
     # #    KEYS COMMANDS
     @command('Keys', True, name='del')
@@ -1826,14 +1884,7 @@ class Storage:
     def publish(self, client, request, N):
         check_input(request, N != 2)
         channel, message = request[1:]
-        ch = channel.decode('utf-8')
-        msg = self._parser.multi_bulk((b'message', channel, message))
-        count = self._publish_clients(msg, self._channels.get(channel, ()))
-        for pattern in self._patterns.values():
-            g = pattern.re.match(ch)
-            if g:
-                count += self._publish_clients(msg, pattern.clients)
-        client.reply_int(count)
+        client.reply_int(self._publish(channel, message))
 
     @command('Pub/Sub', script=0)
     def punsubscribe(self, client, request, N):
@@ -2016,15 +2067,20 @@ class Storage:
             if N != 2:
                 client.reply_error("'config get' no argument")
             else:
-                value = self._get_config(request[2].decode('utf-8'))
-                client.reply_bulk(value)
+                name = request[2].decode('utf-8').lower()
+                value = self._get_config(name)
+                if value is None:
+                    client.reply_multi_bulk(())
+                else:
+                    client.reply_multi_bulk((name, value))
         elif subcommand == 'rewrite':
             client.reply_ok()
         elif subcommand == 'set':
             try:
                 if N != 3:
                     raise ValueError("'config set' no argument")
-                self._set_config(request[2].decode('utf-8'))
+                self._set_config(request[2].decode('utf-8').lower(),
+                                 request[3].decode('utf-8'))
             except Exception as e:
                 client.reply_error(str(e))
             else:
@@ -2068,6 +2124,28 @@ class Storage:
         info = '\n'.join(self._flat_info())
         client.reply_bulk(info.encode('utf-8'))
 
+    @command('Server', subcommands=['latest', 'history', 'reset', 'doctor'])
+    def latency(self, client, request, N):
+        check_input(request, not N)
+        subcommand = request[1].decode('utf-8').lower()
+        monitor = self._latency
+        if subcommand == 'latest':
+            check_input(request, N != 1)
+            self._reply_latency(client, tuple(monitor.latest()))
+        elif subcommand == 'history':
+            check_input(request, N != 2)
+            event = request[2].decode('utf-8')
+            self._reply_latency(client, monitor.history(event))
+        elif subcommand == 'reset':
+            events = [event.decode('utf-8') for event in request[2:]]
+            client.reply_int(monitor.reset(*events))
+        elif subcommand == 'doctor':
+            check_input(request, N != 1)
+            value = '\n'.join(monitor.doctor())
+            client.reply_bulk(value.encode('utf-8'))
+        else:
+            client.reply_error("unknown command 'latency %s'" % subcommand)
+
     @command('Server')
     def lastsave(self, client, request, N):
         check_input(request, N)
@@ -2113,6 +2191,7 @@ class Storage:
     # #########################################################################
     # #    INTERNALS
     def _cron(self):
+        start = self._latency.start()
         dirty = self._dirty
         if dirty:
             now = time.time()
@@ -2121,7 +2200,8 @@ class Storage:
                 if gap >= interval and dirty >= changes:
                     self._save()
                     break
-        self._loop.call_later(1, self._cron)
+        self._latency.finish('cron', start)
+        self._cron_handle = self._loop.call_later(1, self._cron)
 
     def _set(self, client, key, value, seconds=0, milliseconds=0,
              nx=False, xx=False):
@@ -2142,10 +2222,11 @@ class Storage:
                 db.pop(key)
             if timeout > 0:
                 db._timer(timeout, key, bytearray(value))
-                self._signal(self.NOTIFY_STRING, db, 'expire', key)
             else:
                 db._data[key] = bytearray(value)
             self._signal(self.NOTIFY_STRING, db, 'set', key, 1)
+            if timeout > 0:
+                self._signal(self.NOTIFY_GENERIC, db, 'expire', key)
             return True
 
     def _incrby(self, client, name, key, value, type):
@@ -2243,10 +2324,56 @@ class Storage:
                     yield '%s:%s' % (key, value)
 
     def _get_config(self, name):
-        return b''
+        if name == 'notify-keyspace-events':
+            flags = self._notify_keyspace_events
+            chars = []
+            if flags & self.NOTIFY_ALL == self.NOTIFY_ALL:
+                chars.append('A')
+                flags &= ~self.NOTIFY_ALL
+            chars.extend((c for c, f in self._notify_flags_map.items()
+                          if flags & f))
+            return ''.join(chars)
+        elif name == 'latency-monitor-threshold':
+            return str(int(1000*self._latency.threshold))
 
     def _set_config(self, name, value):
-        pass
+        if name == 'notify-keyspace-events':
+            flags = 0
+            for c in value:
+                if c == 'A':
+                    flags |= self.NOTIFY_ALL
+                elif c in self._notify_flags_map:
+                    flags |= self._notify_flags_map[c]
+                else:
+                    raise ValueError('Invalid argument \'%s\' for CONFIG SET '
+                                     '\'notify-keyspace-events\'' % value)
+            self._notify_keyspace_events = flags
+            if flags & (self.NOTIFY_KEYSPACE | self.NOTIFY_KEYEVENT):
+                self._notify_events = flags
+            else:
+                self._notify_events = 0
+        elif name == 'latency-monitor-threshold':
+            try:
+                threshold = int(value)
+                if threshold < 0:
+                    raise ValueError
+            except ValueError:
+                raise ValueError('Invalid argument \'%s\' for CONFIG SET '
+                                 '\'latency-monitor-threshold\'' % value)
+            self._latency.threshold = 0.001*threshold
+        else:
+            raise ValueError('Unsupported CONFIG parameter: %s' % name)
+
+    def _reply_latency(self, client, samples):
+        # timestamps and latencies are integer replies, as in redis
+        client.reply_multi_bulk_len(len(samples))
+        for sample in samples:
+            client.reply_multi_bulk_len(len(sample))
+            for value in sample:
+                if isinstance(value, int):
+                    client.reply_int(value)
+                else:
+                    client.reply_bulk(value.encode('utf-8'))
 
     def _encode_info_value(self, value):
         return str(value).replace('=',
@@ -2406,6 +2533,7 @@ class Storage:
             self.logger.warning('Cannot save, background saving in progress')
         else:
             from multiprocessing import Process
+            start = self._latency.start()
             data = self._dbs()
             self._dirty = 0
             self._last_save = int(time.time())
@@ -2414,9 +2542,11 @@ class Storage:
                 self._writer = Process(target=save_data,
                                        args=(self.cfg, self._filename, data))
                 self._writer.start()
+                self._latency.finish('fork', start)
             else:
                 self.logger.debug('Saving database')
                 save_data(self.cfg, self._filename, data)
+                self._latency.finish('save', start)
 
     def _dbs(self):
         data = [(db._num, db._data) for db in self.databases.values()
@@ -2438,18 +2568,45 @@ class Storage:
     def _signal(self, type, db, command, key=None, dirty=0):
         self._dirty += dirty
         self._event_handlers[type](db, key, COMMANDS_INFO[command])
+        if self._notify_events & type and key is not None:
+            self._notify(db, command, key)
+
+    def _notify(self, db, event, key):
+        '''Publish keyspace and keyevent notifications for ``key``
+        '''
+        if self._channels or self._patterns:
+            flags = self._notify_events
+            if not isinstance(event, bytes):
+                event = event.encode('utf-8')
+            if flags & self.NOTIFY_KEYSPACE:
+                self._publish(db._keyspace_prefix + key, event)
+            if flags & self.NOTIFY_KEYEVENT:
+                self._publish(db._keyevent_prefix + event, key)
+
+    def _publish(self, channel, message):
+        ch = channel.decode('utf-8', 'ignore')
+        msg = self._parser.multi_bulk((b'message', channel, message))
+        count = self._publish_clients(msg, self._channels.get(channel, ()))
+        for name, pattern in self._patterns.items():
+            if pattern.re.match(ch):
+                msg = self._parser.multi_bulk((b'pmessage', name, channel,
+                                               message))
+                count += self._publish_clients(msg, pattern.clients)
+        return count
 
     def _publish_clients(self, msg, clients):
+        start = self._latency.start()
         remove = set()
         count = 0
         for client in clients:
             try:
-                client._transport.write(msg)
+                client.write(msg)
                 count += 1
             except Exception:
                 remove.add(client)
         if remove:
             clients.difference_update(remove)
+        self._latency.finish('publish', start)
         return count
 
     # EVENT HANDLERS
@@ -2501,7 +2658,7 @@ class Storage:
         remove = set()
         for m in self._monitors:
             try:
-                m._transport.write(message)
+                m.write(message)
             except Exception:
                 remove.add(m)
         if remove:
@@ -2519,6 +2676,8 @@ class Db:
         self._expires = {}
         self._events = {}
         self._blocking_keys = {}
+        self._keyspace_prefix = ('__keyspace@%d__:' % num).encode('utf-8')
+        self._keyevent_prefix = ('__keyevent@%d__:' % num).encode('utf-8')
 
     def __repr__(self):
         return 'db%s' % self._num
@@ -2533,12 +2692,14 @@ class Db:
     # #########################################################################
     # #    INTERNALS
     def flush(self):
+        start = self.store._latency.start()
         removed = len(self._data)
         self._data.clear()
         [t.handle.cancel() for t in self._expires.values()]
         self._expires.clear()
         self.store._signal(self.store.NOTIFY_GENERIC, self, 'flushdb',
                            dirty=removed)
+        self.store._latency.finish('flushdb', start)
 
     def get(self, key, default=None):
         if key in self._data:
@@ -2626,7 +2787,10 @@ class Db:
         if key in self._expires:
             t = self._expires.pop(key)
             t.handle.cancel()
-            self.store._expired_keys += 1
+            store = self.store
+            store._expired_keys += 1
+            if store._notify_events & store.NOTIFY_EXPIRED:
+                store._notify(self, 'expired', key)
 
     def _timer(self, timeout, key, value):
         loop = self._loop
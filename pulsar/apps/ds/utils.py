@@ -1,5 +1,7 @@
+import time
 import shutil
 import pickle
+from collections import deque
 
 
 def save_data(cfg, filename, data):
@@ -196,3 +198,91 @@ def or_op(x, y):
 
 def xor_op(x, y):
     return x ^ y
+
+
+class LatencyEvent:
+    __slots__ = ('history', 'max')
+
+    def __init__(self, samples):
+        self.history = deque(maxlen=samples)
+        self.max = 0
+
+
+class LatencyMonitor:
+    '''Record latency spikes of pulsar-ds events.
+
+    Only events lasting at least :attr:`threshold` seconds are recorded,
+    a ``threshold`` of zero disables the monitor. For each event, the
+    worst latency (in milliseconds) of every second is kept in a ring
+    buffer of ``samples`` entries.
+    '''
+    def __init__(self, threshold=0, samples=160):
+        self.threshold = threshold
+        self.samples = samples
+        self.events = {}
+
+    def start(self):
+        '''Start timing an event, return zero if monitoring is disabled
+        '''
+        return time.perf_counter() if self.threshold else 0
+
+    def finish(self, event, start):
+        if start:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                self.add_sample(event, int(1000*duration))
+
+    def add_sample(self, event, latency):
+        now = int(time.time())
+        ev = self.events.get(event)
+        if ev is None:
+            self.events[event] = ev = LatencyEvent(self.samples)
+        history = ev.history
+        if history and history[-1][0] == now:
+            history[-1][1] = max(history[-1][1], latency)
+        else:
+            history.append([now, latency])
+        ev.max = max(ev.max, latency)
+
+    def latest(self):
+        for name, ev in self.events.items():
+            timestamp, latency = ev.history[-1]
+            yield (name, timestamp, latency, ev.max)
+
+    def history(self, event):
+        ev = self.events.get(event)
+        return [tuple(sample) for sample in ev.history] if ev else []
+
+    def reset(self, *events):
+        if not events:
+            events = list(self.events)
+        return sum((self.events.pop(event, None) is not None
+                    for event in events))
+
+    def doctor(self):
+        if not self.threshold:
+            yield ('Latency monitoring is disabled. Use CONFIG SET '
+                   'latency-monitor-threshold <milliseconds> to enable it.')
+        elif not self.events:
+            yield ('No latency spikes above %d milliseconds recorded.' %
+                   int(1000*self.threshold))
+        else:
+            for name, ev in sorted(self.events.items()):
+                latencies = [latency for _, latency in ev.history]
+                first = ev.history[0][0]
+                yield ('%s: %d latency spikes (average %dms, mean '
+                       'deviation %dms, period %d sec). Worst all time '
+                       'event %dms.' % (name, len(latencies),
+                                        mean(latencies),
+                                        mean_deviation(latencies),
+                                        int(time.time()) - first,
+                                        ev.max))
+
+
+def mean(values):
+    return sum(values)/len(values)
+
+
+def mean_deviation(values):
+    m = mean(values)
+    return sum((abs(v - m) for v in values))/len(values)
@@ -60,6 +60,16 @@ To specify the maximum number of queued connections you can use the
 
 rarely used.
 
+reuse_port
+---------------
+By default workers accept connections from listening sockets created by
+the monitor and shared with all of them. With the
+:ref:`reuse-port <setting-reuse_port>` setting each worker binds its own
+socket with the ``SO_REUSEPORT`` option and the kernel balances new
+connections between workers::
+
+    python script.py --reuse-port
+
 keep_alive
 ---------------
 To control how long a server :class:`.Connection` is kept alive after the
@@ -109,6 +119,9 @@ for:
 * Windows running python 3.2 or above (python 2 on windows does not support
   the creation of sockets from file descriptors).
 
+With :ref:`reuse-port <setting-reuse_port>` workers do not share the sockets
+of the monitor, which binds its own and serves together with its workers.
+
 Check the :meth:`SocketServer.monitor_start` method for implementation details.
 '''
 import os
@@ -124,7 +137,7 @@ except ImportError:     # pragma    nocover
 import pulsar
 from pulsar import TcpServer, DatagramServer, Connection, ImproperlyConfigured
 from pulsar import as_coroutine
-from pulsar.utils.internet import parse_address
+from pulsar.utils.internet import parse_address, reuse_port_sockets
 from pulsar.utils.config import pass_through
 
 
@@ -176,6 +189,20 @@ class Backlog(SocketSetting):
         """
 
 
+class ReusePort(SocketSetting):
+    name = "reuse_port"
+    flags = ["--reuse-port"]
+    validator = pulsar.validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Each worker binds its own socket with the ``SO_REUSEPORT`` option.
+
+        The kernel balances new connections between workers rather than
+        waking all of them on a shared listening socket.
+        """
+
+
 class KeyFile(SocketSetting):
     name = "key_file"
     flags = ["--key-file"]
@@ -223,8 +250,8 @@ class SocketServer(pulsar.Application):
         number of workers to 0.
         '''
         cfg = self.cfg
-        if (not pulsar.platform.has_multiProcessSocket or
-                cfg.concurrency == 'thread'):
+        if ((not pulsar.platform.has_multiProcessSocket and
+                not cfg.reuse_port) or cfg.concurrency == 'thread'):
             cfg.set('workers', 0)
         if not cfg.address:
             raise ImproperlyConfigured('Could not open a socket. '
@@ -249,7 +276,10 @@ class SocketServer(pulsar.Application):
             self.cfg.addresses = server.addresses
 
     def actorparams(self, monitor, params):
-        params['sockets'] = monitor.servers[self.name].sockets
+        if self.cfg.reuse_port:
+            params['sockets'] = None
+        else:
+            params['sockets'] = monitor.servers[self.name].sockets
 
     async def worker_start(self, worker, exc=None):
         '''Start the worker by invoking the :meth:`create_server` method.
@@ -287,7 +317,7 @@ class SocketServer(pulsar.Application):
 
         :return: a :class:`.TcpServer`.
         '''
-        sockets = worker.sockets if not address else None
+        sockets = self._sockets(worker, address)
         cfg = self.cfg
         max_requests = cfg.max_requests
         if max_requests:
@@ -310,6 +340,13 @@ class SocketServer(pulsar.Application):
         await server.start_serving(cfg.backlog, sslcontext=self.sslcontext())
         return server
 
+    def _sockets(self, worker, address, type=socket.SOCK_STREAM):
+        if self.cfg.reuse_port:
+            addresses = [address] if address else self.cfg.addresses
+            return [sock for address in addresses
+                    for sock in reuse_port_sockets(address, type)]
+        return worker.sockets if not address else None
+
     def sslcontext(self):
         cfg = self.cfg
         if cfg.cert_file and cfg.key_file:
@@ -343,8 +380,8 @@ class UdpSocketServer(SocketServer):
         number of workers to 0.
         '''
         cfg = self.cfg
-        if (not pulsar.platform.has_multiProcessSocket or
-                cfg.concurrency == 'thread'):
+        if ((not pulsar.platform.has_multiProcessSocket and
+                not cfg.reuse_port) or cfg.concurrency == 'thread'):
             cfg.set('workers', 0)
         if not cfg.address:
             raise pulsar.ImproperlyConfigured('Could not open a socket. '
@@ -365,7 +402,7 @@ class UdpSocketServer(SocketServer):
 
         :return: the server obtained from :meth:`server_factory`.
         '''
-        sockets = worker.sockets if not address else None
+        sockets = self._sockets(worker, address, socket.SOCK_DGRAM)
         cfg = self.cfg
         max_requests = cfg.max_requests
         if max_requests:
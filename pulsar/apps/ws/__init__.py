@@ -87,8 +87,22 @@ class WS:
 
     These methods accept as first parameter the
     :class:`.WebSocketProtocol` created during the handshake.
+
+    .. attribute:: timeout
+
+        Seconds after which an idle websocket connection is closed,
+        ``0`` (default) for no timeout.
+
+    .. attribute:: max_buffer_size
+
+        Maximum number of bytes waiting to be sent to a slow client.
+        Once over this limit the connection is aborted, handlers writing
+        large amounts of data should :meth:`~.ProtocolConsumer.drain`
+        the websocket instead.
     '''
     frame_parser = None
+    timeout = 0
+    max_buffer_size = 2**24
 
     def on_open(self, websocket):
         '''Invoked when a new ``websocket`` is opened.
@@ -50,7 +50,7 @@ class WebSocketProtocol(ProtocolConsumer):
         return self.handshake.cfg
 
     def connection_made(self, connection):
-        connection.timeout = 0
+        connection.timeout = getattr(self.handler, 'timeout', 0)
         maybe_async(self.handler.on_open(self), self._loop)
 
     def data_received(self, data):
@@ -88,6 +88,8 @@ class WebSocketProtocol(ProtocolConsumer):
         result = super().write(message)
         if opcode == 0x8:
             self.finished()
+        elif result:
+            self._check_buffer()
         return result
 
     def ping(self, message=None):
@@ -105,6 +107,15 @@ class WebSocketProtocol(ProtocolConsumer):
         '''
         return self.write(self.parser.close(code), opcode=0x8, encode=False)
 
+    def _check_buffer(self):
+        # writing is paused, abort if the client does not keep up
+        connection = self._connection
+        limit = getattr(self.handler, 'max_buffer_size', 0)
+        if limit and connection.write_buffer_size > limit:
+            self.logger.warning('%s write buffer over %d bytes, aborting',
+                                self, limit)
+            connection.abort()
+
     def _on(self, handler, frame):
         maybe_async(handler(self, frame.body), loop=self._loop)
 
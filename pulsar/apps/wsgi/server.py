@@ -234,6 +234,10 @@ class HttpServerResponse(ProtocolConsumer):
         '''
         return self._headers_sent
 
+    def connection_made(self, connection):
+        # responses to pipelined requests share a transport write
+        connection.cork()
+
     def data_received(self, data):
         '''Implements :meth:`~.ProtocolConsumer.data_received` method.
 
@@ -401,14 +405,16 @@ class HttpServerResponse(ProtocolConsumer):
                 #
                 # Do the actual writing
                 loop = self._loop
+                connection = self._connection
                 start = loop.time()
                 for chunk in response:
                     if isawaitable(chunk):
                         chunk = await wait_for(chunk, alive)
                         start = loop.time()
-                    result = self.write(chunk)
-                    if isawaitable(result):
-                        await wait_for(result, alive)
+                    self.write(chunk)
+                    if connection.writing_paused:
+                        # slow client, wait for the write buffer to drain
+                        await wait_for(connection.drain(), alive)
                         start = loop.time()
                     else:
                         time_in_loop = loop.time() - start
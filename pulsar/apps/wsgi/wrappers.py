@@ -57,7 +57,7 @@ Wsgi File Wrapper
 from functools import reduce, partial
 from http.client import responses
 
-from pulsar import isawaitable, chain_future, HttpException, create_future
+from pulsar import isawaitable, chain_future, HttpException
 from pulsar.utils.structures import AttributeDictionary
 from pulsar.utils.httpurl import (Headers, SimpleCookie,
                                   has_empty_content, REDIRECT_CODES,
@@ -694,6 +694,9 @@ class FileWrapper:
     Available directly from the ``wsgi.file_wrapper`` key in the WSGI environ
     dictionary. Alternatively one can use the :func:`~.file_response`
     high level function for serving local files.
+
+    The file is read in blocks, the next block is read once the server
+    has drained the previous one below its write buffer watermark.
     """
     def __init__(self, file, block=None):
         self.file = file
@@ -704,9 +707,7 @@ class FileWrapper:
             data = self.file.read(self.block)
             if not data:
                 break
-            future = create_future()
-            future.set_result(data)
-            yield future
+            yield data
 
     def close(self):
         close_object(self.file)
@@ -7,5 +7,6 @@ from .protocols import *        # noqa
 from .clients import *          # noqa
 from .actor import *            # noqa
 from .concurrency import *      # noqa
+from .sharedchannel import *    # noqa
 from .lock import LockBase, Lock    # noqa
 from . import commands              # noqa
@@ -144,6 +144,11 @@ class Actor(EventHandler, Coverage):
 
         Used to send and receive :ref:`actor messages <tutorials-messages>`.
 
+    .. attribute:: peers
+
+        The :class:`.PeerMailboxes` used to send messages directly to other
+        actors, ``None`` for the arbiter and monitors.
+
     .. attribute:: address
 
         The socket address for this :attr:`Actor.mailbox`.
@@ -177,6 +182,11 @@ class Actor(EventHandler, Coverage):
         The :class:`asyncio.Handle` for the next
         :ref:`actor periodic task <actor-periodic-task>`.
 
+    .. attribute:: loop_lag
+
+        Seconds the last :ref:`actor periodic task <actor-periodic-task>`
+        ran late, a measure of how busy the event loop is.
+
     .. attribute:: stream
 
         A ``stream`` handler to write information messages without using
@@ -185,9 +195,11 @@ class Actor(EventHandler, Coverage):
     ONE_TIME_EVENTS = ('start', 'stopping')
     MANY_TIMES_EVENTS = ('on_info', 'on_params', 'periodic_task')
     exit_code = None
+    loop_lag = 0
     mailbox = None
     monitor = None
     next_periodic_task = None
+    peers = None
 
     def __init__(self, impl):
         self.state = ACTOR_STATES.INITIAL
@@ -297,6 +309,10 @@ class Actor(EventHandler, Coverage):
                 return command_in_context(action, self, actor, args, kwargs)
             elif isinstance(actor, ActorProxyMonitor):
                 mailbox = actor.mailbox
+            elif (self.peers and target != 'arbiter' and
+                  target is not self.monitor):
+                # send directly to the actor if possible
+                mailbox = self.peers
         if hasattr(mailbox, 'request'):
             # if not mailbox.closed:
             return mailbox.request(action, self, target, args, kwargs)
@@ -413,7 +429,10 @@ class Actor(EventHandler, Coverage):
                  'thread_id': self.tid,
                  'process_id': self.pid,
                  'is_process': isp,
-                 'age': self.impl.age}
+                 'age': self.impl.age,
+                 'loop_lag': self.loop_lag}
+        if self.peers:
+            actor['peer_address'] = self.peers.address
         data = {'actor': actor,
                 'extra': self.extra}
         if isp:
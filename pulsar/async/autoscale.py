@@ -0,0 +1,167 @@
+'''Autoscaling of the workers of a :class:`.Monitor`.
+
+When the :ref:`max-workers <setting-max_workers>` setting is positive,
+the monitor adjusts the number of its workers to their load, between
+:ref:`min-workers <setting-min_workers>` and ``max_workers``::
+
+    python script.py --workers 2 --min-workers 2 --max-workers 8
+
+The load is measured from the information workers send to their monitor
+with the :ref:`notify command <actor_notify_command>`: the
+:attr:`.Actor.loop_lag`, the cpu usage when psutil_ is available and the
+connections and requests in flight of their servers. The load of a
+worker is the largest ratio between one of these metrics and its limit
+in :attr:`AutoScaler.limits`.
+
+Workers are added when the average load stays above
+:attr:`AutoScaler.scale_up` for :attr:`AutoScaler.patience` consecutive
+checks and retired, one at a time, when it stays below
+:attr:`AutoScaler.scale_down`. After each decision the monitor waits for
+the :ref:`autoscale-cooldown <setting-autoscale_cooldown>` seconds.
+Retired workers stop accepting new connections and stop once their
+current requests are done, or after :attr:`AutoScaler.drain_timeout`
+seconds.
+
+Decisions are available in the ``autoscale`` entry of the monitor
+:ref:`info <actor_info_command>`.
+
+.. _psutil: https://pypi.python.org/pypi/psutil
+
+.. autoclass:: AutoScaler
+   :members:
+   :member-order: bysource
+'''
+from collections import deque
+from math import ceil
+from time import time
+
+from pulsar.utils.pep import default_timer
+
+
+__all__ = ['AutoScaler', 'worker_metrics']
+
+
+def worker_metrics(info):
+    '''Load metrics from the ``info`` dictionary notified by a worker
+    '''
+    connections = in_flight = 0
+    for value in info.values():
+        clients = value.get('clients') if isinstance(value, dict) else None
+        if isinstance(clients, dict):
+            connections += clients.get('connected_clients', 0)
+            in_flight += clients.get('in_flight_requests', 0)
+    return {'loop_lag': info.get('actor', {}).get('loop_lag', 0),
+            'cpu': info.get('system', {}).get('cpu_percent', 0),
+            'connections': connections,
+            'in_flight': in_flight}
+
+
+class AutoScaler:
+    '''Add and retire workers of a :class:`.Monitor` depending on their load
+
+    :param min_workers: minimum number of workers, at least one
+    :param max_workers: maximum number of workers
+    :param cooldown: seconds without decisions after adding or retiring
+        workers
+    :param period: seconds between two checks of the load, workers notify
+        their monitor at a similar interval
+
+    .. attribute:: load
+
+        The average load of workers at the last check
+    '''
+    limits = {'loop_lag': 0.1,
+              'cpu': 80,
+              'connections': 1000,
+              'in_flight': 100}
+    '''Metric values at which a worker is fully loaded'''
+    scale_up = 0.8
+    '''Average load above which workers are added'''
+    scale_down = 0.3
+    '''Average load below which a worker is retired'''
+    patience = 3
+    '''Number of consecutive checks before a decision'''
+    drain_timeout = 30
+    '''Seconds a retired worker waits for its requests to complete'''
+    history = 20
+
+    def __init__(self, min_workers, max_workers, cooldown=30, period=5):
+        self.max_workers = max(max_workers, 1)
+        self.min_workers = max(min(min_workers, self.max_workers), 1)
+        self.cooldown = cooldown
+        self.period = period
+        self.load = 0
+        self.metric = None
+        self.decisions = deque(maxlen=self.history)
+        self._high = 0
+        self._low = 0
+        self._next_check = 0
+        self._cooldown_end = 0
+
+    def __call__(self, monitor, workers):
+        '''Check the load of ``workers`` and add or retire workers
+        '''
+        cfg = monitor.cfg
+        current = min(max(cfg.workers, self.min_workers), self.max_workers)
+        if current != cfg.workers:
+            cfg.set('workers', current)
+        now = time()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.period
+        workers = [w for w in workers if w.info and not w.stopping_start]
+        if not workers:
+            return
+        loads = [self.worker_load(w.info) for w in workers]
+        self.load = sum((load for load, _ in loads)) / len(loads)
+        self.metric = max(loads)[1]
+        if now < self._cooldown_end:
+            return
+        if self.load > self.scale_up:
+            self._high, self._low = self._high + 1, 0
+        elif self.load < self.scale_down:
+            self._high, self._low = 0, self._low + 1
+        else:
+            self._high = self._low = 0
+        if self._high >= self.patience and current < self.max_workers:
+            target = ceil(len(workers) * self.load / self.scale_up)
+            target = min(max(target, current + 1), self.max_workers)
+            self._decision(monitor, 'add', current, target, now)
+        elif self._low >= self.patience and current > self.min_workers:
+            worker = min(workers, key=self._busy)
+            worker.stopping_start = default_timer()
+            worker.stopping_timeout += self.drain_timeout
+            monitor.send(worker, 'retire', self.drain_timeout)
+            self._decision(monitor, 'retire', current, current - 1, now,
+                           worker=worker.aid)
+
+    def worker_load(self, info):
+        '''The load of a worker and the metric determining it
+        '''
+        metrics = worker_metrics(info)
+        return max(((metrics[name] / limit, name)
+                    for name, limit in self.limits.items() if limit))
+
+    def info(self):
+        return {'min_workers': self.min_workers,
+                'max_workers': self.max_workers,
+                'load': round(self.load, 3),
+                'metric': self.metric,
+                'cooldown': max(self._cooldown_end - time(), 0),
+                'decisions': list(self.decisions)}
+
+    #    INTERNALS
+    def _busy(self, worker):
+        metrics = worker_metrics(worker.info)
+        return metrics['in_flight'], metrics['connections']
+
+    def _decision(self, monitor, action, current, target, now, **kw):
+        monitor.cfg.set('workers', target)
+        self._high = self._low = 0
+        self._cooldown_end = now + self.cooldown
+        decision = dict(time=now, action=action, previous=current,
+                        workers=target, load=round(self.load, 3),
+                        metric=self.metric, **kw)
+        self.decisions.append(decision)
+        monitor.logger.info('Autoscale %s: %d workers, load %.2f from %s',
+                            action, target, self.load, self.metric)
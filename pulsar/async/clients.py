@@ -1,5 +1,6 @@
 import logging
-from functools import reduce
+from bisect import bisect_left
+from collections import deque
 
 from pulsar.utils.internet import is_socket_closed
 
@@ -9,21 +10,58 @@ from .futures import AsyncObject
 from .protocols import Producer
 
 
-__all__ = ['Pool', 'PoolConnection', 'AbstractClient', 'AbstractUdpClient']
+__all__ = ['Pool', 'PoolMetrics', 'PoolConnection', 'AbstractClient',
+           'AbstractUdpClient']
 
 
 logger = logging.getLogger('pulsar.pool')
 
 
+class PoolMetrics:
+    '''Counters of a connection :class:`Pool`
+
+    .. attribute:: wait_histogram
+
+        Number of :meth:`Pool.connect` calls by time waited for a
+        connection, the bucket ``i`` counts waits up to
+        ``wait_buckets[i]`` seconds, the last bucket counts longer waits
+    '''
+    wait_buckets = (0.001, 0.01, 0.1, 1, 10)
+
+    def __init__(self):
+        self.acquired = 0
+        self.created = 0
+        self.discarded = 0
+        self.recycled = 0
+        self.timeouts = 0
+        self.wait_histogram = [0] * (len(self.wait_buckets) + 1)
+
+    def waited(self, seconds):
+        self.acquired += 1
+        self.wait_histogram[bisect_left(self.wait_buckets, seconds)] += 1
+
+    def as_dict(self):
+        return dict(acquired=self.acquired, created=self.created,
+                    discarded=self.discarded, recycled=self.recycled,
+                    timeouts=self.timeouts,
+                    wait_histogram=list(self.wait_histogram))
+
+
 class Pool(AsyncObject):
     '''An asynchronous pool of open connections.
 
     Open connections are either :attr:`in_use` or :attr:`available`
-    to be used. Available connection are placed in an :class:`asyncio.Queue`.
+    to be used. Available connections are checked out in LIFO order, so
+    that the most recently used sockets are reused while the others can
+    expire after ``max_idle_time``. When the pool is full, requests wait
+    in a FIFO queue and connections released back to the pool are handed
+    to the longest waiting request.
 
     This class is not thread safe.
     '''
-    def __init__(self, creator, pool_size=10, loop=None, timeout=None, **kw):
+    def __init__(self, creator, pool_size=10, loop=None, timeout=None,
+                 min_size=0, max_idle_time=None, max_lifetime=None,
+                 maintenance_interval=1, **kw):
         '''
         Construct an asynchronous Pool.
 
@@ -31,21 +69,43 @@ class Pool(AsyncObject):
 
         :param pool_size: The size of the pool to be maintained,
           defaults to 10. This is the largest number of connections that
-          will be kept persistently in the pool. Note that the pool
-          begins with no connections; once this number of connections
-          is requested, that number of connections will remain.
+          will be kept persistently in the pool. Once this number of
+          connections is requested, that number of connections will remain.
 
         :param timeout: The number of seconds to wait before giving up
           on returning a connection. Defaults to 30.
+
+        :param min_size: number of connections created in the background
+          and kept open, even when idle.
+
+        :param max_idle_time: seconds after which an available connection
+          is closed, unless needed to keep ``min_size`` connections.
+
+        :param max_lifetime: seconds after which a connection is closed
+          rather than returned to the pool.
+
+        :param maintenance_interval: seconds between checks of idle and
+          expired connections and of ``min_size``.
         '''
         self._creator = creator
         self._closed = False
         self._timeout = timeout
-        self._queue = asyncio.Queue(maxsize=pool_size, loop=loop)
-        self._connecting = 0
-        self._loop = self._queue._loop
+        self._pool_size = pool_size
+        self._min_size = min(min_size, pool_size)
+        self._max_idle_time = max_idle_time
+        self._max_lifetime = max_lifetime
+        self._maintenance_interval = maintenance_interval
+        self._loop = loop or asyncio.get_event_loop()
         self._logger = logger
+        self._available = deque()
+        self._waiters = deque()
+        self._connecting = 0
+        self._created = {}
         self._in_use_connections = set()
+        self._maintenance = None
+        self.metrics = PoolMetrics()
+        if self._min_size or max_idle_time or max_lifetime:
+            self._maintenance = self._loop.call_soon(self._maintain)
 
     @property
     def pool_size(self):
@@ -55,7 +115,13 @@ class Pool(AsyncObject):
         is queued and a connection returned as soon as one becomes
         available.
         '''
-        return self._queue._maxsize
+        return self._pool_size
+
+    @property
+    def min_size(self):
+        '''The number of connections kept open
+        '''
+        return self._min_size
 
     @property
     def in_use(self):
@@ -70,7 +136,19 @@ class Pool(AsyncObject):
     def available(self):
         '''Number of available connections in the pool.
         '''
-        return reduce(self._count_connections, self._queue._queue, 0)
+        return len(self._available)
+
+    @property
+    def waiting(self):
+        '''Number of requests waiting for a connection
+        '''
+        return sum((1 for waiter in self._waiters if not waiter.done()))
+
+    @property
+    def size(self):
+        '''Number of open or opening connections
+        '''
+        return self.in_use + self.available + self._connecting
 
     @property
     def closed(self):
@@ -80,7 +158,7 @@ class Pool(AsyncObject):
 
     def __contains__(self, connection):
         if connection not in self._in_use_connections:
-            return connection in self._queue._queue
+            return any((c is connection for c, _ in self._available))
         return True
 
     async def connect(self):
@@ -102,56 +180,28 @@ class Pool(AsyncObject):
         have closed
         '''
         if not self.closed:
-            waiters = []
-            queue = self._queue
-            while queue.qsize():
-                connection = queue.get_nowait()
-                if connection:
-                    waiters.append(connection.close())
+            if self._maintenance:
+                self._maintenance.cancel()
+                self._maintenance = None
+            waiters, self._waiters = self._waiters, deque()
+            for waiter in waiters:
+                waiter.cancel()
+            closing = []
+            available, self._available = self._available, deque()
+            for connection, _ in available:
+                closing.append(connection.close())
             in_use = self._in_use_connections
             self._in_use_connections = set()
             for connection in in_use:
-                if connection:
-                    waiters.append(connection.close())
-            self._closed = asyncio.gather(*waiters, loop=self._loop)
+                closing.append(connection.close())
+            self._created.clear()
+            self._closed = asyncio.gather(*closing, loop=self._loop)
         return self._closed
 
-    async def _get(self):
-        queue = self._queue
-        # grab the connection without waiting, important!
-        if queue.qsize():
-            connection = queue.get_nowait()
-        # wait for one to be available
-        elif self.in_use + self._connecting >= queue._maxsize:
-            connection = await asyncio.wait_for(queue.get(), self._timeout,
-                                                loop=self._loop)
-        else:   # must create a new connection
-            self._connecting += 1
-            try:
-                connection = await self._creator()
-            finally:
-                self._connecting -= 1
-        # None signal that a connection was removed form the queue
-        # Go again
-        if connection is None:
-            connection = await self._get()
-        else:
-            if self.is_connection_closed(connection):
-                connection = await self._get()
-            else:
-                self._in_use_connections.add(connection)
-        return connection
-
-    def _put(self, conn, discard=False):
-        if not self.closed:
-            try:
-                # None signal that a connection was removed form the queue
-                self._queue.put_nowait(None if discard else conn)
-            except asyncio.QueueFull:
-                # The queue of available connection is already full
-                if conn:
-                    conn.close()
-        self._in_use_connections.discard(conn)
+    def status(self, message=None, level=None):
+        return ('Pool size: %d  Connections in pool: %d '
+                'Current Checked out connections: %d' %
+                (self._pool_size, self.available, self.in_use))
 
     def is_connection_closed(self, connection):
         is_closing = getattr(connection.transport, 'is_closing', None)
@@ -166,15 +216,172 @@ class Pool(AsyncObject):
                 connection.close()
                 return True
             return False
-        return True
 
-    def status(self, message=None, level=None):
-        return ('Pool size: %d  Connections in pool: %d '
-                'Current Checked out connections: %d' %
-                (self._queue._maxsize, self.available, self.in_use))
+    #    INTERNALS
+    async def _get(self):
+        start = self._loop.time()
+        while True:
+            connection = self._checkout()
+            if connection is None:
+                if self.size < self._pool_size:
+                    connection = await self._create()
+                else:
+                    connection = await self._wait(start)
+            if connection is None:
+                continue
+            if self.is_connection_closed(connection):
+                self._forget(connection)
+                continue
+            break
+        self._in_use_connections.add(connection)
+        self.metrics.waited(self._loop.time() - start)
+        return connection
+
+    def _checkout(self):
+        available = self._available
+        now = self._loop.time()
+        while available:
+            connection, released = available.pop()
+            if self._expired(connection, now):
+                self._recycle(connection)
+            else:
+                return connection
+
+    async def _create(self):
+        self._connecting += 1
+        connection = await self._open()
+        return connection
+
+    async def _open(self):
+        # the slot is reserved by incrementing _connecting
+        try:
+            connection = await self._creator()
+        finally:
+            self._connecting -= 1
+        self._created[connection] = self._loop.time()
+        self.metrics.created += 1
+        return connection
+
+    async def _wait(self, start):
+        waiter = self._loop.create_future()
+        self._waiters.append(waiter)
+        handle = None
+        if self._timeout:
+            timeout = max(self._timeout - self._loop.time() + start, 0)
+            handle = self._loop.call_later(timeout, self._wait_timeout,
+                                           waiter)
+        try:
+            connection = await waiter
+        except asyncio.CancelledError:
+            # the connection may have been handed over already
+            if (waiter.done() and not waiter.cancelled() and
+                    not waiter.exception()):
+                self._put(waiter.result())
+            raise
+        finally:
+            if handle:
+                handle.cancel()
+        return connection
+
+    def _wait_timeout(self, waiter):
+        if not waiter.done():
+            self.metrics.timeouts += 1
+            waiter.set_exception(asyncio.TimeoutError())
+
+    def _next_waiter(self):
+        waiters = self._waiters
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                return waiter
+
+    def _put(self, conn, discard=False):
+        self._in_use_connections.discard(conn)
+        if self.closed:
+            return
+        if discard:
+            self.metrics.discarded += 1
+            self._forget(conn)
+        elif self._expired(conn, self._loop.time()):
+            self._recycle(conn)
+        else:
+            waiter = self._next_waiter()
+            if waiter:
+                # hand it over, the connection stays in use
+                self._in_use_connections.add(conn)
+                waiter.set_result(conn)
+            elif self.size < self._pool_size:
+                self._available.append((conn, self._loop.time()))
+            else:
+                self._recycle(conn)
+
+    def _expired(self, connection, now):
+        if self._max_lifetime:
+            created = self._created.get(connection, now)
+            return now - created > self._max_lifetime
+        return False
+
+    def _recycle(self, connection):
+        self.metrics.recycled += 1
+        self._forget(connection)
+        connection.close()
+
+    def _forget(self, connection):
+        '''The pool no longer owns ``connection``, it has a free slot
+        for the next waiter or for the ``min_size`` connections.
+        '''
+        self._created.pop(connection, None)
+        # a closed connection handed over to a waiter is still in use
+        self._in_use_connections.discard(connection)
+        if self.closed:
+            return
+        waiter = self._next_waiter()
+        if waiter:
+            self._connecting += 1
+            self._loop.create_task(self._create_for(waiter))
+        elif self.size < self._min_size:
+            self._loop.create_task(self._warm_up())
 
-    def _count_connections(self, x, y):
-        return x + int(y is not None)
+    async def _create_for(self, waiter):
+        try:
+            connection = await self._open()
+        except Exception as exc:
+            if not waiter.done():
+                waiter.set_exception(exc)
+            return
+        if waiter.done():
+            self._put(connection)
+        else:
+            self._in_use_connections.add(connection)
+            waiter.set_result(connection)
+
+    async def _warm_up(self):
+        while not self.closed and self.size < self._min_size:
+            try:
+                connection = await self._create()
+            except Exception as exc:
+                self._logger.warning('%s could not warm up - %s', self, exc)
+                break
+            self._put(connection)
+
+    def _maintain(self):
+        if self.closed:
+            return
+        now = self._loop.time()
+        available = self._available
+        if self._max_idle_time:
+            # least recently used connections are on the left
+            while (available and self.size > self._min_size and
+                   now - available[0][1] > self._max_idle_time):
+                self._recycle(available.popleft()[0])
+        if self._max_lifetime:
+            for entry in [e for e in available if self._expired(e[0], now)]:
+                available.remove(entry)
+                self._recycle(entry[0])
+        if self.size < self._min_size:
+            self._loop.create_task(self._warm_up())
+        self._maintenance = self._loop.call_later(
+            self._maintenance_interval, self._maintain)
 
 
 class PoolConnection:
@@ -261,6 +468,9 @@ class AbstractClient(Producer, ClientMixin):
 
     async def create_connection(self, address, protocol_factory=None, **kw):
         '''Helper method for creating a connection to an ``address``.
+
+        The ``address`` is a ``(host, port)`` tuple or the path of a
+        unix domain socket.
         '''
         protocol_factory = protocol_factory or self.create_protocol
         if isinstance(address, tuple):
@@ -269,10 +479,15 @@ class AbstractClient(Producer, ClientMixin):
                 self.logger.debug('Create connection %s:%s', host, port)
             _, protocol = await self._loop.create_connection(
                 protocol_factory, host, port, **kw)
-            await protocol.event('connection_made')
+        elif isinstance(address, str):
+            if self.debug:
+                self.logger.debug('Create unix connection %s', address)
+            _, protocol = await self._loop.create_unix_connection(
+                protocol_factory, address, **kw)
         else:
             raise NotImplementedError('Could not connect to %s' %
                                       str(address))
+        await protocol.event('connection_made')
         return protocol
 
 
@@ -4,6 +4,7 @@ from pulsar import CommandError
 
 from .proxy import command, ActorProxyMonitor
 from .futures import async_while
+from .sharedchannel import SharedChannelReader
 
 
 @command()
@@ -45,6 +46,17 @@ def stop(request):
     return request.actor.stop()
 
 
+@command(ack=False)
+async def retire(request, timeout=None):
+    '''Stop the actor once its servers have drained their connections.'''
+    actor = request.actor
+    for server in tuple(actor.servers.values()):
+        drain = getattr(server, 'drain', None)
+        if drain:
+            await drain(timeout)
+    actor.stop()
+
+
 @command()
 def notify(request, info):
     '''The actor notify itself with a dictionary of information.
@@ -84,6 +96,28 @@ def spawn(request, **kwargs):
     return request.actor.spawn(**kwargs)
 
 
+@command()
+def peer_address(request, aid):
+    '''Address of the peer mailbox of actor ``aid``.
+
+    Returns ``None`` when the actor lives in the process of the arbiter
+    and ``False`` when the address is not known yet.
+    '''
+    target = request.actor.get_actor(aid)
+    if isinstance(target, ActorProxyMonitor):
+        info = (target.info or {}).get('actor') or {}
+        return info.get('peer_address') or False
+    elif target is None:
+        return False
+
+
+@command()
+def shared_channel(request, base, size, handler):
+    '''Open the consumer side of a :class:`.SharedChannel`'''
+    SharedChannelReader(request.actor, base, size, handler)
+    return True
+
+
 @command()
 def info(request):
     ''' Returns information and statistics about the server as a json string'''
@@ -17,10 +17,12 @@ from pulsar.utils import autoreload
 from .proxy import ActorProxyMonitor, get_proxy, actor_proxy_future
 from .access import get_actor, set_actor, logger, EventLoopPolicy
 from .threads import Thread
-from .mailbox import MailboxClient, MailboxProtocol, ProxyMailbox, create_aid
+from .mailbox import (MailboxClient, MailboxProtocol, ProxyMailbox,
+                      PeerMailboxes, create_aid, mailbox_address)
 from .futures import ensure_future, add_errback, chain_future, create_future
 from .protocols import TcpServer
 from .actor import Actor
+from .autoscale import AutoScaler
 from .consts import (ACTOR_STATES, ACTOR_TIMEOUT_TOLE, MIN_NOTIFY, MAX_NOTIFY,
                      MONITOR_TASK_PERIOD)
 from .process import ProcessMixin
@@ -66,6 +68,7 @@ class Concurrency:
     managed_actors = None
     registered = None
     actor_class = Actor
+    _periodic_due = None
 
     @classmethod
     def make(cls, kind, cfg, name, aid, **kw):
@@ -163,6 +166,8 @@ class Concurrency:
             actor.bind_event('start', self.periodic_task)
             actor.bind_event('start', self._acknowledge_start)
             actor.fire_event('start')
+            if actor.peers:
+                ensure_future(actor.peers.start_serving(), loop=actor._loop)
         except Exception as exc:
             actor.stop(exc)
 
@@ -174,6 +179,7 @@ class Concurrency:
     def create_mailbox(self, actor, loop):
         '''Create the mailbox for ``actor``.'''
         client = MailboxClient(actor.monitor.address, actor, loop)
+        actor.peers = PeerMailboxes(actor, loop)
         loop.call_soon_threadsafe(self.hand_shake, actor)
         return client
 
@@ -186,7 +192,10 @@ class Concurrency:
         back with the acknowledgement from the monitor.
         '''
         actor.next_periodic_task = None
+        loop = actor._loop
         ack = None
+        if self._periodic_due:
+            actor.loop_lag = max(loop.time() - self._periodic_due, 0)
         if actor.is_running():
             if actor.cfg.debug:
                 actor.logger.debug('notify monitor')
@@ -197,8 +206,10 @@ class Concurrency:
             next = max(ACTOR_TIMEOUT_TOLE*actor.cfg.timeout, MIN_NOTIFY)
         else:
             next = 0
-        actor.next_periodic_task = actor._loop.call_later(
-            min(next, MAX_NOTIFY), self.periodic_task, actor)
+        next = min(next, MAX_NOTIFY)
+        self._periodic_due = loop.time() + next
+        actor.next_periodic_task = loop.call_later(
+            next, self.periodic_task, actor)
         return ack
 
     def stop(self, actor, exc=None, exit_code=None):
@@ -251,6 +262,8 @@ class Concurrency:
             self._remove_signals(actor)
             return True
         #
+        if actor.peers:
+            actor.peers.close()
         if actor._loop.is_running():
             actor.logger.debug('Closing mailbox')
             actor.mailbox.close()
@@ -387,13 +400,17 @@ class MonitorMixin:
         """Maintain the number of workers by spawning or killing as required
         """
         if monitor.cfg.workers:
-            num_to_kill = len(self.managed_actors) - monitor.cfg.workers
+            # actors already stopping, or retiring, are not counted
+            workers = [w for w in self.managed_actors.values()
+                       if not w.stopping_start]
+            num_to_kill = len(workers) - monitor.cfg.workers
             for i in range(num_to_kill, 0, -1):
                 w, kage = 0, sys.maxsize
-                for worker in self.managed_actors.values():
+                for worker in workers:
                     age = worker.impl.age
                     if age < kage:
                         w, kage = worker, age
+                workers.remove(w)
                 self.manage_actor(monitor, w, True)
 
     def _close_actors(self, monitor):
@@ -447,6 +464,8 @@ class MonitorConcurrency(MonitorMixin, Concurrency):
     Monitors live in the **main thread** of the master process and
     therefore do not require to be spawned.
     '''
+    autoscaler = None
+
     def is_monitor(self):
         return True
 
@@ -474,6 +493,7 @@ class MonitorConcurrency(MonitorMixin, Concurrency):
             self.manage_actors(monitor)
             #
             if monitor.is_running():
+                self.autoscale(monitor)
                 self.spawn_actors(monitor)
                 self.stop_actors(monitor)
             elif monitor.cfg.debug:
@@ -485,6 +505,25 @@ class MonitorConcurrency(MonitorMixin, Concurrency):
             monitor.next_periodic_task = monitor._loop.call_later(
                 interval, self.periodic_task, monitor)
 
+    def autoscale(self, monitor):
+        '''Adjust the number of workers to their load with an
+        :class:`.AutoScaler` when the ``max_workers`` setting is positive.
+        '''
+        cfg = monitor.cfg
+        if cfg.max_workers and cfg.workers:
+            if self.autoscaler is None:
+                period = max(ACTOR_TIMEOUT_TOLE*cfg.timeout, MIN_NOTIFY)
+                self.autoscaler = AutoScaler(cfg.min_workers, cfg.max_workers,
+                                             cfg.autoscale_cooldown,
+                                             min(period, MAX_NOTIFY))
+            self.autoscaler(monitor, list(self.managed_actors.values()))
+
+    def _info_monitor(self, actor, info=None):
+        info = super()._info_monitor(actor, info)
+        if info and self.autoscaler:
+            info['autoscale'] = self.autoscaler.info()
+        return info
+
     def _stop_actor(self, actor, finished=False):
         # remove all workers from this monitor
         if finished:
@@ -564,7 +603,7 @@ class ArbiterConcurrency(MonitorMixin, ProcessMixin, Concurrency):
         '''Override :meth:`.Concurrency.create_mailbox` to create the
         mailbox server.
         '''
-        mailbox = TcpServer(MailboxProtocol, loop, ('127.0.0.1', 0),
+        mailbox = TcpServer(MailboxProtocol, loop, mailbox_address(actor),
                             name='mailbox')
         # when the mailbox stop, close the event loop too
         mailbox.bind_event('stop', lambda _, **kw: loop.stop())
@@ -19,6 +19,7 @@ class AbortEvent(Exception):
 class AbstractEvent(AsyncObject):
     """Abstract event handler
     """
+    __slots__ = ()
     _handlers = None
     _fired = 0
 
@@ -60,23 +61,53 @@ class AbstractEvent(AsyncObject):
 
 class Event(AbstractEvent):
     '''The default implementation of :class:`AbstractEvent`.
+
+    Handlers are stored in a tuple rebuilt when binding or removing
+    callbacks, so that firing an event without handlers costs only
+    a truth test.
     '''
+    __slots__ = ('_loop', '_name', '_handlers', '_fired')
+
     def __init__(self, loop=None, name=None):
         self._loop = loop
         self._name = name or self.__class__.__name__.lower()
+        self._handlers = ()
+        self._fired = 0
 
     def __repr__(self):
-        return '%s: %s' % (self._name, self._handlers)
+        return '%s: %s' % (self._name, list(self._handlers))
     __str__ = __repr__
 
+    @property
+    def handlers(self):
+        '''Tuple of bound callbacks, use :meth:`bind` to add one
+        '''
+        return self._handlers
+
+    def bind(self, callback):
+        '''Bind a ``callback`` to this event.
+        '''
+        if callback not in self._handlers:
+            self._handlers += (callback,)
+
+    def remove_callback(self, callback):
+        '''Remove a callback from the list
+        '''
+        handlers = tuple((f for f in self._handlers if f != callback))
+        removed_count = len(self._handlers) - len(handlers)
+        self._handlers = handlers
+        return removed_count
+
+    def clear(self):
+        self._handlers = ()
+
     def fire(self, arg, **kwargs):
-        self._fired += self._fired + 1
-        if self._handlers:
-            for hnd in self._handlers:
-                try:
-                    hnd(arg, **kwargs)
-                except Exception:
-                    self.logger.exception('Exception while firing %s', self)
+        self._fired += 1
+        for hnd in self._handlers:
+            try:
+                hnd(arg, **kwargs)
+            except Exception:
+                self.logger.exception('Exception while firing %s', self)
 
 
 class OneTime(Future, AbstractEvent):
@@ -217,7 +248,7 @@ class EventHandler(AsyncObject):
         :return: nothing.
         '''
         if name not in self._events:
-            self._events[name] = Event()
+            self._events[name] = Event(loop=self._loop, name=name)
         event = self._events[name]
         event.bind(callback)
 
@@ -273,6 +273,7 @@ class AsyncObject:
 
         Optional logger instance, used by the :attr:`logger` attribute
     '''
+    __slots__ = ()
     _logger = None
     _loop = None
 
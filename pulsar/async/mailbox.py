@@ -18,15 +18,25 @@ The implementation details are outlined below:
           result = await send('abc', 'ping')
 
 * The :class:`.Arbiter` :attr:`~pulsar.Actor.mailbox` is a :class:`.TcpServer`
-  accepting connections from remote actors.
+  accepting connections from remote actors. It listens on a unix domain
+  socket, or on loopback TCP when the
+  :ref:`tcp_mailbox <setting-tcp_mailbox>` setting is on.
 * The :attr:`.Actor.mailbox` is a :class:`.MailboxClient` of the arbiter
   mailbox server.
-* When an actor sends a message to another actor, the arbiter mailbox behaves
+* Each actor runs a :class:`.PeerMailboxes` server, its address is sent to
+  the arbiter with the actor :meth:`~.Actor.info`.
+* When an actor sends a message to another actor, it asks the arbiter, once,
+  the address of the target peer mailbox and sends the message directly
+  to it. The connection is cached by actor id.
+* If the peer address is not known, the arbiter mailbox behaves
   as a proxy server by routing the message to the targeted actor.
 * Communication is bidirectional and there is **only one connection** between
   the arbiter and any given actor.
-* Messages are encoded and decoded using the unmasked websocket protocol
-  implemented in :func:`.frame_parser`.
+* Messages are compact tuples pickled with the highest pickle protocol.
+  Command names are sent once per connection and then referred to by id.
+  Each message is a frame of the unmasked websocket protocol implemented
+  in :func:`.frame_parser`, frames written during the same loop iteration
+  are sent together.
 * If, for some reasons, the connection between an actor and the arbiter
   get broken, the actor will eventually stop running and garbaged collected.
 
@@ -49,10 +59,22 @@ Client
   :members:
   :member-order: bysource
 
+Peers
+~~~~~~~~~~~~
+
+.. autoclass:: PeerMailboxes
+  :members:
+  :member-order: bysource
+
 '''
+import os
 import socket
 import pickle
+import tempfile
 from collections import namedtuple
+from functools import partial
+from itertools import count
+from struct import Struct, pack, unpack_from
 
 from pulsar import ProtocolError, CommandError
 from pulsar.utils.internet import nice_address
@@ -62,17 +84,36 @@ from pulsar.utils.string import gen_unique_id
 from .access import get_actor, isawaitable, create_future, ensure_future
 from .futures import task
 from .proxy import actor_identity, get_proxy, get_command, ActorProxy
-from .protocols import Protocol
+from .protocols import Protocol, TcpServer
 from .clients import AbstractClient
 
 
 CommandRequest = namedtuple('CommandRequest', 'actor caller connection')
 
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+# out-of-band buffers are available from pickle protocol 5
+OUT_OF_BAND = PICKLE_PROTOCOL >= 5
+# number of out-of-band buffers in a frame
+HEADER = Struct('!H')
+CALLBACK = 0
+
 
 def create_aid():
     return gen_unique_id()[:8]
 
 
+def mailbox_address(actor):
+    '''Address of a mailbox server for ``actor``
+
+    A unix domain socket path unless not available or the
+    :ref:`tcp_mailbox <setting-tcp_mailbox>` setting is on.
+    '''
+    if hasattr(socket, 'AF_UNIX') and not actor.cfg.tcp_mailbox:
+        name = 'pulsar-%s-%s.sock' % (os.getpid(), actor.aid)
+        return os.path.join(tempfile.gettempdir(), name)
+    return ('127.0.0.1', 0)
+
+
 async def command_in_context(command, caller, target, args, kwargs,
                              connection=None):
     cmnd = get_command(command)
@@ -114,45 +155,58 @@ class ProxyMailbox:
 
 class Message:
     '''A message which travels from actor to actor.
+
+    On the wire a message is a tuple, the command id and the
+    ``ack`` id followed by the message ``data``.
     '''
-    def __init__(self, data, waiter=None):
+    __slots__ = ('name', 'data', 'waiter')
+
+    def __init__(self, name, data, waiter=None):
+        self.name = name
         self.data = data
         self.waiter = waiter
 
     def __repr__(self):
-        return self.data.get('command', 'unknown')
+        return self.name or 'callback'
     __str__ = __repr__
 
     @classmethod
     def command(cls, command, sender, target, args, kwargs):
         command = get_command(command)
-        data = {'command': command.__name__,
-                'sender': actor_identity(sender),
-                'target': actor_identity(target),
-                'args': args if args is not None else (),
-                'kwargs': kwargs if kwargs is not None else {}}
+        data = (actor_identity(sender),
+                actor_identity(target),
+                args if args is not None else (),
+                kwargs if kwargs is not None else {})
         waiter = create_future()
-        if command.ack:
-            data['ack'] = create_aid()
-        else:
+        if not command.ack:
             waiter.set_result(None)
-        return cls(data, waiter)
+        return cls(command.__name__, data, waiter)
 
     @classmethod
     def callback(cls, result, ack):
-        data = {'command': 'callback', 'result': result, 'ack': ack}
-        return cls(data)
+        return cls(None, (ack, result))
 
 
 class MailboxProtocol(Protocol):
     '''The :class:`.Protocol` for internal message passing between actors.
 
-    Encoding and decoding uses the unmasked websocket protocol.
+    Encoding and decoding uses the unmasked websocket protocol. Messages
+    are pickled, with the highest pickle protocol, into one frame each and
+    the frames of a loop iteration are sent in one write. When available
+    (pickle protocol 5), :class:`pickle.PickleBuffer` larger than
+    :attr:`out_of_band_size` are sent out-of-band, after the pickle data.
     '''
+    out_of_band_size = 65536
+
     def __init__(self, **kw):
         super().__init__(**kw)
         self._pending_responses = {}
         self._parser = frame_parser(kind=2, pyparser=True)
+        self._acks = count(1)
+        # command names are sent once per connection, then by id
+        self._command_ids = {}
+        self._commands = {}
+        self._outgoing = None
         actor = get_actor()
         if actor.is_arbiter():
             self.bind_event('connection_lost', self._connection_lost)
@@ -168,23 +222,24 @@ class MailboxProtocol(Protocol):
         msg = self._parser.decode(data)
         while msg:
             try:
-                message = pickle.loads(msg.body)
+                message = self._decode(msg.body)
             except Exception as e:
                 raise ProtocolError('Could not decode message body: %s' % e)
-            ensure_future(self._on_message(message), loop=self._loop)
+            self._on_message(message)
             msg = self._parser.decode()
 
     ########################################################################
     #    INTERNALS
     def _start(self, req):
-        if req.waiter and 'ack' in req.data:
-            self._pending_responses[req.data['ack']] = req.waiter
-            try:
-                self._write(req)
-            except Exception as exc:
-                req.waiter.set_exception(exc)
+        if req.waiter and not req.waiter.done():
+            ack = next(self._acks)
+            self._pending_responses[ack] = req.waiter
         else:
-            self._write(req)
+            ack = None
+        if self._outgoing is None:
+            self._outgoing = []
+            self._loop.call_soon(self._flush)
+        self._outgoing.append((req, ack))
 
     def _connection_lost(self, _, exc=None):
         if exc:
@@ -192,60 +247,146 @@ class MailboxProtocol(Protocol):
             if actor.is_running():
                 actor.logger.warning('Connection lost with actor')
 
-    async def _on_message(self, message):
-        actor = get_actor()
-        command = message.get('command')
-        ack = message.get('ack')
-        if command == 'callback':
-            if not ack:
-                raise ProtocolError('A callback without id')
-            try:
-                pending = self._pending_responses.pop(ack)
-            except KeyError:
-                raise KeyError('Callback %s not in pending callbacks' % ack)
-            pending.set_result(message.get('result'))
+    def _on_message(self, message):
+        # runs in data_received, errors must not drop the other frames
+        cid = message[0]
+        if cid == CALLBACK:
+            ack = message[1]
+            pending = self._pending_responses.pop(ack, None)
+            if pending is None:
+                self.logger.error('Callback %s not in pending callbacks',
+                                  ack)
+            elif not pending.done():
+                # a cancelled or timed out request is done already
+                pending.set_result(message[2])
         else:
+            if isinstance(cid, tuple):
+                cid, command = cid
+                self._commands[cid] = command
+            else:
+                command = self._commands.get(cid)
+                if command is None:
+                    self.logger.error('Unknown command id %s', cid)
+                    return
+            ensure_future(self._on_command(command, *message[1:]),
+                          loop=self._loop)
+
+    async def _on_command(self, command, ack, sender, target, args, kwargs):
+        actor = get_actor()
+        try:
+            target_actor = actor.get_actor(target)
+            if target_actor is None:
+                raise CommandError('cannot execute "%s", unknown actor '
+                                   '"%s"' % (command, target))
+            # Get the caller proxy without throwing
+            caller = get_proxy(actor.get_actor(sender), safe=True)
+            if isinstance(target_actor, ActorProxy):
+                # route the message to the actor proxy
+                if caller is None:
+                    raise CommandError(
+                        "'%s' got message from unknown '%s'"
+                        % (actor, sender))
+                result = await actor.send(target_actor, command, *args,
+                                          **kwargs)
+            else:
+                result = await command_in_context(command, caller,
+                                                  target_actor, args, kwargs,
+                                                  self)
+        except CommandError as exc:
+            self.logger.warning('Command error: %s' % exc)
+            result = None
+        except Exception as exc:
+            self.logger.exception('Unhandled exception')
+            result = None
+        if ack:
+            self._start(Message.callback(result, ack))
+
+    def _flush(self):
+        messages, self._outgoing = self._outgoing, None
+        frames = []
+        sent = []
+        for message in messages:
             try:
-                target = actor.get_actor(message['target'])
-                if target is None:
-                    raise CommandError('cannot execute "%s", unknown actor '
-                                       '"%s"' % (command, message['target']))
-                # Get the caller proxy without throwing
-                caller = get_proxy(actor.get_actor(message['sender']),
-                                   safe=True)
-                if isinstance(target, ActorProxy):
-                    # route the message to the actor proxy
-                    if caller is None:
-                        raise CommandError(
-                            "'%s' got message from unknown '%s'"
-                            % (actor, message['sender']))
-                    result = await actor.send(target, command,
-                                              *message['args'],
-                                              **message['kwargs'])
-                else:
-                    result = await command_in_context(command, caller, target,
-                                                      message['args'],
-                                                      message['kwargs'],
-                                                      self)
-            except CommandError as exc:
-                self.logger.warning('Command error: %s' % exc)
-                result = None
+                frames.append(self._frame(*message))
             except Exception as exc:
-                self.logger.exception('Unhandled exception')
-                result = None
-            if ack:
-                self._start(Message.callback(result, ack))
-
-    def _write(self, req):
-        obj = pickle.dumps(req.data, protocol=2)
-        data = self._parser.encode(obj, opcode=2)
+                # only this message fails, others are still sent
+                self._failed((message,), exc)
+            else:
+                sent.append(message)
+        if not frames:
+            return
         try:
-            self._transport.write(data)
-        except (socket.error, RuntimeError):
+            self._transport.write(b''.join(frames))
+        except (socket.error, RuntimeError) as exc:
+            self._failed(sent, exc)
             actor = get_actor()
-            if actor.is_running() and not actor.is_arbiter():
+            # only the connection with the arbiter keeps the actor alive
+            if (actor.is_running() and not actor.is_arbiter() and
+                    self._producer is actor.mailbox):
                 actor.logger.warning('Lost connection with arbiter')
                 actor._loop.stop()
+        except Exception as exc:
+            self._failed(sent, exc)
+
+    def _frame(self, req, ack):
+        if req.name is None:
+            try:
+                data = self._encode((CALLBACK,) + req.data)
+            except Exception:
+                self.logger.exception('Could not encode result of %s',
+                                      req.data[0])
+                # the sender still gets a response
+                data = self._encode((CALLBACK, req.data[0], None))
+        else:
+            cid = self._command_ids.get(req.name)
+            if cid is None:
+                # the name is sent with the id the first time
+                cid = len(self._command_ids) + 1
+                data = self._encode(((cid, req.name), ack) + req.data)
+                self._command_ids[req.name] = cid
+            else:
+                data = self._encode((cid, ack) + req.data)
+        return self._parser.encode(data, opcode=2)
+
+    def _failed(self, messages, exc):
+        for req, ack in messages:
+            waiter = self._pending_responses.pop(ack, None)
+            if waiter and not waiter.done():
+                waiter.set_exception(exc)
+            elif req.name:
+                self.logger.error('Could not send %s: %s', req, exc)
+
+    def _encode(self, envelope):
+        buffers = []
+        if OUT_OF_BAND:
+            data = pickle.dumps(envelope, PICKLE_PROTOCOL,
+                                buffer_callback=partial(self._out_of_band,
+                                                        buffers))
+        else:
+            data = pickle.dumps(envelope, PICKLE_PROTOCOL)
+        sizes = [len(b) for b in buffers]
+        header = HEADER.pack(len(sizes)) + pack('!%dQ' % len(sizes), *sizes)
+        return b''.join([header, data] + buffers)
+
+    def _out_of_band(self, buffers, buffer):
+        raw = buffer.raw()
+        if raw.nbytes < self.out_of_band_size:
+            return True
+        buffers.append(raw)
+
+    def _decode(self, body):
+        body = memoryview(body)
+        n = HEADER.unpack_from(body)[0]
+        start = HEADER.size + 8*n
+        sizes = unpack_from('!%dQ' % n, body, HEADER.size)
+        if sizes:
+            end = len(body) - sum(sizes)
+            buffers = []
+            for size in sizes:
+                buffers.append(body[end:end+size])
+                end += size
+            return pickle.loads(body[start:], buffers=buffers)
+        return pickle.loads(body[start:])
 
 
 class MailboxClient(AbstractClient):
@@ -287,3 +428,149 @@ class MailboxClient(AbstractClient):
         # When the connection is lost, stop the event loop
         if self._loop.is_running():
             self._loop.stop()
+
+
+class PeerMailboxClient(MailboxClient):
+    '''A :class:`.MailboxClient` connected directly to another actor
+    '''
+    def __init__(self, address, actor, loop, aid, peers):
+        super().__init__(address, actor, loop)
+        self.name = 'Peer mailbox for %s' % aid
+        self.aid = aid
+        self._peers = peers
+        self._opening = None
+
+    def open(self):
+        '''Connect to the peer, concurrent calls share the connection
+        '''
+        if self._opening is None:
+            self._opening = ensure_future(self._open(), loop=self._loop)
+        return self._opening
+
+    async def _open(self):
+        self._connection = await self.connect()
+        self._connection.bind_event('connection_lost', self._lost)
+        return self
+
+    def _lost(self, connection, exc=None):
+        # The peer has gone, next messages go via the arbiter
+        self._peers.discard(self)
+        error = CommandError('connection with %s lost' % self.aid)
+        pending = connection._pending_responses
+        while pending:
+            _, waiter = pending.popitem()
+            if not waiter.done():
+                waiter.set_exception(error)
+
+
+class PeerMailboxes:
+    '''Direct mailbox connections between actors.
+
+    The :attr:`server` accepts connections from other actors while
+    :meth:`request` sends messages to other actors without passing
+    through the arbiter.
+    '''
+    unknown_timeout = 1
+    '''Seconds during which messages to an actor whose address is not
+    known by the arbiter go via the arbiter without a new lookup'''
+
+    def __init__(self, actor, loop):
+        self.actor = actor
+        self.server = TcpServer(MailboxProtocol, loop,
+                                mailbox_address(actor), name='peer mailbox')
+        self._loop = loop
+        self._clients = {}
+        self._lookups = {}
+        self._unknown = {}
+
+    def __repr__(self):
+        return 'Peer mailboxes for %s' % self.actor
+    __str__ = __repr__
+
+    @property
+    def address(self):
+        '''Address of the :attr:`server`
+        '''
+        return self.server.address
+
+    async def start_serving(self):
+        await self.server.start_serving()
+        actor = self.actor
+        # let the monitor know the address as soon as possible
+        if actor.is_running():
+            actor.send('monitor', 'notify', actor.info())
+
+    @task
+    async def request(self, command, sender, target, args, kwargs):
+        aid = actor_identity(target)
+        mailbox = self._clients.get(aid, False)
+        if mailbox is False:
+            if self._unknown.get(aid, 0) > self._loop.time():
+                mailbox = None
+            else:
+                mailbox = await self._lookup(aid)
+        if mailbox is not None:
+            try:
+                await mailbox.open()
+            except OSError:
+                self.discard(mailbox)
+                mailbox = None
+        if mailbox is None:
+            mailbox = self.actor.mailbox
+        result = await mailbox.request(command, sender, target, args, kwargs)
+        return result
+
+    def discard(self, mailbox):
+        '''Remove a peer ``mailbox`` from the cache
+        '''
+        if self._clients.get(mailbox.aid) is mailbox:
+            self._clients.pop(mailbox.aid)
+
+    def close(self):
+        address = self.address
+        if isinstance(address, str):
+            # don't wait for the server to close to remove the socket file,
+            # the event loop may not run again
+            try:
+                os.remove(address)
+            except OSError:
+                pass
+        clients = tuple(self._clients.values())
+        self._clients.clear()
+        if self._loop.is_running():
+            for mailbox in clients:
+                if mailbox:
+                    mailbox.close()
+            return self._loop.create_task(self.server.close())
+
+    #    INTERNALS
+    def _lookup(self, aid):
+        # one lookup for concurrent requests to the same actor
+        lookup = self._lookups.get(aid)
+        if lookup is None:
+            lookup = self._loop.create_task(self._peer_address(aid))
+            self._lookups[aid] = lookup
+        return lookup
+
+    async def _peer_address(self, aid):
+        actor = self.actor
+        try:
+            address = await actor.mailbox.request('peer_address', actor,
+                                                  'arbiter', (aid,), {})
+        finally:
+            self._lookups.pop(aid, None)
+        if address is False:
+            # not known yet, don't ask again for a while
+            now = self._loop.time()
+            self._unknown = dict(((a, t) for a, t in self._unknown.items()
+                                  if t > now))
+            self._unknown[aid] = now + self.unknown_timeout
+            return
+        self._unknown.pop(aid, None)
+        if address:
+            mailbox = PeerMailboxClient(address, actor, self._loop, aid,
+                                        self)
+        else:
+            mailbox = None
+        self._clients[aid] = mailbox
+        return mailbox
@@ -1,3 +1,5 @@
+import math
+
 from .access import create_future
 
 
@@ -6,6 +8,12 @@ class FlowControl:
 
     This implements the protocol methods :meth:`pause_writing`,
     :meth:`resume_writing`.
+
+    The ``low_limit`` and ``high_limit`` are the watermarks of the
+    transport write buffer. Writing is paused once the buffer is over the
+    high watermark and resumed once it drains below the low one,
+    producers of large or unbounded output must :meth:`drain` between
+    writes so that the buffer stays bounded.
     """
     _paused = False
     _write_waiter = None
@@ -15,7 +23,24 @@ class FlowControl:
         self._high_limit = high_limit
         self.bind_event('connection_made', self._set_flow_limits)
         self.bind_event('connection_lost', self._wakeup_waiter)
-        self.bind_event('after_write', self._make_write_waiter)
+
+    @property
+    def writing_paused(self):
+        '''``True`` when writing is paused, see :meth:`drain`
+        '''
+        return self._paused
+
+    async def drain(self):
+        '''Wait until the write buffer drains below the low watermark
+
+        Return straight away when writing is not paused, raise
+        :class:`ConnectionResetError` if the connection is lost.
+        '''
+        waiter = self._write_waiter
+        if waiter is not None:
+            await waiter
+            if self.closed:
+                raise ConnectionResetError('Connection lost')
 
     def pause_writing(self):
         '''Called by the transport when the buffer goes over the
@@ -26,6 +51,10 @@ class FlowControl:
         '''
         assert not self._paused
         self._paused = True
+        waiter = self._write_waiter
+        assert waiter is None or waiter.cancelled()
+        self.logger.debug('Waiting for write buffer to drain')
+        self._write_waiter = create_future(self._loop)
         self._transport.pause_reading()
 
     def resume_writing(self, exc=None):
@@ -58,21 +87,17 @@ class FlowControl:
             return
         self.resume_writing(exc=exc)
 
-    def _make_write_waiter(self, _, exc=None):
-        # callback for the after_write event
-        if self._paused:
-            waiter = self._write_waiter
-            assert waiter is None or waiter.cancelled()
-            waiter = create_future(self._loop)
-            self.logger.debug('Waiting for write buffer to drain')
-            self._write_waiter = waiter
-
 
 class Timeout:
     '''Adds a timeout for idle connections to protocols
+
+    Writes and received data only record the time of the last activity,
+    idle protocols are closed in batches by the :class:`.TimerWheel` of
+    the event loop.
     '''
     _timeout = None
-    _timeout_handler = None
+    _timeout_slot = None
+    _last_activity = 0
 
     @property
     def timeout(self):
@@ -85,10 +110,6 @@ class Timeout:
         if self._timeout is None:
             self.bind_event('connection_made', self._add_timeout)
             self.bind_event('connection_lost', self._cancel_timeout)
-            self.bind_event('before_write', self._cancel_timeout)
-            self.bind_event('after_write', self._add_timeout)
-            self.bind_event('data_received', self._cancel_timeout)
-            self.bind_event('data_processed', self._add_timeout)
         self._timeout = timeout or 0
         self._add_timeout(None)
 
@@ -98,13 +119,102 @@ class Timeout:
         self.logger.debug('Closed idle %s.', self)
 
     def _add_timeout(self, _, exc=None, **kw):
-        if not self.closed:
+        if not self.closed and self._timeout and not exc:
+            self._last_activity = self._loop.time()
+            timer_wheel(self._loop).add(self)
+        else:
             self._cancel_timeout(_, exc=exc)
-            if self._timeout and not exc:
-                self._timeout_handler = self._loop.call_later(self._timeout,
-                                                              self._timed_out)
 
     def _cancel_timeout(self, _, exc=None, **kw):
-        if self._timeout_handler:
-            self._timeout_handler.cancel()
-            self._timeout_handler = None
+        if self._timeout_slot is not None:
+            timer_wheel(self._loop).discard(self)
+
+
+class TimerWheel:
+    '''A coarse timer for the idle :class:`.Timeout` of protocols
+
+    There is one wheel per event loop, obtained via :func:`timer_wheel`.
+    Protocols are stored in the slot of their deadline, with a
+    granularity of :attr:`resolution` seconds, and a single timer visits
+    the slots. Protocols idle for longer than their timeout are closed,
+    the others move to the slot of their new deadline.
+
+    .. attribute:: resolution
+
+        Seconds between two visits of the wheel
+    '''
+    def __init__(self, loop, resolution=1, size=64):
+        self._loop = loop
+        self.resolution = resolution
+        self._slots = [set() for _ in range(size)]
+        self._tick = 0
+        self._count = 0
+        self._handle = None
+
+    def __repr__(self):
+        return 'TimerWheel(%s)' % self._count
+    __str__ = __repr__
+
+    def __len__(self):
+        return self._count
+
+    def add(self, protocol):
+        '''Add ``protocol`` to the slot of its deadline
+        '''
+        self.discard(protocol)
+        slots = self._slots
+        if not self._count:
+            self._tick = int(self._loop.time() / self.resolution) + 1
+        deadline = protocol._last_activity + protocol._timeout
+        tick = max(math.ceil(deadline / self.resolution), self._tick)
+        slot = slots[min(tick, self._tick + len(slots) - 1) % len(slots)]
+        slot.add(protocol)
+        protocol._timeout_slot = slot
+        self._count += 1
+        if self._handle is None:
+            self._handle = self._loop.call_at(self._tick * self.resolution,
+                                              self._run)
+
+    def discard(self, protocol):
+        '''Remove ``protocol`` from the wheel
+        '''
+        slot = protocol._timeout_slot
+        if slot is not None:
+            protocol._timeout_slot = None
+            slot.discard(protocol)
+            self._count -= 1
+
+    def _run(self):
+        self._handle = None
+        now = self._loop.time()
+        current = int(now / self.resolution)
+        slots = self._slots
+        size = len(slots)
+        start = self._tick
+        self._tick = max(current + 1, start)
+        for tick in range(start, start + min(current - start + 1, size)):
+            slot = slots[tick % size]
+            if not slot:
+                continue
+            slots[tick % size] = set()
+            self._count -= len(slot)
+            for protocol in slot:
+                protocol._timeout_slot = None
+            for protocol in slot:
+                if protocol.closed or not protocol._timeout:
+                    continue
+                elif now - protocol._last_activity >= protocol._timeout:
+                    protocol._timed_out()
+                else:
+                    self.add(protocol)
+        if self._count and self._handle is None:
+            self._handle = self._loop.call_at(self._tick * self.resolution,
+                                              self._run)
+
+
+def timer_wheel(loop):
+    '''The :class:`.TimerWheel` of event ``loop``
+    '''
+    if not hasattr(loop, '_timer_wheel'):
+        loop._timer_wheel = TimerWheel(loop)
+    return loop._timer_wheel
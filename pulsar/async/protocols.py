@@ -1,3 +1,4 @@
+import os
 import asyncio
 
 from pulsar.utils.internet import nice_address, format_address
@@ -209,6 +210,16 @@ class ProtocolConsumer(EventHandler):
         else:
             raise RuntimeError('No connection')
 
+    def drain(self):
+        """Wait for the write buffer of the underlying :class:`.Connection`
+        to drain, see :meth:`~.FlowControl.drain`
+        """
+        c = self._connection
+        if c:
+            return c.drain()
+        else:
+            raise RuntimeError('No connection')
+
     async def _start(self):
         try:
             await self.fire_event('pre_request')
@@ -228,9 +239,12 @@ class ProtocolConsumer(EventHandler):
         if not hasattr(self, '_request'):
             self.start()
         self._data_received_count += 1
-        self.fire_event('data_received', data=data)
+        events = self._events
+        if events['data_received']._handlers:
+            events['data_received'].fire(self, data=data)
         result = self.data_received(data)
-        self.fire_event('data_processed', data=data)
+        if events['data_processed']._handlers:
+            events['data_processed'].fire(self, data=data)
         return result
 
     def _finished(self, _, exc=None):
@@ -273,6 +287,11 @@ class PulsarProtocol(EventHandler, FlowControl):
         self._logger = logger
         self._session = session
         self._producer = producer
+        # events fired on the hot path, only when they have handlers
+        self._before_write = self._events['before_write']
+        self._after_write = self._events['after_write']
+        self._data_received_event = self._events['data_received']
+        self._data_processed_event = self._events['data_processed']
 
     def __repr__(self):
         address = self._address
@@ -400,33 +419,103 @@ class PulsarProtocol(EventHandler, FlowControl):
 
 class Protocol(PulsarProtocol, asyncio.Protocol):
     """An :class:`asyncio.Protocol` with :ref:`events <event-handling>`
+
+    The ``before_write`` and ``after_write`` events are fired only when
+    they have handlers, an unbound event costs a truth test.
+    Small writes can be coalesced into a single transport write via
+    :meth:`cork`.
     """
     _data_received_count = 0
+    _last_activity = 0
+    _timeout = None
+    _cork_size = 0
+    _corked = None
+    _corked_bytes = 0
 
     def write(self, data):
         """Write ``data`` into the wire.
 
         Returns an empty tuple or a :class:`~asyncio.Future` if this
-        protocol has paused writing.
+        protocol has paused writing, producers should await
+        :meth:`~.FlowControl.drain` when :attr:`~.FlowControl.writing_paused`
+        is ``True``.
         """
         t = self._transport
         if t:
-            if self._paused:
-                # # Uses private variable once again!
-                # This occurs when the protocol is paused from writing
-                # but another data ready callback is fired in the same
-                # event-loop frame
-                self.logger.debug('protocol cannot write, add data to the '
-                                  'transport buffer')
-                t._buffer.extend(data)
+            if self._timeout:
+                self._last_activity = self._loop.time()
+            if self._before_write._handlers:
+                self._before_write.fire(self)
+            if self._cork_size:
+                self._cork(data)
             else:
-                self.fire_event('before_write')
                 t.write(data)
-                self.fire_event('after_write')
+            if self._after_write._handlers:
+                self._after_write.fire(self)
             return self._write_waiter or ()
         else:
             raise ConnectionResetError('No Transport')
 
+    @property
+    def write_buffer_size(self):
+        """Number of bytes waiting to be written into the wire.
+        """
+        size = self._corked_bytes
+        if self._transport:
+            size += self._transport.get_write_buffer_size()
+        return size
+
+    def cork(self, size=65536):
+        """Coalesce writes into a single transport write.
+
+        Data passed to :meth:`write` is buffered and written, via
+        ``writelines``, once per event loop iteration or as soon as
+        ``size`` bytes are buffered. While writing is paused the buffer
+        is held until :meth:`resume_writing` but never exceeds ``size``:
+        once full it is passed to the transport, where it counts against
+        the high-water mark, so that producers awaiting
+        :meth:`~.FlowControl.drain` are held back.
+        """
+        self._cork_size = max(size, 1)
+
+    def uncork(self):
+        """Write buffered data and stop coalescing writes.
+        """
+        self._cork_size = 0
+        self._flush_corked()
+
+    def resume_writing(self, exc=None):
+        super().resume_writing(exc=exc)
+        self._flush_corked()
+
+    def close(self):
+        self._flush_corked(True)
+        return super().close()
+
+    def abort(self):
+        self._corked = None
+        super().abort()
+
+    #    INTERNALS
+    def _cork(self, data):
+        corked = self._corked
+        if corked is None:
+            corked = self._corked = []
+            self._loop.call_soon(self._flush_corked)
+        corked.append(data)
+        self._corked_bytes += len(data)
+        if self._corked_bytes >= self._cork_size:
+            # written even when paused, the buffer does not grow unbounded
+            self._flush_corked(True)
+
+    def _flush_corked(self, force=False):
+        corked = self._corked
+        if corked and (force or not self._paused):
+            self._corked = None
+            self._corked_bytes = 0
+            if not self.closed:
+                self._transport.writelines(corked)
+
 
 class DatagramProtocol(PulsarProtocol, asyncio.DatagramProtocol):
     """An ``asyncio.DatagramProtocol`` with events`
@@ -477,18 +566,22 @@ class Connection(Protocol, Timeout):
     def data_received(self, data):
         """Delegates handling of data to the :meth:`current_consumer`.
 
-        Once done set a timeout for idle connections when a
+        Records the activity for idle connections when a
         :attr:`~Protocol.timeout` is a positive number (of seconds).
         """
         self._data_received_count = self._data_received_count + 1
-        self.fire_event('data_received', data=data)
+        if self._timeout:
+            self._last_activity = self._loop.time()
+        if self._data_received_event._handlers:
+            self._data_received_event.fire(self, data=data)
         toprocess = data
         while toprocess:
             consumer = self.current_consumer()
             toprocess = consumer._data_received(toprocess)
             if isinstance(toprocess, Future):
                 break
-        self.fire_event('data_processed', data=data)
+        if self._data_processed_event._handlers:
+            self._data_processed_event.fire(self, data=data)
 
     def upgrade(self, consumer_factory):
         """Upgrade the :func:`_consumer_factory` callable.
@@ -605,6 +698,9 @@ class Producer(EventHandler):
 class TcpServer(Producer):
     """A :class:`.Producer` of server :class:`Connection` for TCP servers.
 
+    The ``address`` is either a ``(host, port)`` tuple or, for unix
+    domain sockets, a file path.
+
     .. attribute:: _server
 
         A :class:`.Server` managed by this Tcp wrapper.
@@ -616,6 +712,7 @@ class TcpServer(Producer):
                          'connection_lost')
     _server = None
     _started = None
+    _unix_path = None
 
     def __init__(self, protocol_factory, loop, address=None,
                  name=None, sockets=None, max_requests=None,
@@ -640,8 +737,9 @@ class TcpServer(Producer):
 
         It is obtained from the first socket ``getsockname`` method.
         """
-        if self._server is not None:
-            return self._server.sockets[0].getsockname()
+        sockets = self.sockets
+        if sockets:
+            return sockets[0].getsockname()
 
     @property
     def addresses(self):
@@ -684,6 +782,11 @@ class TcpServer(Producer):
                                                  port=address[1],
                                                  backlog=backlog,
                                                  ssl=sslcontext)
+                elif isinstance(address, str):
+                    server = await self._loop.create_unix_server(
+                        self.create_protocol, path=address,
+                        backlog=backlog, ssl=sslcontext)
+                    self._unix_path = address
                 else:
                     raise NotImplementedError
             self._server = server
@@ -700,11 +803,38 @@ class TcpServer(Producer):
         if self._server:
             self._server.close()
             self._server = None
+            if self._unix_path:
+                # unix domain sockets leave a file behind
+                try:
+                    os.remove(self._unix_path)
+                except OSError:
+                    pass
+                self._unix_path = None
             coro = self._close_connections()
             if coro:
                 await coro
             self.fire_event('stop')
 
+    async def drain(self, timeout=None):
+        """Stop accepting connections and wait for the current requests.
+
+        Idle connections are closed as soon as they finish their request,
+        connections still busy after ``timeout`` seconds are left to
+        the :meth:`close` method.
+        """
+        if self._server:
+            # stop listening, connections are not affected
+            self._server.close()
+            loop = self._loop
+            end = loop.time() + timeout if timeout else None
+            while self._concurrent_connections:
+                for connection in tuple(self._concurrent_connections):
+                    if not getattr(connection, '_current_consumer', None):
+                        connection.close()
+                if end is not None and loop.time() >= end:
+                    break
+                await asyncio.sleep(0.1, loop=loop)
+
     def info(self):
         sockets = []
         up = int(self._loop.time() - self._started) if self._started else 0
@@ -712,13 +842,14 @@ class TcpServer(Producer):
                   'sockets': sockets,
                   'max_requests': self._max_requests,
                   'keep_alive': self._keep_alive}
+        in_flight = sum((1 for c in self._concurrent_connections
+                         if getattr(c, '_current_consumer', None)))
         clients = {'processed_clients': self._sessions,
                    'connected_clients': len(self._concurrent_connections),
+                   'in_flight_requests': in_flight,
                    'requests_processed': self._requests_processed}
-        if self._server:
-            for sock in self._server.sockets:
-                sockets.append({
-                    'address': format_address(sock.getsockname())})
+        for sock in self.sockets or ():
+            sockets.append({'address': format_address(sock.getsockname())})
         return {'server': server,
                 'clients': clients}
 
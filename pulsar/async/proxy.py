@@ -161,6 +161,7 @@ class ActorProxyMonitor(ActorProxy):
         self.callback = None
         self.spawning_start = None
         self.stopping_start = None
+        self.stopping_timeout = ACTOR_ACTION_TIMEOUT
         super().__init__(impl)
 
     @property
@@ -217,4 +218,4 @@ class ActorProxyMonitor(ActorProxy):
             return False
         else:
             dt = default_timer() - self.stopping_start
-            return dt if dt >= ACTOR_ACTION_TIMEOUT else False
+            return dt if dt >= self.stopping_timeout else False
@@ -0,0 +1,331 @@
+'''Shared memory channels for sending bulk data from one actor to another
+without passing through the :ref:`actor mailboxes <tutorials-messages>`.
+
+A :class:`.SharedChannel` is a single-producer, single-consumer ring
+buffer in shared memory. It is created by the producer actor with the
+:func:`.shared_channel` coroutine, giving the target actor and a
+``handler`` invoked, in the target actor, with every message::
+
+    from pulsar import shared_channel
+
+    def parsed(actor, data):
+        ...
+
+    async def fan_out(actor, target):
+        channel = await shared_channel(target, parsed, size=2**22)
+        await channel.put(b'...')
+        channel.close()
+
+The ``handler`` must be picklable, like the callables of the ``run``
+command. The ``data`` it receives is a :class:`memoryview` of the
+shared memory, no copy is made but the view is only valid during the
+call, use ``bytes(data)`` to keep it.
+
+The ring buffer is a memory mapped file, in ``/dev/shm`` when available,
+and the two actors wake each other up via named pipes registered with
+their event loops. All files are unlinked once both sides have opened
+them.
+
+.. autofunction:: shared_channel
+
+.. autoclass:: SharedChannel
+   :members:
+   :member-order: bysource
+'''
+import os
+import mmap
+import struct
+import tempfile
+
+from pulsar.utils.string import gen_unique_id
+
+from .access import get_actor, create_future
+from .actor import send
+
+
+__all__ = ['shared_channel', 'SharedChannel']
+
+
+# write and read positions, total number of bytes written and read
+POSITIONS = struct.Struct('=QQ')
+LENGTH = struct.Struct('=I')
+# start of the ring buffer data
+DATA = 64
+WRAP = 0xffffffff
+
+
+def shm_directory():
+    '''Directory for shared memory files'''
+    if os.path.isdir('/dev/shm'):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+def wake_up(fd):
+    try:
+        os.write(fd, b'\0')
+    except BlockingIOError:
+        # the pipe is full, a wake up is already pending
+        pass
+
+
+async def shared_channel(target, handler, size=2**20, loop=None):
+    '''Create a :class:`.SharedChannel` with the ``target`` actor
+
+    :param target: the actor receiving messages
+    :param handler: picklable callable invoked in the ``target`` actor
+        with the actor and a message
+    :param size: size in bytes of the ring buffer
+    :return: a :class:`.SharedChannel`
+    :raise RuntimeError: when the ``target`` could not open the channel
+    '''
+    loop = loop or get_actor()._loop
+    base = os.path.join(shm_directory(), 'pulsar-%s' % gen_unique_id()[:12])
+    files = [base + '.ring', base + '.data', base + '.space']
+    fds = []
+    buffer = None
+    try:
+        fd = os.open(files[0], os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            os.ftruncate(fd, DATA + size)
+            buffer = mmap.mmap(fd, DATA + size)
+        finally:
+            os.close(fd)
+        os.mkfifo(files[1], 0o600)
+        os.mkfifo(files[2], 0o600)
+        # a reader must exist before opening the write end of a pipe
+        # without blocking, hold one while opening the data pipe
+        reader = os.open(files[1], os.O_RDONLY | os.O_NONBLOCK)
+        fds.append(os.open(files[1], os.O_WRONLY | os.O_NONBLOCK))
+        os.close(reader)
+        fds.append(os.open(files[2], os.O_RDONLY | os.O_NONBLOCK))
+        opened = await send(target, 'shared_channel', base, size, handler)
+        if opened is not True:
+            # errors in the target are logged there, the result is None
+            raise RuntimeError('%s could not open the shared channel' %
+                               target)
+    except Exception:
+        for fd in fds:
+            os.close(fd)
+        if buffer is not None:
+            buffer.close()
+        raise
+    finally:
+        for path in files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return SharedChannel(target, buffer, size, fds[0], fds[1], loop)
+
+
+class Ring:
+    '''A ring buffer of length prefixed messages in a memory map
+    '''
+    def __init__(self, buffer, size):
+        self.buffer = buffer
+        self.size = size
+        self.view = memoryview(buffer)
+
+    def positions(self):
+        return POSITIONS.unpack_from(self.buffer)
+
+    def close(self):
+        self.view.release()
+        try:
+            self.buffer.close()
+        except BufferError:
+            # a consumer kept a view of the data
+            pass
+
+
+class SharedChannel:
+    '''The producer side of a channel created by :func:`.shared_channel`
+
+    .. attribute:: target
+
+        The actor receiving the messages
+    '''
+    def __init__(self, target, buffer, size, data_fd, space_fd, loop):
+        self.target = target
+        self._ring = Ring(buffer, size)
+        self._data_fd = data_fd
+        self._space_fd = space_fd
+        self._loop = loop
+        self._waiter = None
+        self._wake_up = False
+        loop.add_reader(space_fd, self._space)
+
+    def __repr__(self):
+        return 'SharedChannel(%s)' % self.target
+    __str__ = __repr__
+
+    @property
+    def size(self):
+        '''Size of the ring buffer in bytes'''
+        return self._ring.size
+
+    @property
+    def closed(self):
+        return self._data_fd is None
+
+    def available(self):
+        '''Number of free bytes in the ring buffer'''
+        write, read = self._ring.positions()
+        return self.size - write + read
+
+    def put_nowait(self, data):
+        '''Write ``data`` into the ring buffer
+
+        :return: ``True`` if the message was written, ``False`` if there
+            was not enough space for it.
+        '''
+        if self.closed:
+            raise RuntimeError('%s is closed' % self)
+        data = memoryview(data).cast('B')
+        ring = self._ring
+        size = ring.size
+        needed = LENGTH.size + len(data)
+        if needed > size:
+            raise ValueError('message of %d bytes too large for %s' %
+                             (len(data), self))
+        write, read = ring.positions()
+        offset = write % size
+        tail = size - offset
+        skip = tail if needed > tail else 0
+        if size - write + read < needed + skip:
+            return False
+        if skip:
+            if tail >= LENGTH.size:
+                LENGTH.pack_into(ring.buffer, DATA + offset, WRAP)
+            write += skip
+            offset = 0
+        start = DATA + offset + LENGTH.size
+        LENGTH.pack_into(ring.buffer, DATA + offset, len(data))
+        ring.view[start:start + len(data)] = data
+        # publish the message only once written
+        struct.pack_into('=Q', ring.buffer, 0, write + needed)
+        if not self._wake_up:
+            self._wake_up = True
+            self._loop.call_soon(self._wake_consumer)
+        return True
+
+    async def put(self, data):
+        '''Write ``data`` into the ring buffer, waiting for space
+        '''
+        while not self.put_nowait(data):
+            if self._waiter is None:
+                self._waiter = create_future(self._loop)
+            await self._waiter
+
+    def close(self):
+        '''Close the channel
+
+        The consumer receives messages already written and then closes.
+        '''
+        if self._data_fd is not None:
+            self._loop.remove_reader(self._space_fd)
+            os.close(self._data_fd)
+            os.close(self._space_fd)
+            self._data_fd = None
+            self._ring.close()
+            self._wake_waiter(RuntimeError('%s closed' % self))
+
+    #    INTERNALS
+    def _wake_consumer(self):
+        # one wake up per loop iteration
+        self._wake_up = False
+        if self._data_fd is not None:
+            try:
+                wake_up(self._data_fd)
+            except OSError:
+                self.close()
+
+    def _space(self):
+        if not os.read(self._space_fd, 4096):
+            # the consumer has gone
+            self.close()
+        else:
+            self._wake_waiter()
+
+    def _wake_waiter(self, exc=None):
+        waiter, self._waiter = self._waiter, None
+        if waiter and not waiter.done():
+            if exc:
+                waiter.set_exception(exc)
+            else:
+                waiter.set_result(None)
+
+
+class SharedChannelReader:
+    '''The consumer side of a :class:`.SharedChannel`, closed when the
+    channel is closed or when the actor stops
+    '''
+    def __init__(self, actor, base, size, handler):
+        self.actor = actor
+        self.handler = handler
+        fd = os.open(base + '.ring', os.O_RDWR)
+        try:
+            self._ring = Ring(mmap.mmap(fd, DATA + size), size)
+        finally:
+            os.close(fd)
+        self._data_fd = os.open(base + '.data', os.O_RDONLY | os.O_NONBLOCK)
+        self._space_fd = os.open(base + '.space',
+                                 os.O_WRONLY | os.O_NONBLOCK)
+        self._loop = actor._loop
+        self._loop.add_reader(self._data_fd, self._data)
+        actor.bind_event('stopping', self._stopping)
+
+    @property
+    def closed(self):
+        return self._data_fd is None
+
+    def close(self):
+        if self._data_fd is not None:
+            self.actor.remove_callback('stopping', self._stopping)
+            self._loop.remove_reader(self._data_fd)
+            os.close(self._data_fd)
+            os.close(self._space_fd)
+            self._data_fd = None
+            self._ring.close()
+
+    def _stopping(self, actor, exc=None):
+        self.close()
+
+    def _data(self):
+        closed = not os.read(self._data_fd, 4096)
+        ring = self._ring
+        size = ring.size
+        write, read = ring.positions()
+        consumed = read
+        while read < write:
+            offset = read % size
+            tail = size - offset
+            if tail < LENGTH.size:
+                read += tail
+                continue
+            length = LENGTH.unpack_from(ring.buffer, DATA + offset)[0]
+            if length == WRAP:
+                read += tail
+                continue
+            start = DATA + offset + LENGTH.size
+            data = ring.view[start:start + length]
+            try:
+                self.handler(self.actor, data)
+            except Exception:
+                self.actor.logger.exception('Unhandled exception in %s',
+                                            self.handler)
+            finally:
+                try:
+                    data.release()
+                except BufferError:
+                    pass
+            read += LENGTH.size + length
+            struct.pack_into('=Q', ring.buffer, 8, read)
+        if closed:
+            self.close()
+        elif read != consumed:
+            try:
+                wake_up(self._space_fd)
+            except OSError:
+                self.close()
@@ -962,6 +962,18 @@ class Coverage(Global):
     desc = """Collect code coverage from all spawn actors."""
 
 
+class TcpMailbox(Global):
+    flags = ["--tcp-mailbox"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Actor mailboxes use loopback TCP rather than unix domain sockets.
+
+        TCP is always used when unix domain sockets are not available.
+        """
+
+
 class DataStore(Global):
     flags = ['--data-store']
     meta = "CONNECTION STRING"
@@ -1027,6 +1039,51 @@ class Workers(Setting):
         """
 
 
+class MinWorkers(Setting):
+    name = "min_workers"
+    section = "Worker Processes"
+    flags = ["--min-workers"]
+    validator = validate_pos_int
+    type = int
+    default = 1
+    desc = """\
+        The minimum number of workers when autoscaling.
+
+        Check the :ref:`max-workers <setting-max_workers>` setting.
+        """
+
+
+class MaxWorkers(Setting):
+    name = "max_workers"
+    section = "Worker Processes"
+    flags = ["--max-workers"]
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        The maximum number of workers when autoscaling.
+
+        When positive, the monitor adds workers when they are overloaded
+        and retires them when they are idle, keeping their number between
+        ``min_workers`` and ``max_workers``. The
+        :ref:`workers <setting-workers>` setting is the initial number of
+        workers.
+        """
+
+
+class AutoscaleCooldown(Setting):
+    name = "autoscale_cooldown"
+    section = "Worker Processes"
+    flags = ["--autoscale-cooldown"]
+    validator = validate_pos_int
+    type = int
+    default = 30
+    desc = """\
+        Seconds to wait after adding or retiring workers before autoscaling
+        again.
+        """
+
+
 class Concurrency(Setting):
     name = "concurrency"
     section = "Worker Processes"
@@ -134,6 +134,44 @@ def close_socket(sock):
             pass
 
 
+def reuse_port_sockets(address, type=socket.SOCK_STREAM):
+    '''Sockets bound to ``address`` with the ``SO_REUSEPORT`` option.
+
+    Several processes can bind sockets to the same address, the kernel
+    balances connections (or datagrams) between them.
+
+    :param address: a ``(host, port)`` tuple, an empty ``host`` binds all
+        network interfaces
+    :param type: socket type
+    :return: a list of bound sockets, one for each address family
+    '''
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        raise OSError('SO_REUSEPORT not available')
+    host, port = address[:2]
+    infos = socket.getaddrinfo(host or None, port, socket.AF_UNSPEC, type,
+                               0, socket.AI_PASSIVE)
+    sockets = []
+    try:
+        for family, type, proto, _, sockaddr in dict.fromkeys(infos):
+            sock = socket.socket(family, type, proto)
+            sockets.append(sock)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            if family == socket.AF_INET6:
+                sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 1)
+            if not port and len(sockets) > 1:
+                # same random port for all address families
+                sockaddr = (sockaddr[0], sockets[0].getsockname()[1]) + \
+                    sockaddr[2:]
+            sock.bind(sockaddr)
+            sock.setblocking(False)
+    except Exception:
+        for sock in sockets:
+            sock.close()
+        raise
+    return sockets
+
+
 def nice_address(address, family=None):
     if isinstance(address, tuple):
         address = ':'.join((str(s) for s in address[:2]))
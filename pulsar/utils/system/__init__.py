@@ -25,6 +25,7 @@ except ImportError:         # pragma    nocover
     import json             # noqa
 
 
+_processes = {}
 memory_symbols = ('K', 'M', 'G', 'T', 'P', 'E', 'Z', 'Y')
 memory_size = dict(((s, 1 << (i+1)*10) for i, s in enumerate(memory_symbols)))
 
@@ -52,13 +53,21 @@ def process_info(pid=None):
     if psutil is None:  # pragma    nocover
         return {}
     pid = pid or os.getpid()
+    # forget processes which are not alive anymore
+    for cached in tuple(_processes.values()):
+        if cached.pid != pid and not cached.is_running():
+            _processes.pop(cached.pid, None)
     try:
-        p = psutil.Process(pid)
+        # the cpu usage is measured since the previous call
+        p = _processes.get(pid)
+        if p is None:
+            p = _processes[pid] = psutil.Process(pid)
+        mem = p.memory_info()
     # this fails on platforms which don't allow multiprocessing
     except psutil.NoSuchProcess:  # pragma    nocover
+        _processes.pop(pid, None)
         return {}
     else:
-        mem = p.memory_info()
         return {'memory': convert_bytes(mem.rss),
                 'memory_virtual': convert_bytes(mem.vms),
                 'cpu_percent': p.cpu_percent(),
@@ -52,6 +52,26 @@ async def spawn_actor_from_actor(actor, name):
     return actor2.aid
 
 
+async def send_to_peer(actor, aid, message):
+    result = await send(aid, 'echo', message)
+    # the message went through a direct connection with the peer
+    mailbox = actor.peers._clients.get(aid)
+    return result, bool(mailbox and mailbox._connection)
+
+
+async def send_to_unknown(actor, aid):
+    await send(aid, 'ping')
+    peers = actor.peers
+    lookups = []
+    lookup = peers._lookup
+    peers._lookup = lambda aid: lookups.append(aid) or lookup(aid)
+    try:
+        await send(aid, 'ping')
+    finally:
+        del peers._lookup
+    return aid in peers._unknown, lookups
+
+
 def cause_timeout(actor):
     if actor.next_periodic_task:
         actor.next_periodic_task.cancel()
@@ -86,3 +106,16 @@ def close_mailbox(actor, close=False):
     assert repr(actor.mailbox)
     # close mailbox
     actor.mailbox.close()
+
+
+# messages received via shared channels, not in actor.extra which
+# must remain JSON serializable for the info command
+SHARED_DATA = {}
+
+
+def shared_data(actor, data):
+    SHARED_DATA.setdefault(actor.aid, []).append(bytes(data))
+
+
+def get_shared_data(actor):
+    return SHARED_DATA.get(actor.aid, [])
@@ -1,9 +1,13 @@
+import socket
+import asyncio
+
 import pulsar
 from pulsar.apps.test import ActorTestMixin
 from pulsar import send, async_while
 
 from tests.async import (add, get_test, spawn_actor_from_actor, close_mailbox,
-                         wait_for_stop, check_environ)
+                         wait_for_stop, check_environ, send_to_peer,
+                         send_to_unknown)
 
 
 class ActorTest(ActorTestMixin):
@@ -68,6 +72,43 @@ class ActorTest(ActorTestMixin):
         is_alive = await async_while(3, proxy_monitor2.is_alive)
         self.assertFalse(is_alive)
 
+    async def test_peer_mailbox(self):
+        proxy1 = await self.spawn_actor(
+            name='peer-actor1-%s' % self.concurrency)
+        proxy2 = await self.spawn_actor(
+            name='peer-actor2-%s' % self.concurrency)
+        # the peer address reaches the arbiter once the actor is serving
+        for _ in range(100):
+            address = await send('arbiter', 'peer_address', proxy2.aid)
+            if address:
+                break
+            await asyncio.sleep(0.02)
+        info = await send(proxy2, 'info')
+        self.assertEqual(address, info['actor']['peer_address'])
+        result, direct = await send(proxy1, 'run', send_to_peer,
+                                    proxy2.aid, 'Hello!')
+        self.assertEqual(result, 'Hello!')
+        self.assertTrue(direct)
+        self.assertEqual(await send('arbiter', 'peer_address', 'foo'), False)
+        # a negative lookup is cached for a while
+        unknown, lookups = await send(proxy1, 'run', send_to_unknown, 'foo')
+        self.assertTrue(unknown)
+        self.assertEqual(lookups, [])
+
+    async def test_tcp_mailbox(self):
+        proxy = await self.spawn_actor(
+            name='tcp-mailbox-%s' % self.concurrency, tcp_mailbox=True)
+        info = await send(proxy, 'info')
+        host, port = info['actor']['peer_address']
+        self.assertEqual(host, '127.0.0.1')
+        self.assertTrue(port)
+        self.assertEqual(await send(proxy, 'ping'), 'pong')
+        if hasattr(socket, 'AF_UNIX'):
+            proxy = await self.spawn_actor(
+                name='unix-mailbox-%s' % self.concurrency)
+            info = await send(proxy, 'info')
+            self.assertTrue(info['actor']['peer_address'].endswith('.sock'))
+
     async def test_config_command(self):
         proxy = await self.spawn_actor(
             name='actor-test-config-%s' % self.concurrency)
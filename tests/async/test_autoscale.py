@@ -0,0 +1,159 @@
+import asyncio
+import unittest
+from functools import partial
+
+import pulsar
+from pulsar import get_event_loop, Connection, TcpServer
+from pulsar.async.autoscale import AutoScaler, worker_metrics
+
+from examples.echo.manage import EchoServerProtocol
+
+
+class Logger:
+
+    def info(self, *args):
+        pass
+
+
+class Monitor:
+
+    def __init__(self, workers=2):
+        self.cfg = pulsar.Config()
+        self.cfg.set('workers', workers)
+        self.logger = Logger()
+        self.sent = []
+
+    def send(self, target, action, *args):
+        self.sent.append((target, action) + args)
+
+
+class Worker:
+    stopping_start = None
+    stopping_timeout = 5
+
+    def __init__(self, aid, loop_lag=0, connections=0, in_flight=0):
+        self.aid = aid
+        self.info = {'actor': {'aid': aid, 'loop_lag': loop_lag},
+                     'testserver': {'clients': {
+                         'connected_clients': connections,
+                         'in_flight_requests': in_flight}}}
+
+
+class TestAutoScaler(unittest.TestCase):
+
+    def scaler(self, **kw):
+        kw.setdefault('cooldown', 0)
+        return AutoScaler(kw.pop('min_workers', 1), kw.pop('max_workers', 4),
+                          period=0, **kw)
+
+    def test_worker_metrics(self):
+        metrics = worker_metrics(Worker('a', 0.02, 10, 3).info)
+        self.assertEqual(metrics, {'loop_lag': 0.02, 'cpu': 0,
+                                   'connections': 10, 'in_flight': 3})
+        scaler = self.scaler()
+        self.assertEqual(scaler.worker_load(Worker('a', 0.05, 10, 3).info),
+                         (0.5, 'loop_lag'))
+        self.assertEqual(scaler.worker_load(Worker('a', 0, 10, 60).info),
+                         (0.6, 'in_flight'))
+
+    def test_limits(self):
+        scaler = AutoScaler(6, 3)
+        self.assertEqual((scaler.min_workers, scaler.max_workers), (3, 3))
+        scaler = AutoScaler(0, 3)
+        self.assertEqual(scaler.min_workers, 1)
+        monitor = Monitor(8)
+        scaler(monitor, [])
+        self.assertEqual(monitor.cfg.workers, 3)
+
+    def test_scale_up(self):
+        scaler = self.scaler()
+        monitor = Monitor()
+        workers = [Worker('a', 0.2), Worker('b', 0.1)]
+        for _ in range(scaler.patience - 1):
+            scaler(monitor, workers)
+        self.assertEqual(monitor.cfg.workers, 2)
+        scaler(monitor, workers)
+        self.assertEqual(monitor.cfg.workers, 4)
+        self.assertEqual(scaler.load, 1.5)
+        decision = scaler.decisions[-1]
+        self.assertEqual(decision['action'], 'add')
+        self.assertEqual(decision['previous'], 2)
+        self.assertEqual(decision['workers'], 4)
+        self.assertEqual(decision['metric'], 'loop_lag')
+        info = scaler.info()
+        self.assertEqual(info['max_workers'], 4)
+        self.assertEqual(len(info['decisions']), 1)
+
+    def test_scale_down(self):
+        scaler = self.scaler()
+        monitor = Monitor(3)
+        workers = [Worker('a', 0, 10, 2), Worker('b', 0, 5, 1),
+                   Worker('c', 0, 8, 0)]
+        for _ in range(scaler.patience):
+            scaler(monitor, workers)
+        self.assertEqual(monitor.cfg.workers, 2)
+        # the least busy worker drains its connections
+        self.assertEqual(monitor.sent, [(workers[2], 'retire', 30)])
+        self.assertTrue(workers[2].stopping_start)
+        self.assertEqual(workers[2].stopping_timeout, 35)
+        self.assertEqual(scaler.decisions[-1]['worker'], 'c')
+        # retiring workers are not considered
+        for _ in range(scaler.patience):
+            scaler(monitor, workers)
+        self.assertEqual(monitor.cfg.workers, 1)
+        self.assertEqual(monitor.sent[-1][:2], (workers[1], 'retire'))
+        for _ in range(scaler.patience):
+            scaler(monitor, workers)
+        self.assertEqual(monitor.cfg.workers, 1)
+        self.assertEqual(len(monitor.sent), 2)
+
+    def test_hysteresis(self):
+        scaler = self.scaler()
+        monitor = Monitor()
+        busy = [Worker('a', 0.1), Worker('b', 0.1)]
+        normal = [Worker('a', 0.05), Worker('b', 0.05)]
+        for _ in range(3):
+            for workers in (busy, busy, normal):
+                scaler(monitor, workers)
+        self.assertEqual(monitor.cfg.workers, 2)
+        self.assertFalse(scaler.decisions)
+
+    def test_cooldown(self):
+        scaler = self.scaler(cooldown=60)
+        monitor = Monitor()
+        workers = [Worker('a', 0.1), Worker('b', 0.1)]
+        for _ in range(scaler.patience):
+            scaler(monitor, workers)
+        self.assertEqual(monitor.cfg.workers, 3)
+        for _ in range(2*scaler.patience):
+            scaler(monitor, workers)
+        self.assertEqual(monitor.cfg.workers, 3)
+        self.assertTrue(scaler.info()['cooldown'] > 0)
+
+
+class TestDrain(unittest.TestCase):
+
+    async def test_drain(self):
+        loop = get_event_loop()
+        server = TcpServer(partial(Connection, EchoServerProtocol), loop,
+                           address=('127.0.0.1', 0))
+        await server.start_serving()
+        address = server.address
+        busy_reader, busy = await asyncio.open_connection(*address)
+        idle_reader, idle = await asyncio.open_connection(*address)
+        busy.write(b'hello')
+        for _ in range(100):
+            if server.info()['clients']['in_flight_requests']:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(server.info()['clients']['connected_clients'], 2)
+        drain = asyncio.ensure_future(server.drain(5))
+        self.assertEqual(await idle_reader.read(), b'')
+        with self.assertRaises(ConnectionRefusedError):
+            await asyncio.open_connection(*address)
+        self.assertFalse(drain.done())
+        busy.write(b' world\r\n\r\n')
+        self.assertEqual(await busy_reader.read(), b'hello world\r\n\r\n')
+        await drain
+        self.assertFalse(server.info()['clients']['connected_clients'])
+        await server.close()
@@ -49,4 +49,7 @@ class TestFailure(unittest.TestCase):
         self.assertEqual(h.remove_callback('bla', cbk), None)
         self.assertEqual(h.remove_callback('many', cbk), 1)
         self.assertEqual(h.remove_callback('many', cbk), 0)
-        self.assertEqual(h.event('many').handlers, [])
+        self.assertEqual(h.event('many').handlers, ())
+        # handlers are read-only
+        with self.assertRaises(AttributeError):
+            h.event('many').handlers.append(cbk)
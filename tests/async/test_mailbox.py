@@ -0,0 +1,80 @@
+import asyncio
+import pickle
+import unittest
+
+from pulsar import get_event_loop
+from pulsar.async.mailbox import MailboxProtocol, Message, CALLBACK
+
+
+class Transport:
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def write(self, data):
+        self.receiver.data_received(data)
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+
+class Receiver(MailboxProtocol):
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.received = []
+
+    async def _on_command(self, command, ack, sender, target, args, kwargs):
+        self.received.append((command, args))
+
+
+class TestMailboxProtocol(unittest.TestCase):
+
+    def pair(self):
+        loop = get_event_loop()
+        receiver = Receiver(loop=loop)
+        sender = MailboxProtocol(loop=loop)
+        sender.connection_made(Transport(receiver))
+        return sender, receiver
+
+    def send(self, sender, command, *args):
+        req = Message.command(command, 'a', 'b', args, None)
+        sender._start(req)
+        return req.waiter
+
+    def frame(self, protocol, envelope):
+        return protocol._parser.encode(protocol._encode(envelope), opcode=2)
+
+    async def test_bad_messages(self):
+        _, receiver = self.pair()
+        cancelled = asyncio.Future()
+        cancelled.cancel()
+        receiver._pending_responses[1] = cancelled
+        frames = [self.frame(receiver, (CALLBACK, 1, 'late')),
+                  self.frame(receiver, (CALLBACK, 2, 'unknown')),
+                  self.frame(receiver, (5, None, 'a', 'b', (), None)),
+                  self.frame(receiver, ((1, 'echo'), None, 'a', 'b',
+                                        ('hello',), None))]
+        # errors are logged, the other frames are still processed
+        receiver.data_received(b''.join(frames))
+        await asyncio.sleep(0.01)
+        self.assertEqual(receiver.received, [('echo', ('hello',))])
+        self.assertFalse(receiver._pending_responses)
+
+    async def test_unpicklable_message(self):
+        sender, receiver = self.pair()
+        bad = self.send(sender, 'run', lambda actor: None)
+        good = self.send(sender, 'echo', 'hello')
+        await asyncio.sleep(0.01)
+        # only the message which could not be pickled fails
+        with self.assertRaises((pickle.PicklingError, AttributeError)):
+            await bad
+        self.assertFalse(good.done())
+        self.assertEqual(receiver.received, [('echo', ('hello',))])
+        # the command name is sent with the next message
+        self.assertNotIn('run', sender._command_ids)
+        self.send(sender, 'run', 'ok')
+        self.send(sender, 'run', 'again')
+        await asyncio.sleep(0.01)
+        self.assertEqual(receiver.received[1:], [('run', ('ok',)),
+                                                 ('run', ('again',))])
@@ -0,0 +1,181 @@
+import unittest
+import asyncio
+
+from pulsar import Pool
+
+
+class Transport:
+
+    def __init__(self):
+        self.closing = False
+
+    def is_closing(self):
+        return self.closing
+
+
+class Connection:
+
+    def __init__(self):
+        self.transport = Transport()
+
+    def close(self):
+        self.transport.closing = True
+        closed = asyncio.Future()
+        closed.set_result(None)
+        return closed
+
+
+class Creator:
+
+    def __init__(self):
+        self.connections = []
+
+    async def __call__(self):
+        connection = Connection()
+        self.connections.append(connection)
+        return connection
+
+
+class TestPool(unittest.TestCase):
+
+    def pool(self, pool_size=2, **kw):
+        return Pool(Creator(), pool_size=pool_size, **kw)
+
+    async def test_lifo(self):
+        pool = self.pool()
+        conn1 = await pool.connect()
+        conn2 = await pool.connect()
+        first, second = conn1.connection, conn2.connection
+        self.assertEqual(pool.in_use, 2)
+        conn1.close()
+        conn2.close()
+        self.assertEqual(pool.available, 2)
+        self.assertEqual(pool.in_use, 0)
+        conn = await pool.connect()
+        self.assertEqual(conn.connection, second)
+        self.assertTrue(second in pool)
+        self.assertFalse(first in pool._in_use_connections)
+        self.assertTrue(first in pool)
+        conn.close()
+        self.assertEqual(pool.metrics.created, 2)
+        self.assertEqual(pool.metrics.acquired, 3)
+        self.assertEqual(sum(pool.metrics.wait_histogram), 3)
+        await pool.close()
+
+    async def test_closed_connections(self):
+        pool = self.pool()
+        conn1 = await pool.connect()
+        conn2 = await pool.connect()
+        conn1.close()
+        conn2.close()
+        for connection in pool._creator.connections:
+            connection.close()
+        conn = await pool.connect()
+        self.assertEqual(pool.metrics.created, 3)
+        self.assertEqual(pool.available, 0)
+        conn.close()
+        await pool.close()
+
+    async def test_fair_wait(self):
+        pool = self.pool(pool_size=1)
+        conn = await pool.connect()
+        order = []
+
+        async def get(name):
+            c = await pool.connect()
+            order.append(name)
+            await asyncio.sleep(0.01)
+            c.close()
+
+        tasks = [asyncio.ensure_future(get(i)) for i in range(5)]
+        await asyncio.sleep(0.01)
+        self.assertEqual(pool.waiting, 5)
+        conn.close()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, list(range(5)))
+        self.assertEqual(pool.metrics.created, 1)
+        self.assertEqual(pool.waiting, 0)
+        await pool.close()
+
+    async def test_timeout(self):
+        pool = self.pool(pool_size=1, timeout=0.1)
+        conn = await pool.connect()
+        with self.assertRaises(asyncio.TimeoutError):
+            await pool.connect()
+        self.assertEqual(pool.metrics.timeouts, 1)
+        conn.close()
+        conn = await pool.connect()
+        self.assertEqual(pool.metrics.created, 1)
+        conn.close()
+        await pool.close()
+
+    async def test_discard_wakes_waiter(self):
+        pool = self.pool(pool_size=1)
+        conn = await pool.connect()
+        waiter = asyncio.ensure_future(pool.connect())
+        await asyncio.sleep(0.01)
+        self.assertFalse(waiter.done())
+        conn.detach()
+        conn2 = await waiter
+        self.assertEqual(pool.metrics.discarded, 1)
+        self.assertEqual(pool.metrics.created, 2)
+        self.assertEqual(pool.in_use, 1)
+        conn2.close()
+        await pool.close()
+
+    async def test_closed_handed_to_waiter(self):
+        pool = self.pool(pool_size=1, timeout=1)
+        conn = await pool.connect()
+        waiter = asyncio.ensure_future(pool.connect())
+        await asyncio.sleep(0.01)
+        self.assertFalse(waiter.done())
+        # released without discard but already closed
+        conn.connection.close()
+        conn.close()
+        conn2 = await waiter
+        self.assertFalse(pool.is_connection_closed(conn2.connection))
+        self.assertEqual(pool.metrics.created, 2)
+        self.assertEqual(pool.in_use, 1)
+        conn2.close()
+        self.assertEqual((pool.in_use, pool.available), (0, 1))
+        conn3 = await pool.connect()
+        conn3.close()
+        await pool.close()
+
+    async def test_min_size(self):
+        pool = self.pool(pool_size=4, min_size=2, maintenance_interval=0.05)
+        self.assertEqual(pool.min_size, 2)
+        await asyncio.sleep(0.1)
+        self.assertEqual(pool.available, 2)
+        conn = await pool.connect()
+        self.assertEqual(pool.metrics.created, 2)
+        conn.detach()
+        await asyncio.sleep(0.1)
+        self.assertEqual(pool.size, 2)
+        await pool.close()
+
+    async def test_max_idle_time(self):
+        pool = self.pool(pool_size=3, min_size=1, max_idle_time=0.05,
+                         maintenance_interval=0.02)
+        conns = [await pool.connect() for _ in range(3)]
+        for conn in conns:
+            conn.close()
+        self.assertEqual(pool.available, 3)
+        await asyncio.sleep(0.15)
+        self.assertEqual(pool.available, 1)
+        self.assertEqual(pool.metrics.recycled, 2)
+        await pool.close()
+
+    async def test_max_lifetime(self):
+        pool = self.pool(max_lifetime=0.05)
+        conn = await pool.connect()
+        connection = conn.connection
+        await asyncio.sleep(0.1)
+        conn.close()
+        self.assertTrue(connection.transport.closing)
+        self.assertEqual(pool.available, 0)
+        self.assertEqual(pool.metrics.recycled, 1)
+        conn = await pool.connect()
+        self.assertNotEqual(conn.connection, connection)
+        conn.close()
+        await pool.close()
@@ -0,0 +1,128 @@
+import asyncio
+import unittest
+
+from pulsar import Connection, get_event_loop
+
+
+class Transport:
+    closing = False
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(data)
+
+    def writelines(self, data):
+        self.write(b''.join(data))
+
+    def get_write_buffer_size(self):
+        return sum((len(data) for data in self.writes))
+
+    def is_closing(self):
+        return self.closing
+
+    def can_write_eof(self):
+        return False
+
+    def close(self):
+        pass
+
+    def pause_reading(self):
+        pass
+
+    def resume_reading(self):
+        pass
+
+
+class TestCork(unittest.TestCase):
+
+    def connection(self):
+        connection = Connection(loop=get_event_loop())
+        connection._transport = Transport()
+        return connection
+
+    async def test_cork(self):
+        connection = self.connection()
+        connection.cork()
+        connection.write(b'a')
+        connection.write(b'b')
+        self.assertEqual(connection.transport.writes, [])
+        await asyncio.sleep(0)
+        self.assertEqual(connection.transport.writes, [b'ab'])
+        connection.uncork()
+        connection.write(b'c')
+        self.assertEqual(connection.transport.writes, [b'ab', b'c'])
+
+    async def test_cork_size(self):
+        connection = self.connection()
+        connection.cork(4)
+        connection.write(b'ab')
+        connection.write(b'cd')
+        connection.write(b'e')
+        self.assertEqual(connection.transport.writes, [b'abcd'])
+        connection.close()
+        self.assertEqual(connection.transport.writes, [b'abcd', b'e'])
+
+    async def test_cork_paused(self):
+        connection = self.connection()
+        connection.cork()
+        connection.write(b'a')
+        connection.pause_writing()
+        waiter = connection.write(b'b')
+        await asyncio.sleep(0)
+        self.assertEqual(connection.transport.writes, [])
+        self.assertFalse(waiter.done())
+        connection.resume_writing()
+        self.assertTrue(waiter.done())
+        self.assertEqual(connection.transport.writes, [b'ab'])
+
+    async def test_cork_paused_size(self):
+        connection = self.connection()
+        connection.cork(4)
+        connection.pause_writing()
+        connection.write(b'ab')
+        connection.write(b'c')
+        await asyncio.sleep(0)
+        self.assertEqual(connection.transport.writes, [])
+        # a full buffer is passed to the transport while paused
+        connection.write(b'de')
+        self.assertEqual(connection.transport.writes, [b'abcde'])
+        self.assertEqual(connection.write_buffer_size, 5)
+        connection.write(b'f')
+        self.assertEqual(connection.write_buffer_size, 6)
+        self.assertEqual(connection.transport.writes, [b'abcde'])
+
+
+class TestDrain(unittest.TestCase):
+
+    def connection(self):
+        connection = Connection(loop=get_event_loop())
+        connection._transport = Transport()
+        return connection
+
+    async def test_drain(self):
+        connection = self.connection()
+        await connection.drain()
+        connection.pause_writing()
+        self.assertTrue(connection.writing_paused)
+        # paused writes go to the transport
+        connection.write(b'abc')
+        self.assertEqual(connection.transport.writes, [b'abc'])
+        self.assertEqual(connection.write_buffer_size, 3)
+        drain = asyncio.ensure_future(connection.drain())
+        await asyncio.sleep(0)
+        self.assertFalse(drain.done())
+        connection.resume_writing()
+        await drain
+        self.assertFalse(connection.writing_paused)
+
+    async def test_drain_lost(self):
+        connection = self.connection()
+        connection.pause_writing()
+        drain = asyncio.ensure_future(connection.drain())
+        await asyncio.sleep(0)
+        connection.transport.closing = True
+        connection.fire_event('connection_lost')
+        with self.assertRaises(ConnectionResetError):
+            await drain
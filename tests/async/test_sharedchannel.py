@@ -0,0 +1,70 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import pulsar
+from pulsar import send, shared_channel, async_while
+from pulsar.apps.test import ActorTestMixin
+
+from tests.async import SHARED_DATA, shared_data, get_shared_data
+
+
+class TestSharedChannel(ActorTestMixin, unittest.TestCase):
+    concurrency = 'process'
+
+    async def test_local(self):
+        actor = pulsar.get_actor()
+        SHARED_DATA.pop(actor.aid, None)
+        channel = await shared_channel(actor, shared_data, size=64)
+        self.assertEqual(channel.size, 64)
+        self.assertEqual(channel.available(), 64)
+        with self.assertRaises(ValueError):
+            channel.put_nowait(b'x' * 61)
+        messages = [('%02d' % i).encode('utf-8') * 7 for i in range(20)]
+        # the ring buffer wraps around several times
+        for message in messages:
+            await channel.put(message)
+        self.assertFalse(channel.put_nowait(b'x' * 60))
+        await async_while(2, lambda: len(get_shared_data(actor)) < 20)
+        self.assertEqual(get_shared_data(actor), messages)
+        self.assertEqual(channel.available(), 64)
+        channel.close()
+        self.assertTrue(channel.closed)
+        self.assertRaises(RuntimeError, channel.put_nowait, b'')
+
+    async def test_target_error(self):
+        async def send(*args):
+            # the result of a command which failed in the target
+            return None
+
+        actor = pulsar.get_actor()
+        with mock.patch('pulsar.async.sharedchannel.send', send):
+            with self.assertRaises(RuntimeError):
+                await shared_channel(actor, shared_data, size=64)
+
+    async def test_actor(self):
+        proxy = await self.spawn_actor(name='shared-channel-actor')
+        channel = await shared_channel(proxy, shared_data, size=1024)
+        messages = [bytes([i]) * 100 for i in range(50)]
+        for message in messages:
+            await channel.put(memoryview(message))
+        channel.close()
+        for _ in range(100):
+            data = await send(proxy, 'run', get_shared_data)
+            if len(data) == len(messages):
+                break
+            await asyncio.sleep(0.05)
+        self.assertEqual(data, messages)
+
+    async def test_stopping(self):
+        proxy = await self.spawn_actor(name='shared-channel-stop',
+                                       concurrency='thread')
+        channel = await shared_channel(proxy, shared_data, size=1024)
+        await channel.put(b'hello')
+        await async_while(2, lambda: not get_shared_data(proxy))
+        info = await send(proxy, 'info')
+        self.assertTrue(info['actor'])
+        # the reader closes with the actor and the channel follows
+        await send(proxy, 'stop')
+        await async_while(5, lambda: not channel.closed)
+        self.assertTrue(channel.closed)
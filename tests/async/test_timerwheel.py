@@ -0,0 +1,52 @@
+import asyncio
+import unittest
+
+from pulsar import get_event_loop
+from pulsar.async.mixins import TimerWheel, timer_wheel
+
+
+class Idle:
+    _timeout_slot = None
+    closed = False
+
+    def __init__(self, loop, timeout):
+        self._loop = loop
+        self._timeout = timeout
+        self._last_activity = loop.time()
+
+    def _timed_out(self):
+        self.closed = True
+
+
+class TestTimerWheel(unittest.TestCase):
+
+    def test_timer_wheel(self):
+        loop = get_event_loop()
+        wheel = timer_wheel(loop)
+        self.assertIsInstance(wheel, TimerWheel)
+        self.assertEqual(timer_wheel(loop), wheel)
+        self.assertEqual(wheel.resolution, 1)
+
+    async def test_idle(self):
+        loop = get_event_loop()
+        wheel = TimerWheel(loop, resolution=0.02, size=8)
+        short = Idle(loop, 0.05)
+        long = Idle(loop, 0.5)
+        active = Idle(loop, 0.05)
+        for protocol in (short, long, active):
+            wheel.add(protocol)
+        self.assertEqual(len(wheel), 3)
+        for _ in range(10):
+            await asyncio.sleep(0.02)
+            active._last_activity = loop.time()
+        self.assertTrue(short.closed)
+        self.assertFalse(active.closed)
+        self.assertFalse(long.closed)
+        self.assertEqual(len(wheel), 2)
+        wheel.discard(active)
+        self.assertEqual(len(wheel), 1)
+        self.assertEqual(active._timeout_slot, None)
+        await asyncio.sleep(0.4)
+        self.assertTrue(long.closed)
+        self.assertFalse(active.closed)
+        self.assertEqual(len(wheel), 0)
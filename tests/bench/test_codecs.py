@@ -0,0 +1,40 @@
+import unittest
+
+from pulsar.apps.data import Codecs, get_codec
+
+
+class JsonCodec(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 10000
+    _sizes = {'tiny': 1,
+              'small': 5,
+              'normal': 20,
+              'big': 100,
+              'huge': 1000}
+    codec = 'json'
+
+    @classmethod
+    def setUpClass(cls):
+        size = cls._sizes[cls.cfg.size]
+        cls.message = {
+            'event': 'update',
+            'channel': 'prices',
+            'data': [{'id': i, 'symbol': 'SYM%d' % i, 'price': 100.5 + i,
+                      'volume': 1000 * i, 'open': True, 'tags': ['a', 'b']}
+                     for i in range(size)]
+        }
+        cls.encoder = get_codec(cls.codec)
+        cls.decoder = Codecs(get_codec(cls.codec))
+        cls.data = cls.encoder.encode(cls.message)
+        if isinstance(cls.data, str):
+            cls.data = cls.data.encode('utf-8')
+
+    def test_encode(self):
+        self.encoder.encode(self.message)
+
+    def test_decode(self):
+        self.decoder.decode(self.data)
+
+
+class MarshalCodec(JsonCodec):
+    codec = 'marshal'
@@ -0,0 +1,37 @@
+import asyncio
+import unittest
+
+from pulsar import send, spawn
+
+
+class TestMailbox(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 1000
+    _sizes = {'tiny': 1,
+              'small': 10,
+              'normal': 100,
+              'big': 1000,
+              'huge': 10000}
+
+    @classmethod
+    async def setUpClass(cls):
+        cls.size = cls._sizes[cls.cfg.size]
+        cls.actor1 = await spawn(name='mailbox-bench-1')
+        cls.actor2 = await spawn(name='mailbox-bench-2')
+
+    @classmethod
+    def tearDownClass(cls):
+        return asyncio.gather(send('arbiter', 'kill_actor', cls.actor1.aid),
+                              send('arbiter', 'kill_actor', cls.actor2.aid))
+
+    async def test_ping(self):
+        self.assertEqual(await send(self.actor1, 'ping'), 'pong')
+
+    async def test_echo(self):
+        await send(self.actor1, 'echo', 'x' * self.size)
+
+    async def test_batch(self):
+        # messages sent in the same loop iteration share a frame
+        result = await asyncio.gather(*[send(self.actor2, 'ping')
+                                        for _ in range(self.size)])
+        self.assertEqual(len(result), self.size)
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+
+from pulsar import Connection
+
+
+class Transport:
+    '''A transport discarding written data'''
+    written = 0
+
+    def write(self, data):
+        self.written += len(data)
+
+    def writelines(self, data):
+        self.write(b''.join(data))
+
+    def is_closing(self):
+        return False
+
+
+class TestProtocolWrite(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 1000
+    _sizes = {'tiny': 1,
+              'small': 10,
+              'normal': 100,
+              'big': 1000,
+              'huge': 10000}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.size = cls._sizes[cls.cfg.size]
+        cls.data = b'x' * 64
+
+    def connection(self, timeout=None):
+        connection = Connection(loop=asyncio.get_event_loop(),
+                                timeout=timeout)
+        connection._transport = Transport()
+        return connection
+
+    def _write(self, connection):
+        write = connection.write
+        data = self.data
+        for _ in range(self.size):
+            write(data)
+
+    def test_write(self):
+        self._write(self.connection())
+
+    def test_write_timeout(self):
+        connection = self.connection(timeout=30)
+        self._write(connection)
+        connection._cancel_timeout(None)
+
+    def test_write_corked(self):
+        connection = self.connection()
+        connection.cork()
+        self._write(connection)
+        connection.uncork()
+
+    def test_write_handlers(self):
+        connection = self.connection()
+        connection.bind_event('before_write', lambda _: None)
+        connection.bind_event('after_write', lambda _: None)
+        self._write(connection)
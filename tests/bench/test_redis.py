@@ -28,6 +28,9 @@ class RedisPyParser(unittest.TestCase):
                            ).encode('utf-8') for s in range(nsize)]
         cls.parser = redis_parser(cls.redis_py_parser)()
         cls.chunk = cls.parser.multi_bulk(cls.data)
+        cls.value_1mb = cls.parser.bulk(b'x' * 2**20)
+        cls.array_10k = cls.parser.multi_bulk(
+            [choice(cls.data_bytes) for s in range(10000)])
 
     def test_pack_command(self):
         self.parser.pack_command(self.data)
@@ -42,6 +45,27 @@ class RedisPyParser(unittest.TestCase):
         self.parser.feed(self.chunk)
         self.parser.get()
 
+    def test_decode_1mb_value(self):
+        self.parser.feed(self.value_1mb)
+        self.parser.get()
+
+    def test_decode_1mb_value_chunks(self):
+        value = self.value_1mb
+        for i in range(0, len(value), 65536):
+            self.parser.feed(value[i:i+65536])
+        self.parser.get()
+
+    def test_decode_1mb_value_memoryview(self):
+        parser = redis_parser(True, 65536)()
+        value = self.value_1mb
+        for i in range(0, len(value), 65536):
+            parser.feed(value[i:i+65536])
+        parser.get()
+
+    def test_decode_10k_array(self):
+        self.parser.feed(self.array_10k)
+        self.parser.get()
+
 
 @unittest.skipUnless(HAS_C_EXTENSIONS, 'Requires C extensions')
 class RedisCParser(RedisPyParser):
@@ -0,0 +1,72 @@
+import asyncio
+import unittest
+
+from pulsar import send
+
+from examples.echo.manage import server
+
+
+class TestAcceptShared(unittest.TestCase):
+    '''Connections accepted by workers sharing the listening sockets
+    '''
+    __benchmark__ = True
+    __number__ = 10
+    _sizes = {'tiny': 10,
+              'small': 50,
+              'normal': 100,
+              'big': 500,
+              'huge': 2000}
+    workers = 4
+    reuse_port = False
+    server_cfg = None
+    benchmark_template = ('{0[name]}: repeated {0[repeat]}(x{0[times]}) '
+                          'times, average {0[mean]} secs, stdev {0[std]}, '
+                          'connections per worker {0[accepted]}')
+
+    @classmethod
+    async def setUpClass(cls):
+        cls.size = cls._sizes[cls.cfg.size]
+        s = server(name=cls.__name__.lower(), bind='127.0.0.1:0',
+                   workers=cls.workers, reuse_port=cls.reuse_port)
+        cls.server_cfg = await send('arbiter', 'run', s)
+        cls.address = cls.server_cfg.addresses[0]
+        cls.accepted = []
+        for _ in range(100):
+            info = await send(cls.server_cfg.name, 'info')
+            if info and len(info.get('workers', ())) == cls.workers:
+                break
+            await asyncio.sleep(0.1)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.server_cfg:
+            return send('arbiter', 'kill_actor', cls.server_cfg.name)
+
+    def getSummary(self, info, repeat, total_time, total_time2):
+        info['accepted'] = self.accepted
+        return info
+
+    async def test_accept(self):
+        await asyncio.gather(*[self._echo() for _ in range(self.size)])
+
+    async def test_distribution(self):
+        # connections accepted so far by each worker
+        info = await send(self.server_cfg.name, 'info')
+        key = '%sserver' % self.server_cfg.name
+        accepted = []
+        for worker in info['workers']:
+            info = await send(worker['actor']['actor_id'], 'info')
+            accepted.append(info[key]['clients']['processed_clients'])
+        self.__class__.accepted = sorted(accepted)
+
+    async def _echo(self):
+        reader, writer = await asyncio.open_connection(*self.address)
+        writer.write(b'ping\r\n\r\n')
+        await reader.readexactly(8)
+        writer.close()
+
+
+class TestAcceptReusePort(TestAcceptShared):
+    '''Connections accepted by workers with their own sockets
+    '''
+    reuse_port = True
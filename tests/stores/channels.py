@@ -17,7 +17,7 @@ class Tester:
 class ChannelsTests:
 
     def channels(self, **kw):
-        if 'protocols' not in kw:
+        if 'protocol' not in kw:
             kw['protocol'] = Json()
         return self.store.channels(**kw)
 
@@ -62,6 +62,57 @@ class ChannelsTests:
         await channels.close()
         self.assertEqual(channels.status, StatusType.closed)
 
+    async def test_channels_publish_no_wait(self):
+        channels = self.channels()
+        future = asyncio.Future()
+
+        def fire(channel, event, data):
+            future.set_result(data)
+
+        await channels.register('test5', 'boom', fire)
+        await channels.connect()
+        await channels.publish('test5', 'boom', 'ciao!', wait=False)
+        self.assertEqual(await future, 'ciao!')
+        await channels.close()
+
+    async def test_channels_marshal(self):
+        channels = self.channels(protocol='marshal',
+                                 namespace=self.randomkey().lower())
+        self.assertEqual(channels.codecs.name, 'marshal')
+        future = asyncio.Future()
+
+        def fire(channel, event, data):
+            future.set_result(data)
+
+        await channels.register('test6', 'boom', fire)
+        await channels.connect()
+        await channels.publish('test6', 'boom', {'text': 'ciao!', 'n': 1})
+        self.assertEqual(await future, {'text': 'ciao!', 'n': 1})
+        self.assertEqual(channels.codecs.name, 'marshal')
+        await channels.close()
+
+    async def test_channels_codec_negotiation(self):
+        namespace = self.randomkey().lower()
+        channels1 = self.channels(protocol='marshal', namespace=namespace)
+        channels2 = self.channels(namespace=namespace)
+        # a peer which cannot decode marshal messages
+        channels2.codecs.names = lambda: ['json']
+        future = asyncio.Future()
+
+        def announced(channel, event, data):
+            if data['id'] == channels2.uid and not future.done():
+                future.set_result(data)
+
+        await channels1.register('server', 'codec', announced)
+        await channels1.connect()
+        self.assertEqual(channels1.codecs.name, 'marshal')
+        await channels2.connect()
+        data = await future
+        self.assertEqual(data['codecs'], ['json'])
+        self.assertEqual(channels1.codecs.name, 'json')
+        await channels1.close()
+        await channels2.close()
+
     async def _test_fail_subscribe(self):
         channels = self.channels()
         original, warning, critical = self._patch(
@@ -1,6 +1,7 @@
 import asyncio
 
 from pulsar import ensure_future, LockError
+from pulsar.apps.data import create_store
 
 
 class RedisLockTests:
@@ -76,6 +77,74 @@ class RedisLockTests:
         self.assertTrue(5 > lock2._loop.time() - start > 0.5)
         eq(await lock2.release(), True)
 
+    async def test_notify(self):
+        key = self.randomkey()
+        lock1 = self.client.lock(key)
+        lock2 = self.client.lock(key, blocking=5)
+        self.assertTrue(lock2.notify)
+        self.assertTrue(await lock1.acquire())
+        waiter = ensure_future(lock2.acquire())
+        await asyncio.sleep(0.3)
+        start = lock2._loop.time()
+        self.assertTrue(await lock1.release())
+        self.assertTrue(await waiter)
+        self.assertTrue(lock2._loop.time() - start < 0.2)
+        self.assertTrue(await lock2.release())
+
+    async def test_notify_fifo(self):
+        key = self.randomkey()
+        store = create_store(self.store.dns, pool_size=10)
+        client = store.client()
+        lock = client.lock(key)
+        order = []
+
+        async def wait(i):
+            waiter = client.lock(key, blocking=5)
+            self.assertTrue(await waiter.acquire())
+            order.append(i)
+            await waiter.release()
+
+        self.assertTrue(await lock.acquire())
+        waiters = []
+        for i in range(3):
+            waiters.append(ensure_future(wait(i)))
+            await asyncio.sleep(0.1)
+        # new clients do not jump ahead of waiting ones
+        self.assertFalse(await client.lock(key, blocking=False).acquire())
+        await lock.release()
+        await asyncio.gather(*waiters)
+        self.assertEqual(order, [0, 1, 2])
+        await store.close()
+
+    async def test_waiters_expire(self):
+        key = self.randomkey()
+        lock = self.client.lock(key)
+        self.assertTrue(await lock.acquire())
+        waiter = self.client.lock(key, blocking=5)
+        acquire = ensure_future(waiter.acquire())
+        await asyncio.sleep(0.1)
+        ttl = await self.client.pttl(waiter._waiters)
+        self.assertTrue(0 < ttl <= waiter._waiters_ttl)
+        await lock.release()
+        self.assertTrue(await acquire)
+        await waiter.release()
+        # a waiting client which crashed is forgotten
+        crashed = self.client.lock(key, blocking=5)
+        crashed._waiters_ttl = 100
+        self.assertEqual(await crashed._wait(1), 1)
+        self.assertFalse(await self.client.lock(key, blocking=False).acquire())
+        await asyncio.sleep(0.2)
+        self.assertTrue(await self.client.lock(key, blocking=False).acquire())
+
+    async def test_no_notify(self):
+        key = self.randomkey()
+        lock1 = self.client.lock(key)
+        lock2 = self.client.lock(key, blocking=5, notify=False)
+        self.assertTrue(await lock1.acquire())
+        ensure_future(self._release(lock1, 0.3))
+        self.assertTrue(await lock2.acquire())
+        self.assertTrue(await lock2.release())
+
     def test_high_sleep_min(self):
         lock = self.client.lock('foo', blocking=1, sleep=2)
         self.assertEqual(lock.sleep, 1)
@@ -0,0 +1,60 @@
+import unittest
+
+from pulsar import ProtocolError, ImproperlyConfigured
+from pulsar.apps.data import Codecs, get_codec, register_codec
+from pulsar.apps.data.codecs import Json, Marshal, codecs, binary_codecs
+
+
+class TestCodecs(unittest.TestCase):
+    message = {'event': 'boom', 'channel': 'test',
+               'data': {'text': 'ciao', 'values': [1, 2.5, None, True]}}
+
+    def test_registry(self):
+        self.assertIsInstance(get_codec('json'), Json)
+        self.assertIsInstance(get_codec('marshal'), Marshal)
+        codec = Json()
+        self.assertEqual(get_codec(codec), codec)
+        self.assertEqual(get_codec(None), None)
+        self.assertRaises(ImproperlyConfigured, get_codec, 'foo')
+
+    def test_register(self):
+
+        class Dummy:
+            name = 'dummy'
+            tag = 200
+
+        self.assertEqual(register_codec(Dummy), Dummy)
+        self.assertIsInstance(get_codec('dummy'), Dummy)
+        self.assertEqual(binary_codecs[200], Dummy)
+        codecs.pop('dummy')
+        binary_codecs.pop(200)
+
+    def test_marshal(self):
+        codec = Marshal()
+        data = codec.encode(self.message)
+        self.assertEqual(data[:2], b'\xff\x01')
+        self.assertEqual(codec.decode(data), self.message)
+        self.assertRaises(ProtocolError, codec.decode, b'\xff\x01foo')
+
+    def test_codecs(self):
+        codec = Codecs(Marshal())
+        self.assertEqual(codec.name, 'marshal')
+        self.assertIsInstance(codec.default, Json)
+        self.assertTrue(repr(codec))
+        self.assertEqual(codec.names(), ['json', 'marshal'])
+        data = codec.encode(self.message)
+        self.assertEqual(codec.decode(data), self.message)
+        # messages from json peers
+        self.assertEqual(codec.decode(Json().encode(self.message).encode()),
+                         self.message)
+        codec.fallback()
+        self.assertEqual(codec.name, 'json')
+        self.assertEqual(codec.decode(codec.encode(self.message)),
+                         self.message)
+        self.assertRaises(ProtocolError, codec.decode, b'\xff\x09foo')
+
+    def test_text_codec(self):
+        codec = Codecs(Json())
+        self.assertEqual(codec.codec, codec.default)
+        self.assertEqual(codec.decode(Marshal().encode(self.message)),
+                         self.message)
@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+
+from pulsar.apps.ds import ResponseError
+from pulsar.apps.data import create_store
+from pulsar.apps.data.pulsards import LocalStore
+from pulsar.apps.data.pulsards.local import servers
+
+from tests.stores.test_pulsards import RedisCommands
+
+
+class TestLocalStore(RedisCommands, unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.store = cls.create_store('local://%s/9' % cls.__name__.lower())
+        cls.client = cls.store.client()
+
+    def test_local_store(self):
+        store = self.store
+        self.assertIsInstance(store, LocalStore)
+        self.assertEqual(store.name, 'local')
+        self.assertEqual(store.database, 9)
+        self.assertEqual(repr(store.server), 'local://testlocalstore')
+        self.assertRaises(NotImplementedError, store.pubsub)
+        self.assertRaises(NotImplementedError, store.channels)
+
+    async def test_shared_storage(self):
+        key = self.randomkey()
+        self.assertTrue(await self.client.set(key, 'local'))
+        store = create_store('local://testlocalstore/9')
+        self.assertEqual(store.server, self.store.server)
+        self.assertEqual(await store.client().get(key), b'local')
+        # a different name has its own storage
+        store = create_store('local://%s/9' % self.randomkey())
+        self.assertNotEqual(store.server, self.store.server)
+        self.assertEqual(await store.client().get(key), None)
+        self.assertEqual(self.store.pool.available, 0)
+
+    async def test_close(self):
+        name = self.randomkey()
+        key = self.randomkey()
+        store1 = create_store('local://%s/9' % name)
+        store2 = create_store('local://%s/9' % name)
+        self.assertEqual(await store1.client().set(key, 'local'), True)
+        await store1.close()
+        self.assertIn((store2._loop, name), servers)
+        self.assertEqual(await store2.client().get(key), b'local')
+        # the storage is discarded with the last store
+        await store2.close()
+        self.assertNotIn((store2._loop, name), servers)
+        store = create_store('local://%s/9' % name)
+        self.assertNotEqual(store.server, store2.server)
+        self.assertEqual(await store.client().get(key), None)
+        await store.close()
+
+    async def test_latency_samples(self):
+        store = create_store('local://%s/9' % self.randomkey())
+        store.server.storage._latency.threshold = 1e-9
+        client = store.client()
+        # failed commands are timed too
+        await self.wait.assertRaises(ResponseError, client.expire,
+                                     self.randomkey(), 'bla')
+        latest = await client.latency('latest')
+        self.assertEqual(len(latest), 1)
+        self.assertEqual(latest[0][0], b'command')
+        for value in latest[0][1:]:
+            self.assertIsInstance(value, int)
+        history = await client.latency('history', 'command')
+        self.assertEqual(history, [latest[0][1:3]])
+        await store.close()
+
+    async def test_blocking(self):
+        client = self.client
+        key = self.randomkey()
+        self.assertEqual(await client.blpop(key, timeout=1), None)
+        waiter = asyncio.ensure_future(client.brpop(key, timeout=5))
+        await asyncio.sleep(0.01)
+        # the blocked client does not block other requests
+        self.assertEqual(await client.rpush(key, 'a', 'b'), 2)
+        self.assertEqual(await waiter, (key.encode('utf-8'), b'b'))
+        self.assertEqual(await client.lrange(key, 0, -1), [b'a'])
+
+    async def test_transaction_state(self):
+        client = self.client
+        key = self.randomkey()
+        pipe = client.pipeline()
+        pipe.set(key, 1)
+        pipe.incr(key)
+        pipe.lpush(key, 'a')
+        with self.assertRaises(Exception):
+            await pipe.commit()
+        # the transaction state does not leak into other requests
+        self.assertEqual(await client.get(key), b'2')
+        self.assertTrue(self.store._local.idle)
@@ -0,0 +1,184 @@
+import asyncio
+import unittest
+
+import pulsar
+from pulsar.apps.ds import PulsarDS
+from pulsar.apps.data.redis import NearCacheStore, CachePolicy
+
+from tests.stores.test_pulsards import StoreMixin
+
+
+class TestNearCache(StoreMixin, unittest.TestCase):
+
+    def near_cache(self, **kw):
+        # each test has its own storage and commands always yield to
+        # the event loop like a remote store would do
+        store = self.create_store('local://%s/9' % self.randomkey())
+        cache = NearCacheStore(store, **kw)
+        executed = []
+        execute = store.execute
+
+        async def spy(*args, **options):
+            executed.append(args[0].upper())
+            await asyncio.sleep(0)
+            result = await execute(*args, **options)
+            return result
+
+        cache.store = Spy(store, execute=spy)
+        return cache, executed
+
+    async def test_get(self):
+        cache, executed = self.near_cache()
+        client = cache.client()
+        key = self.randomkey()
+        self.assertEqual(await client.get(key), None)
+        self.assertEqual(await client.get(key), None)
+        self.assertTrue(await client.set(key, 'foo'))
+        self.assertEqual(await client.get(key), b'foo')
+        self.assertEqual(await client.get(key), b'foo')
+        self.assertEqual(executed, ['GET', 'SET', 'GET'])
+        stats = cache.stats
+        self.assertEqual((stats.hits, stats.misses), (2, 2))
+        self.assertEqual(stats.invalidations, 1)
+        self.assertEqual(stats.hit_ratio, 0.5)
+        self.assertEqual(cache.info()['entries'], 1)
+        self.assertEqual(cache.size, 3)
+
+    async def test_hash(self):
+        cache, executed = self.near_cache()
+        client = cache.client()
+        key = self.randomkey()
+        await client.hmset(key, {'a': 1, 'b': 2})
+        self.assertEqual(await client.hget(key, 'a'), b'1')
+        self.assertEqual(await client.hget(key, 'a'), b'1')
+        self.assertEqual(await client.hget(key, 'b'), b'2')
+        value = await client.hgetall(key)
+        self.assertEqual(value, {b'a': b'1', b'b': b'2'})
+        # cached values can't be changed by the caller
+        value.pop(b'a')
+        self.assertEqual(await client.hgetall(key),
+                         {b'a': b'1', b'b': b'2'})
+        self.assertEqual(executed, ['HMSET', 'HGET', 'HGET', 'HGETALL'])
+        await client.hdel(key, 'a')
+        self.assertEqual(await client.hget(key, 'a'), None)
+        self.assertEqual(await client.hgetall(key), {b'b': b'2'})
+        self.assertEqual(len(cache), 1)
+
+    async def test_pipeline_invalidates(self):
+        cache, executed = self.near_cache()
+        client = cache.client()
+        keys = [self.randomkey() for _ in range(3)]
+        for key in keys:
+            self.assertEqual(await client.get(key), None)
+        self.assertEqual(len(cache), 3)
+        pipe = cache.pipeline()
+        pipe.set(keys[0], 1)
+        pipe.get(keys[1])
+        await pipe.commit()
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(await client.get(keys[0]), b'1')
+        await client.flushdb()
+        self.assertEqual(len(cache), 0)
+
+    async def test_lru_eviction(self):
+        cache, executed = self.near_cache(max_entries=2)
+        client = cache.client()
+        keys = [self.randomkey() for _ in range(3)]
+        await client.get(keys[0])
+        await client.get(keys[1])
+        await client.get(keys[0])
+        await client.get(keys[2])
+        self.assertEqual(list(cache._entries), keys[::2])
+        self.assertEqual(cache.stats.evictions, 1)
+
+    async def test_size_eviction(self):
+        cache, executed = self.near_cache(max_size=10)
+        client = cache.client()
+        keys = [self.randomkey() for _ in range(3)]
+        for key in keys:
+            await client.set(key, '12345')
+            await client.get(key)
+        self.assertEqual(cache.size, 10)
+        self.assertEqual(list(cache._entries), keys[1:])
+
+    async def test_ttl_and_policies(self):
+        cache, executed = self.near_cache(ttl=0.05, policies={
+            'nocache:': {'ttl': 0},
+            'nocache:big:': CachePolicy(max_value_size=3)})
+        self.assertEqual(cache.policy('nocache:big:x').max_value_size, 3)
+        self.assertEqual(cache.policy('nocache:x').ttl, 0)
+        self.assertEqual(cache.policy('x').ttl, 0.05)
+        client = cache.client()
+        key = self.randomkey()
+        await client.get(key)
+        await client.get(key)
+        await asyncio.sleep(0.06)
+        await client.get(key)
+        self.assertEqual(cache.stats.expired, 1)
+        await client.get('nocache:%s' % key)
+        await client.get('nocache:%s' % key)
+        await client.set('nocache:big:%s' % key, 'toobig')
+        await client.get('nocache:big:%s' % key)
+        self.assertEqual(executed, ['GET', 'GET', 'GET', 'GET',
+                                    'SET', 'GET'])
+        self.assertEqual(len(cache), 1)
+
+    async def test_concurrent_write(self):
+        cache, executed = self.near_cache()
+        client = cache.client()
+        key = self.randomkey()
+        await client.set(key, 'old')
+        # the write completes while the read is in flight
+        read = asyncio.ensure_future(client.get(key))
+        await asyncio.sleep(0)
+        cache.invalidate(key)
+        self.assertEqual(await read, b'old')
+        self.assertEqual(len(cache), 0)
+
+
+class Spy:
+
+    def __init__(self, store, **methods):
+        self._store = store
+        self.__dict__.update(methods)
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+
+class TestNearCacheInvalidation(StoreMixin, unittest.TestCase):
+    app_cfg = None
+
+    @classmethod
+    async def setUpClass(cls):
+        server = PulsarDS(name=cls.__name__.lower(), bind='127.0.0.1:0')
+        cls.app_cfg = await pulsar.send('arbiter', 'run', server)
+        cls.uri = 'pulsar://%s:%s/9' % cls.app_cfg.addresses[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.app_cfg is not None:
+            return pulsar.send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def test_invalidation_channel(self):
+        channel = 'near_%s' % self.randomkey()
+        cache1 = NearCacheStore(self.create_store(self.uri),
+                                invalidation_channel=channel)
+        cache2 = NearCacheStore(self.create_store(self.uri),
+                                invalidation_channel=channel)
+        await cache1._subscribed
+        await cache2._subscribed
+        key = self.randomkey()
+        client1 = cache1.client()
+        client2 = cache2.client()
+        await client1.set(key, 'a')
+        self.assertEqual(await client1.get(key), b'a')
+        self.assertEqual(await client2.get(key), b'a')
+        await client1.set(key, 'b')
+        for _ in range(100):
+            if not len(cache2):
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(await client2.get(key), b'b')
+        await cache1.close()
+        await cache2.close()
@@ -134,6 +134,35 @@ class TestParser(unittest.TestCase):
         self.assertEqual(res2[0], b'100')
         self.assertEqual(res2[1], result[1])
 
+    def test_buffer_compaction(self):
+        p = self.parser()
+        replies = b''.join((p.bulk(b'%d' % i) for i in range(1000)))
+        for i in range(0, len(replies), 100):
+            p.feed(replies[i:i+100])
+            while p.get() is not False:
+                pass
+            self.assertTrue(len(p.buffer()) < 100)
+        self.assertEqual(p.buffer(), b'')
+
+    def test_memoryview(self):
+        p = redis_parser(True, 100)()
+        value = b''.join((b'%d' % i for i in range(1000)))
+        data = p.multi_bulk([value, b'small', value]) + b'+OK\r\n'
+        for i in range(0, len(data), 333):
+            self.assertEqual(p.get(), False)
+            p.feed(data[i:i+333])
+        result = p.get()
+        self.assertEqual(len(result), 3)
+        self.assertIsInstance(result[0], memoryview)
+        self.assertEqual(result[0], value)
+        self.assertEqual(result[1], b'small')
+        self.assertIsInstance(result[1], bytes)
+        self.assertEqual(result[2].tobytes(), value)
+        self.assertEqual(p.get(), b'OK')
+        self.assertEqual(p.buffer(), b'')
+        p.feed(p.bulk(value))
+        self.assertIsInstance(p.get(), memoryview)
+
     # CLIENT ENCODERS
     def test_encode_commands(self):
         p = self.parser()
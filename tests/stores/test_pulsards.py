@@ -1,4 +1,5 @@
 import binascii
+import hashlib
 import time
 import json
 import unittest
@@ -10,6 +11,11 @@ from pulsar.utils.string import random_string
 from pulsar.utils.structures import Zset
 from pulsar.apps.ds import PulsarDS, redis_parser, ResponseError
 from pulsar.apps.data import create_store
+from pulsar.apps.data.codecs import Json
+from pulsar.apps.data.redis import RedisScript
+from pulsar.apps.data.redis.pubsub import PubSubManager
+
+from tests.stores.channels import ChannelsTests
 
 
 class Listener:
@@ -44,11 +50,14 @@ class JsonProtocol:
 
 class StoreMixin:
     redis_py_parser = False
+    multiplexed = 0
 
     @classmethod
     def create_store(cls, address, namespace=None, pool_size=2, **kw):
         if cls.redis_py_parser:
             kw['parser_class'] = redis_parser(True)
+        if cls.multiplexed:
+            kw['multiplexed'] = cls.multiplexed
         if not namespace:
             namespace = cls.randomkey(6).lower()
         return create_store(address, namespace=namespace,
@@ -1148,8 +1157,62 @@ class RedisCommands(StoreMixin):
         total = t[0] + 0.000001*t[1]
         self.assertTrue(total)
 
+    async def test_latency(self):
+        eq = self.assertEqual
+        c = self.client
+        eq(await c.config('get', 'latency-monitor-threshold'),
+           [b'latency-monitor-threshold', b'0'])
+        self.assertIsInstance(await c.latency('latest'), list)
+        eq(await c.latency('history', 'foo'), [])
+        eq(await c.latency('reset', 'foo'), 0)
+        self.assertIsInstance(await c.latency('doctor'), bytes)
+
     ###########################################################################
-    #    PUBSUB
+    #    TRANSACTION
+    async def test_watch(self):
+        key1 = self.randomkey()
+        # key2 = key1 + '2'
+        result = await self.client.watch(key1)
+        self.assertEqual(result, 1)
+
+    async def test_pipeline_no_transaction(self):
+        key = self.randomkey()
+        pipe = self.client.pipeline(transaction=False)
+        self.assertFalse(pipe.transaction)
+        pipe.set(key, 1)
+        pipe.incr(key)
+        pipe.hset(key, 'a', 1)
+        pipe.get(key)
+        result = await pipe.commit(raise_on_error=False)
+        self.assertEqual(result[:2], [True, 2])
+        self.assertIsInstance(result[2], ResponseError)
+        self.assertEqual(result[3], b'2')
+        pipe.incr(key)
+        pipe.hset(key, 'a', 1)
+        await self.wait.assertRaises(ResponseError, pipe.commit)
+        self.assertEqual(await self.client.get(key), b'3')
+
+    async def test_pipeline_stream(self):
+        key = self.randomkey()
+        for transaction in (True, False):
+            pipe = self.client.pipeline(transaction=transaction)
+            commands = (('rpush', key, i) for i in range(2500))
+            chunks = []
+            async for result in pipe.stream(commands, chunk_size=1000):
+                chunks.append(result)
+            self.assertEqual([len(c) for c in chunks], [1000, 1000, 500])
+            self.assertEqual(chunks[-1][-1], 2500)
+            self.assertEqual(await self.client.delete(key), 1)
+        pipe.set(key, 'a')
+        pipe.get(key)
+        chunks = []
+        async for result in pipe.stream(chunk_size=1):
+            chunks.append(result)
+        self.assertEqual(chunks, [[True], [b'a']])
+
+
+class PubSubTests(StoreMixin):
+
     def test_handler(self):
         client = self.client
         pubsub = client.pubsub()
@@ -1220,26 +1283,122 @@ class RedisCommands(StoreMixin):
             pubsub = self.client.pubsub(protocol=StringProtocol())
             listener = Listener()
             pubsub.add_client(listener)
-            eq(await pubsub.psubscribe('f*'), None)
-            eq(await pubsub.publish('foo', 'hello foo'), 1)
+            # channels tests publish on foo_*
+            eq(await pubsub.psubscribe('pattern_f*'), None)
+            eq(await pubsub.publish('pattern_foo', 'hello foo'), 1)
             channel, message = await listener.get()
-            self.assertEqual(channel, 'foo')
+            self.assertEqual(channel, 'pattern_foo')
             self.assertEqual(message, 'hello foo')
             eq(await pubsub.punsubscribe(), None)
             # await listener.get()
 
-    ###########################################################################
-    #    TRANSACTION
-    async def test_watch(self):
-        key1 = self.randomkey()
-        # key2 = key1 + '2'
-        result = await self.client.watch(key1)
-        self.assertEqual(result, 1)
-
-
-class TestPulsarStore(RedisCommands, unittest.TestCase):
+    async def test_shared_subscribe(self):
+        key = 'shared_%s' % self.randomkey()
+        pubsub1 = self.client.pubsub(shared=True)
+        pubsub2 = self.client.pubsub(shared=True)
+        self.assertTrue(pubsub1.shared)
+        manager = pubsub1._manager
+        self.assertEqual(pubsub2._manager, manager)
+        await pubsub1.subscribe(key)
+        await pubsub2.subscribe(key)
+        connection = manager.connection
+        self.assertTrue(connection)
+        self.assertEqual(manager.count(key), 2)
+        # one subscription on the server
+        count = await pubsub1.count(key)
+        self.assertEqual(count[key.encode('utf-8')], 1)
+        await pubsub1.unsubscribe(key)
+        self.assertEqual(manager.count(key), 1)
+        count = await pubsub1.count(key)
+        self.assertEqual(count[key.encode('utf-8')], 1)
+        await pubsub2.close()
+        self.assertEqual(manager.count(key), 0)
+        # unsubscribe is not acknowledged, wait for the server
+        for _ in range(100):
+            count = await pubsub1.count(key)
+            if not count[key.encode('utf-8')]:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(count[key.encode('utf-8')], 0)
+
+    async def test_shared_dispatch(self):
+        key = 'shared_%s' % self.randomkey()
+        other = 'shared_%s' % self.randomkey()
+        decoded = []
+
+        class Codec(Json):
+
+            def decode(self, msg):
+                decoded.append(msg)
+                return super().decode(msg)
+
+        # each handler has its own codec instance
+        pubsub1 = self.client.pubsub(protocol=Codec(), shared=True)
+        pubsub2 = self.client.pubsub(protocol=Codec(), shared=True)
+        pubsub3 = self.client.pubsub(protocol=Codec(), shared=True)
+        listener1, listener2, listener3 = Listener(), Listener(), Listener()
+        pubsub1.add_client(listener1)
+        pubsub2.add_client(listener2)
+        pubsub3.add_client(listener3)
+        await pubsub1.subscribe(key)
+        await pubsub2.subscribe(key)
+        await pubsub3.subscribe(other)
+        self.assertEqual(await pubsub1.publish(key, 'Hello'), 1)
+        self.assertEqual(await listener1.get(), (key, 'Hello'))
+        self.assertEqual(await listener2.get(), (key, 'Hello'))
+        self.assertEqual(len(decoded), 1)
+        self.assertTrue(listener3._messages.empty())
+        await pubsub1.close()
+        await pubsub2.close()
+        await pubsub3.close()
+
+    async def test_keyspace_events(self):
+        eq = self.assertEqual
+        c = self.client
+        key = self.randomkey()
+        db = self.store.database
+        keyspace = '__keyspace@%s__:%s' % (db, key)
+        eq(await c.config('set', 'notify-keyspace-events', 'KEA'), b'OK')
+
+        async def get():
+            # other tests may expire keys concurrently
+            while True:
+                channel, message = await listener.get()
+                if channel == keyspace or message == key.encode('utf-8'):
+                    return channel, message
+
+        try:
+            eq(await c.config('get', 'notify-keyspace-events'),
+               [b'notify-keyspace-events', b'AKE'])
+            pubsub = self.client.pubsub()
+            listener = Listener()
+            pubsub.add_client(listener)
+            await pubsub.subscribe(keyspace, '__keyevent@%s__:expired' % db)
+            eq(await c.set(key, 'foo'), True)
+            eq(await get(), (keyspace, b'set'))
+            eq(await c.delete(key), 1)
+            eq(await get(), (keyspace, b'del'))
+            eq(await c.set(key, 'foo', px=10), True)
+            eq(await get(), (keyspace, b'set'))
+            eq(await get(), (keyspace, b'expire'))
+            eq(await get(), (keyspace, b'expired'))
+            eq(await get(), ('__keyevent@%s__:expired' % db,
+                             key.encode('utf-8')))
+            await pubsub.close()
+        finally:
+            eq(await c.config('set', 'notify-keyspace-events', ''), b'OK')
+        eq(await c.config('get', 'notify-keyspace-events'),
+           [b'notify-keyspace-events', b''])
+
+
+class TestPulsarStore(RedisCommands, PubSubTests, ChannelsTests,
+                      unittest.TestCase):
     app_cfg = None
 
+    @classmethod
+    def namespace(cls):
+        return cls.__name__.lower()
+
     @classmethod
     async def setUpClass(cls):
         server = PulsarDS(name=cls.__name__.lower(),
@@ -1247,7 +1406,8 @@ class TestPulsarStore(RedisCommands, unittest.TestCase):
                           redis_py_parser=cls.redis_py_parser)
         cls.app_cfg = await pulsar.send('arbiter', 'run', server)
         cls.pulsards_uri = 'pulsar://%s:%s' % cls.app_cfg.addresses[0]
-        cls.store = cls.create_store('%s/9' % cls.pulsards_uri)
+        cls.store = cls.create_store('%s/9' % cls.pulsards_uri,
+                                     namespace=cls.namespace())
         cls.client = cls.store.client()
 
     @classmethod
@@ -1264,7 +1424,157 @@ class TestPulsarStore(RedisCommands, unittest.TestCase):
         self.assertEqual(store.encoding, 'utf-8')
         self.assertTrue(repr(store))
 
+    async def test_register_script(self):
+        store = self.create_store('%s/9' % self.pulsards_uri)
+        script = RedisScript('return 1')
+        script.sha = hashlib.sha1(b'return 1').hexdigest()
+        self.assertTrue(store.register_script(script))
+        self.assertFalse(store.register_script(script))
+        self.assertTrue(script.sha in store.loaded_scripts)
+        # pulsar-ds does not support scripting, the connection is still
+        # created when the scripts fail to load
+        self.assertTrue(await store.client().ping())
+        await store.close()
+
+    async def test_publish_batch(self):
+        store = self.create_store('%s/9' % self.pulsards_uri)
+        batches = []
+        execute_pipeline = store.execute_pipeline
+
+        def spy(commands, raise_on_error=True):
+            batches.append(len(commands))
+            return execute_pipeline(commands, raise_on_error)
+
+        store.execute_pipeline = spy
+        pubsub = store.pubsub()
+        key = 'batch_%s' % self.randomkey()
+        listener = Listener()
+        pubsub.add_client(listener)
+        await pubsub.subscribe(key)
+        results = await asyncio.gather(*[pubsub.publish(key, str(i))
+                                         for i in range(10)])
+        self.assertEqual(results, [1] * 10)
+        self.assertEqual(batches, [10])
+        for i in range(10):
+            self.assertEqual(await listener.get(),
+                             (key, str(i).encode('utf-8')))
+        await pubsub.close()
+        await store.close()
+
+    async def test_publish_no_wait(self):
+        store = self.create_store('%s/9' % self.pulsards_uri)
+        publisher = store.publisher
+        publisher.max_buffer = 3
+        pubsub = store.pubsub()
+        key = 'batch_%s' % self.randomkey()
+        listener = Listener()
+        pubsub.add_client(listener)
+        await pubsub.subscribe(key)
+        for i in range(5):
+            self.assertEqual(pubsub.publish(key, str(i), wait=False), None)
+        self.assertEqual(len(publisher), 3)
+        self.assertEqual(publisher.dropped, 2)
+        # waited messages are never dropped
+        self.assertEqual(await pubsub.publish(key, 'last'), 1)
+        for value in (b'0', b'1', b'2', b'last'):
+            self.assertEqual(await listener.get(), (key, value))
+        self.assertEqual(len(publisher), 0)
+        await pubsub.close()
+        await store.close()
+
+    async def test_shared_remove(self):
+        store = self.create_store('%s/7' % self.pulsards_uri)
+        managers = PubSubManager.managers
+        key = 'shared_%s' % self.randomkey()
+        pubsub = store.pubsub(shared=True)
+        await pubsub.subscribe(key)
+        manager = pubsub._manager
+        self.assertTrue(manager.connection)
+        self.assertIn(manager, managers.values())
+        # the manager is removed with its last handler
+        await pubsub.close()
+        self.assertFalse(manager.connection)
+        self.assertNotIn(manager, managers.values())
+        await pubsub.subscribe(key)
+        other = pubsub._manager
+        self.assertNotEqual(other, manager)
+        self.assertTrue(other.connection)
+        self.assertIn(other, managers.values())
+        # a store with the same server uses the same manager
+        store2 = self.create_store('%s/7' % self.pulsards_uri)
+        pubsub2 = store2.pubsub(shared=True)
+        listener = Listener()
+        pubsub2.add_client(listener)
+        await pubsub2.subscribe(key)
+        self.assertEqual(pubsub2._manager, other)
+        # closing one store keeps the subscriptions of the other
+        await store.close()
+        self.assertTrue(other.connection)
+        self.assertEqual(other.store, store2)
+        self.assertIn(other, managers.values())
+        self.assertEqual(await pubsub2.publish(key, 'Hello'), 1)
+        self.assertEqual(await listener.get(), (key, b'Hello'))
+        # the manager is removed with the last store
+        await store2.close()
+        self.assertFalse(other.connection)
+        self.assertNotIn(other, managers.values())
+
+    async def test_shared_resubscribe(self):
+        # a different database has its own manager
+        store = self.create_store('%s/8' % self.pulsards_uri)
+        key = 'shared_%s' % self.randomkey()
+        pubsub = store.pubsub(shared=True)
+        listener = Listener()
+        pubsub.add_client(listener)
+        await pubsub.subscribe(key)
+        manager = pubsub._manager
+        lost = asyncio.Future()
+        pubsub.bind_event('connection_lost',
+                          lambda *args, **kw: lost.set_result(None))
+        manager.connection._transport.close()
+        await lost
+        self.assertEqual(manager.connection, None)
+        # the next subscription re-subscribes all channels in bulk
+        other = store.pubsub(shared=True)
+        await other.subscribe('shared_%s' % self.randomkey())
+        self.assertTrue(manager.connection)
+        self.assertEqual(await pubsub.publish(key, 'Hello'), 1)
+        self.assertEqual(await listener.get(), (key, b'Hello'))
+        await other.close()
+        await pubsub.close()
+        await store.close()
+
 
 @unittest.skipUnless(pulsar.HAS_C_EXTENSIONS, 'Requires cython extensions')
 class TestPulsarStorePyParser(TestPulsarStore):
     redis_py_parser = True
+
+
+class TestPulsarStoreMultiplexed(TestPulsarStore):
+    multiplexed = 2
+
+    async def test_multiplexed(self):
+        store = self.create_store('%s/9' % self.pulsards_uri)
+        self.assertEqual(store.multiplexed, 2)
+        client = store.client()
+        key = self.randomkey()
+        results = await asyncio.gather(*[client.incr(key)
+                                         for _ in range(100)])
+        self.assertEqual(sorted(results), list(range(1, 101)))
+        self.assertTrue(len(store._shared_connections) <= 2)
+        self.assertEqual(store.pool.available, 0)
+        self.assertEqual(await client.get(key), b'100')
+        await store.close()
+        self.assertFalse(store._shared_connections)
+
+    async def test_multiplexed_unexpected_reply(self):
+        store = self.create_store('%s/9' % self.pulsards_uri)
+        client = store.client()
+        key = self.randomkey()
+        self.assertEqual(await client.set(key, 'foo'), True)
+        connection = await store._shared_connection()
+        self.assertEqual(connection.pending, 0)
+        # a reply nobody is waiting for is dropped
+        connection.data_received(b'+OK\r\n')
+        self.assertEqual(await client.get(key), b'foo')
+        await store.close()
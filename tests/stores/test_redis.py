@@ -2,7 +2,8 @@ from pulsar import HAS_C_EXTENSIONS
 from pulsar.apps.test import check_server, skipUnless
 from pulsar.apps.data.redis import RedisScript
 
-from tests.stores.test_pulsards import unittest, RedisCommands, create_store
+from tests.stores.test_pulsards import (unittest, RedisCommands, PubSubTests,
+                                        create_store)
 from tests.stores.lock import RedisLockTests
 from tests.stores.channels import ChannelsTests
 
@@ -12,6 +13,7 @@ OK = check_server('redis')
 
 @skipUnless(OK, 'Requires a running Redis server')
 class TestRedisStore(RedisCommands,
+                     PubSubTests,
                      RedisLockTests,
                      ChannelsTests,
                      unittest.TestCase):
@@ -40,6 +42,19 @@ class TestRedisStore(RedisCommands,
         result = await script(self.client)
         self.assertEqual(result, 1)
 
+    async def test_script_preload(self):
+        script = RedisScript("return 2")
+        self.assertEqual(await script(self.client), 2)
+        store = create_store(self.store.dns)
+        store.register_script(script)
+        client = store.client()
+        self.assertEqual(await client.script('exists', script.sha), [1])
+        # the server loses its scripts, EVAL is used
+        await client.script('flush')
+        self.assertEqual(await script(client), 2)
+        self.assertEqual(await client.script('exists', script.sha), [1])
+        await store.close()
+
     async def test_eval(self):
         result = await self.client.eval('return "Hello"')
         self.assertEqual(result, b'Hello')
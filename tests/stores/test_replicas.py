@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+
+import pulsar
+from pulsar.apps.ds import PulsarDS
+
+from tests.stores.test_pulsards import StoreMixin
+from tests.stores.test_sharded import free_port
+
+
+class TestReplicas(StoreMixin, unittest.TestCase):
+    app_cfgs = ()
+
+    @classmethod
+    async def setUpClass(cls):
+        cls.app_cfgs = []
+        for i in range(3):
+            server = PulsarDS(name='%s%s' % (cls.__name__.lower(), i),
+                              bind='127.0.0.1:0')
+            cls.app_cfgs.append(await pulsar.send('arbiter', 'run', server))
+        cls.addresses = ['%s:%s' % cfg.addresses[0] for cfg in cls.app_cfgs]
+        cls.store = cls.create_store('pulsar://%s/9' % cls.addresses[0],
+                                     replicas=cls.addresses[1:])
+        cls.client = cls.store.client()
+
+    @classmethod
+    async def tearDownClass(cls):
+        for cfg in cls.app_cfgs:
+            await pulsar.send('arbiter', 'kill_actor', cfg.name)
+
+    def test_store(self):
+        store = self.store
+        self.assertEqual(len(store.replicas), 2)
+        self.assertEqual(store.urlparams['replicas'],
+                         ','.join(self.addresses[1:]))
+        for replica in store.replicas:
+            self.assertEqual(replica.store.database, 9)
+            self.assertEqual(replica.outstanding, 0)
+            self.assertTrue(repr(replica))
+
+    async def test_read_from_replicas(self):
+        key = self.randomkey()
+        replicas = self.store.replicas
+        # No replication in pulsar-ds, populate the replicas directly
+        for replica in replicas:
+            await replica.store.client().set(key, 'replica')
+        self.assertTrue(await self.client.set(key, 'primary'))
+        values = await asyncio.gather(*[self.client.get(key)
+                                        for _ in range(10)])
+        self.assertEqual(values, [b'replica'] * 10)
+        self.assertEqual(await self.client.execute('get', key,
+                                                   primary=True),
+                         b'primary')
+        self.assertTrue(await self.client.set(key, 'primary2'))
+        client = self.store.client(read_your_writes=60)
+        self.assertEqual(await client.get(key), b'replica')
+        self.assertTrue(await client.set(key, 'primary3'))
+        self.assertEqual(await client.get(key), b'primary3')
+        self.assertEqual(await self.client.get(key), b'replica')
+
+    async def test_balancing(self):
+        store = self.create_store('pulsar://%s/9' % self.addresses[0],
+                                  replicas=','.join(self.addresses[1:]))
+        key = self.randomkey()
+        replicas = store.replicas
+        for i, replica in enumerate(replicas):
+            await replica.store.client().set(key, i)
+        replicas[0].outstanding += 1
+        self.assertEqual(await store.client().get(key), b'1')
+        replicas[0].outstanding -= 1
+        replicas[1].outstanding += 1
+        self.assertEqual(await store.client().get(key), b'0')
+        replicas[1].outstanding -= 1
+        await store.close()
+
+    async def test_replica_down(self):
+        store = self.create_store('pulsar://%s/9' % self.addresses[0],
+                                  replicas='127.0.0.1:%s' % free_port())
+        client = store.client()
+        key = self.randomkey()
+        self.assertTrue(await client.set(key, 'primary'))
+        self.assertEqual(await client.get(key), b'primary')
+        await store.close()
+
+    async def test_replica_options(self):
+        store = self.create_store('pulsar://%s/9' % self.addresses[0],
+                                  replicas=self.addresses[1:],
+                                  codec='marshal',
+                                  pool_options=dict(max_lifetime=30))
+        for replica in store.replicas:
+            self.assertEqual(replica.store.urlparams['codec'], 'marshal')
+            self.assertEqual(replica.store.pool._max_lifetime, 30)
+        await store.close()
+
+    async def test_replica_timeout(self):
+        store = self.create_store('pulsar://%s/9' % self.addresses[0],
+                                  replicas=self.addresses[1:2])
+
+        async def timeout(*args, **options):
+            raise asyncio.TimeoutError
+
+        store.replicas[0].store.execute = timeout
+        client = store.client()
+        key = self.randomkey()
+        self.assertTrue(await client.set(key, 'primary'))
+        self.assertEqual(await client.get(key), b'primary')
+        await store.close()
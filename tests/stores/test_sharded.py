@@ -0,0 +1,171 @@
+import socket
+import unittest
+from collections import Counter
+
+import pulsar
+from pulsar.apps.ds import PulsarDS, CommandError
+from pulsar.apps.data.redis import ShardedRedisStore
+from pulsar.apps.data.redis.sharded import hash_key, command_keys
+
+from tests.stores.test_pulsards import StoreMixin
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestShardedStore(StoreMixin, unittest.TestCase):
+    app_cfgs = ()
+
+    @classmethod
+    async def setUpClass(cls):
+        cls.app_cfgs = []
+        for i in range(2):
+            server = PulsarDS(name='%s%s' % (cls.__name__.lower(), i),
+                              bind='127.0.0.1:0')
+            cls.app_cfgs.append(await pulsar.send('arbiter', 'run', server))
+        cls.uris = ['pulsar://%s:%s/9' % cfg.addresses[0]
+                    for cfg in cls.app_cfgs]
+        cls.store = cls.create_sharded(cls.uris)
+        cls.client = cls.store.client()
+
+    @classmethod
+    async def tearDownClass(cls):
+        for cfg in cls.app_cfgs:
+            await pulsar.send('arbiter', 'kill_actor', cfg.name)
+
+    @classmethod
+    def create_sharded(cls, uris, **kw):
+        return ShardedRedisStore(uris, namespace=cls.randomkey(6).lower(),
+                                 pool_size=2, **kw)
+
+    def keys(self, size=50):
+        prefix = self.randomkey()
+        return ['%s:%s' % (prefix, i) for i in range(size)]
+
+    def test_hash_key(self):
+        self.assertEqual(hash_key('{user:1}:name'), hash_key('user:1'))
+        self.assertEqual(hash_key(b'a{b}'), hash_key('b'))
+        self.assertEqual(hash_key('a{}b'), hash_key('a{}b'))
+        self.assertNotEqual(hash_key('a{}b'), hash_key(''))
+        self.assertEqual(hash_key(5), hash_key('5'))
+        self.assertEqual(command_keys('get', ('a',)), ('a',))
+        self.assertEqual(command_keys('mset', ('a', 1, 'b', 2)), ('a', 'b'))
+        self.assertEqual(command_keys('evalsha', ('sha', 1, 'a', 'x')),
+                         ('a',))
+        self.assertEqual(command_keys('zunionstore', ('d', 2, 'a', 'b', 'c')),
+                         ('d', 'a', 'b'))
+        self.assertEqual(command_keys('ping', ()), ())
+
+    def test_distribution(self):
+        store = self.store
+        self.assertEqual(len(store.nodes), 2)
+        self.assertTrue(repr(store))
+        counts = Counter(store.node(key) for key in self.keys(1000))
+        self.assertEqual(len(counts), 2)
+        self.assertTrue(min(counts.values()) > 300)
+        node = store.node('{tag}:a')
+        for key in ('{tag}:b', 'x{tag}', '{tag}'):
+            self.assertEqual(store.node(key), node)
+
+    async def test_single_key(self):
+        client = self.client
+        keys = self.keys()
+        for i, key in enumerate(keys):
+            self.assertTrue(await client.set(key, i))
+        for i, key in enumerate(keys):
+            self.assertEqual(await client.get(key), str(i).encode('utf-8'))
+        nodes = set(self.store.node(key) for key in keys)
+        self.assertEqual(len(nodes), 2)
+        for node in nodes:
+            mine = [k for k in keys if self.store.node(k) is node]
+            values = await node.store.client().mget(*mine)
+            self.assertFalse(None in values)
+
+    async def test_split_commands(self):
+        client = self.client
+        keys = self.keys()
+        args = []
+        for i, key in enumerate(keys):
+            args.extend((key, i))
+        self.assertTrue(await client.mset(*args))
+        values = await client.mget(*keys)
+        self.assertEqual(values, [str(i).encode('utf-8')
+                                  for i in range(len(keys))])
+        self.assertEqual(await client.delete(*keys[:20]), 20)
+        self.assertEqual(await client.delete(*keys), len(keys) - 20)
+        self.assertEqual(await client.mget(*keys), [None] * len(keys))
+
+    async def test_cross_slot(self):
+        client = self.client
+        prefix = self.randomkey()
+        keys = ['%s:%s' % (prefix, i) for i in range(20)]
+        with self.assertRaises(CommandError):
+            await client.sunionstore(*keys)
+        tagged = ['{%s}:%s' % (prefix, i) for i in range(3)]
+        await client.sadd(tagged[0], 'a', 'b')
+        await client.sadd(tagged[1], 'b', 'c')
+        self.assertEqual(
+            await client.sunionstore(tagged[2], tagged[0], tagged[1]), 3)
+        self.assertEqual(await client.smembers(tagged[2]), {b'a', b'b', b'c'})
+
+    async def test_pipeline(self):
+        for transaction in (True, False):
+            keys = self.keys(20)
+            pipe = self.store.pipeline(transaction=transaction)
+            for i, key in enumerate(keys):
+                pipe.set(key, i)
+                pipe.incr(key)
+            result = await pipe.commit()
+            self.assertEqual(result, [v for i in range(20)
+                                      for v in (True, i + 1)])
+            values = await self.client.mget(*keys)
+            self.assertEqual(values, [str(i + 1).encode('utf-8')
+                                      for i in range(20)])
+
+    async def test_broadcast(self):
+        self.assertTrue(await self.client.ping())
+        self.assertTrue(await self.store.ping())
+        self.assertTrue(await self.client.dbsize() >= 0)
+
+    async def test_failover(self):
+        dead = 'pulsar://127.0.0.1:%s/9' % free_port()
+        store = self.create_sharded(self.uris + [dead], retry_interval=60)
+        client = store.client()
+        node = store.nodes[-1]
+        keys = [key for key in self.keys(200) if store.node(key) is node]
+        self.assertTrue(keys)
+        with self.assertRaises(ConnectionRefusedError):
+            await client.ping()
+        self.assertEqual(node.failures, 1)
+        self.assertFalse(node.available(store._loop.time()))
+        # keys are re-routed to the remaining nodes
+        for key in keys:
+            self.assertNotEqual(store.node(key), node)
+            self.assertTrue(await client.set(key, 1))
+        self.assertEqual(await client.mget(*keys), [b'1'] * len(keys))
+        self.assertTrue(await client.ping())
+        node.recovered()
+        self.assertEqual(store.node(keys[0]), node)
+        # connection refused on the owner: the command is re-routed
+        self.assertEqual(await client.get(keys[0]), b'1')
+        self.assertEqual(node.failures, 1)
+        await store.close()
+
+    async def test_pubsub_node(self):
+        store = self.create_sharded(self.uris)
+        client = store.client()
+        key = self.randomkey()
+        pubsub = store.pubsub()
+        await pubsub.subscribe(key)
+        # publish goes to the node of the subscribers, even when failing
+        node = store.pubsub_node
+        node.failed(store._loop.time(), 60, 60)
+        self.assertNotEqual(store.available_nodes()[0], node)
+        self.assertEqual(await client.publish(key, 'Hello'), 1)
+        await pubsub.close()
+        await store.close()
@@ -2,6 +2,7 @@ import re
 import unittest
 
 from pulsar.apps.ds import redis_to_py_pattern
+from pulsar.apps.ds.utils import LatencyMonitor
 
 
 class TestUtils(unittest.TestCase):
@@ -33,3 +34,25 @@ class TestUtils(unittest.TestCase):
         self.match(c, 'hello')
         self.match(c, 'hallo')
         self.not_match(c, 'hollo')
+
+    def test_latency_monitor(self):
+        monitor = LatencyMonitor(samples=3)
+        self.assertEqual(monitor.start(), 0)
+        monitor.finish('command', 0)
+        self.assertFalse(monitor.events)
+        monitor.threshold = 0.001
+        self.assertTrue(monitor.start())
+        monitor.add_sample('command', 5)
+        monitor.add_sample('command', 3)
+        history = monitor.history('command')
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history[0][1], 5)
+        name, _, latest, worst = list(monitor.latest())[0]
+        self.assertEqual(name, 'command')
+        self.assertEqual(latest, 5)
+        self.assertEqual(worst, 5)
+        self.assertTrue(list(monitor.doctor()))
+        self.assertEqual(monitor.history('cron'), [])
+        self.assertEqual(monitor.reset('cron'), 0)
+        self.assertEqual(monitor.reset(), 1)
+        self.assertFalse(monitor.events)
@@ -3,7 +3,8 @@ import unittest
 from unittest import mock
 
 from pulsar.utils.internet import (parse_address, parse_connection_string,
-                                   close_socket, format_address)
+                                   close_socket, format_address,
+                                   reuse_port_sockets)
 
 
 class TestParseAddress(unittest.TestCase):
@@ -91,3 +92,35 @@ class TestMisc(unittest.TestCase):
         self.assertRaises(ValueError, format_address, (1, 2, 3))
         self.assertRaises(ValueError, format_address, (1, 2, 3, 4, 5))
         self.assertEqual(format_address(1), '1')
+
+
+@unittest.skipUnless(hasattr(socket, 'SO_REUSEPORT'),
+                     'Requires SO_REUSEPORT')
+class TestReusePortSockets(unittest.TestCase):
+
+    def _reuse_port(self, type):
+        sockets = reuse_port_sockets(('127.0.0.1', 0), type)
+        try:
+            self.assertEqual(len(sockets), 1)
+            address = sockets[0].getsockname()
+            # port 0 picks a random port
+            self.assertNotEqual(address[1], 0)
+            # non blocking, ready for the event loop
+            self.assertEqual(sockets[0].gettimeout(), 0)
+            # other sockets can bind the same address
+            others = reuse_port_sockets(address, type)
+            self.assertEqual(others[0].getsockname(), address)
+            sockets.extend(others)
+            # but not without SO_REUSEPORT
+            sock = socket.socket(socket.AF_INET, type)
+            sockets.append(sock)
+            self.assertRaises(OSError, sock.bind, address)
+        finally:
+            for sock in sockets:
+                sock.close()
+
+    def test_stream(self):
+        self._reuse_port(socket.SOCK_STREAM)
+
+    def test_datagram(self):
+        self._reuse_port(socket.SOCK_DGRAM)
@@ -1,4 +1,6 @@
 '''Tests the tools and utilities in pulsar.utils.'''
+import subprocess
+import sys
 import unittest
 from datetime import datetime, date
 
@@ -99,6 +101,20 @@ class TestSystemInfo(unittest.TestCase):
         system.process_info()
         self.assertTrue(isinstance(info, dict))
 
+    @unittest.skipUnless(system.psutil, 'Requires psutil')
+    def test_dead_process(self):
+        from pulsar.utils.system import _processes
+        p = subprocess.Popen([sys.executable, '-c',
+                              'import time; time.sleep(10)'])
+        try:
+            self.assertTrue(system.process_info(p.pid))
+            self.assertIn(p.pid, _processes)
+        finally:
+            p.kill()
+            p.wait()
+        system.process_info()
+        self.assertNotIn(p.pid, _processes)
+
 
 # sequential decorator, just for coverage.
 @sequential